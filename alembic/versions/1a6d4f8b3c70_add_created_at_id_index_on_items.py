@@ -0,0 +1,34 @@
+"""Add composite (created_at, id) index on items for keyset pagination
+
+Revision ID: 1a6d4f8b3c70
+Revises: e7a3c9d1b5f2
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1a6d4f8b3c70'
+down_revision: Union[str, Sequence[str], None] = 'e7a3c9d1b5f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ORDER BY created_at DESC, id DESC читается этим индексом в обратном порядке
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_created_at_id "
+            "ON items (created_at, id)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_items_created_at_id")
@@ -0,0 +1,37 @@
+"""Add partial HNSW index on items.vector for active found items
+
+Revision ID: 3c8e5f0a1b27
+Revises: 66ea6346e892
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c8e5f0a1b27'
+down_revision: Union[str, Sequence[str], None] = '66ea6346e892'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не блокирует запись в items на время построения индекса,
+    # но не может выполняться внутри транзакции, поэтому используем autocommit_block.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_vector_hnsw_active_found "
+            "ON items USING hnsw (vector vector_cosine_ops) "
+            "WITH (m = 16, ef_construction = 64) "
+            "WHERE type = 'FOUND' AND status = 'ACTIVE'"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_items_vector_hnsw_active_found")
@@ -0,0 +1,42 @@
+"""Add pg_trgm extension and trigram GIN indexes on items text columns
+
+Revision ID: 5f1c7e9a2d40
+Revises: 8d2a4b6c9e13
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f1c7e9a2d40'
+down_revision: Union[str, Sequence[str], None] = '8d2a4b6c9e13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Индексы по всей таблице, а не только по активным: модераторы ищут и в архиве.
+    # gin_trgm_ops ускоряет и ILIKE '%...%', и операторы похожести % / <%.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_description_trgm "
+            "ON items USING gin (description gin_trgm_ops)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_specific_place_trgm "
+            "ON items USING gin (specific_place gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_items_specific_place_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_items_description_trgm")
+    # Расширение не удаляем: им могут пользоваться другие объекты базы.
@@ -0,0 +1,36 @@
+"""Add partial (category_id, created_at) index on active items for archival
+
+Revision ID: 6b2d9e4f1c83
+Revises: 1a6d4f8b3c70
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b2d9e4f1c83'
+down_revision: Union[str, Sequence[str], None] = '1a6d4f8b3c70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Условие совпадает с ACTIVE_CONDITION в app/whereismy/core/models/item.py.
+    # Архивация выбирает порции самых старых активных объявлений категории по этому индексу;
+    # архивированные строки из него уходят, и индекс остаётся размером с рабочий набор.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_active_category_created "
+            "ON items (category_id, created_at) WHERE status = 'ACTIVE'"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_items_active_category_created")
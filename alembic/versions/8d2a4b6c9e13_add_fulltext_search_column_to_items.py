@@ -0,0 +1,48 @@
+"""Add generated tsvector column and GIN index on items for full-text search
+
+Revision ID: 8d2a4b6c9e13
+Revises: 3c8e5f0a1b27
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2a4b6c9e13'
+down_revision: Union[str, Sequence[str], None] = '3c8e5f0a1b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Добавление STORED-столбца переписывает таблицу под эксклюзивной блокировкой:
+    # на большой таблице выполнять в окно обслуживания.
+    op.add_column('items', sa.Column(
+        'search_tsv',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('russian', coalesce(description, '')), 'A') || "
+            "setweight(to_tsvector('russian', coalesce(specific_place, '')), 'B')",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_search_tsv_active_found "
+            "ON items USING gin (search_tsv) "
+            "WHERE type = 'FOUND' AND status = 'ACTIVE'"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_items_search_tsv_active_found")
+    op.drop_column('items', 'search_tsv')
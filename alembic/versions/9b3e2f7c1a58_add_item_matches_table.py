@@ -0,0 +1,40 @@
+"""Add item_matches table for LOST-to-FOUND matches
+
+Revision ID: 9b3e2f7c1a58
+Revises: 5f1c7e9a2d40
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3e2f7c1a58'
+down_revision: Union[str, Sequence[str], None] = '5f1c7e9a2d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('item_matches',
+    sa.Column('lost_item_id', sa.Integer(), nullable=False),
+    sa.Column('found_item_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text("TIMEZONE('utc', now())"), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['lost_item_id'], ['items.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['found_item_id'], ['items.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('lost_item_id', 'found_item_id', name='uq_item_matches_lost_found')
+    )
+    op.create_index('ix_item_matches_found_item_id', 'item_matches', ['found_item_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_item_matches_found_item_id', table_name='item_matches')
+    op.drop_table('item_matches')
@@ -0,0 +1,64 @@
+"""Move item vectors into versioned item_embeddings table
+
+Revision ID: c4e8a1d7f2b6
+Revises: 9b3e2f7c1a58
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import pgvector.sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a1d7f2b6'
+down_revision: Union[str, Sequence[str], None] = '9b3e2f7c1a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('item_embeddings',
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('model_version', sa.String(), nullable=False),
+    sa.Column('vector', pgvector.sqlalchemy.Vector(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text("TIMEZONE('utc', now())"), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['item_id'], ['items.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('item_id', 'model_version', name='uq_item_embeddings_item_version')
+    )
+    # Существующие векторы посчитаны моделью paraphrase-multilingual-MiniLM-L12-v2 — это версия v1
+    op.execute(
+        "INSERT INTO item_embeddings (item_id, model_version, vector) "
+        "SELECT id, 'v1', vector FROM items WHERE vector IS NOT NULL"
+    )
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_item_embeddings_hnsw_v1 "
+            "ON item_embeddings USING hnsw ((vector::vector(384)) vector_cosine_ops) "
+            "WITH (m = 16, ef_construction = 64) "
+            "WHERE model_version = 'v1'"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_items_vector_hnsw_active_found")
+    op.drop_column('items', 'vector')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('items', sa.Column('vector', pgvector.sqlalchemy.Vector(384), nullable=True))
+    op.execute(
+        "UPDATE items SET vector = e.vector::vector(384) FROM item_embeddings e "
+        "WHERE e.item_id = items.id AND e.model_version = 'v1'"
+    )
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_vector_hnsw_active_found "
+            "ON items USING hnsw (vector vector_cosine_ops) "
+            "WITH (m = 16, ef_construction = 64) "
+            "WHERE type = 'FOUND' AND status = 'ACTIVE'"
+        )
+    op.drop_table('item_embeddings')
@@ -0,0 +1,44 @@
+"""Add partial B-tree indexes for filtered search on active found items
+
+Revision ID: e7a3c9d1b5f2
+Revises: c4e8a1d7f2b6
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3c9d1b5f2'
+down_revision: Union[str, Sequence[str], None] = 'c4e8a1d7f2b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Условие совпадает с ACTIVE_FOUND_CONDITION в app/whereismy/core/models/item.py
+ACTIVE_FOUND_CONDITION = "type = 'FOUND' AND status = 'ACTIVE'"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Если фильтр узкий («корпус 3 за 7 дней»), планировщик выбирает эти индексы
+    # и считает точное расстояние по немногим строкам; иначе работает HNSW с итеративным сканом.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_active_found_category_created "
+            f"ON items (category_id, created_at) WHERE {ACTIVE_FOUND_CONDITION}"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_active_found_location_created "
+            f"ON items (location_id, created_at) WHERE {ACTIVE_FOUND_CONDITION}"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_items_active_found_location_created")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_items_active_found_category_created")
@@ -3,13 +3,10 @@ from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
+from app.whereismy.bot.keyboards import category_keyboard, location_keyboard
 from app.whereismy.bot.states import FindItemStateGroup
-from app.whereismy.core.database import get_db_session
-from app.whereismy.core.repository.item_repository import ItemRepository
-from app.whereismy.core.repository.category_repository import CategoryRepository
-from app.whereismy.core.repository.location_repository import LocationRepository
-from app.whereismy.core.repository.user_repository import UserRepository
 from app.whereismy.services.items_service import ItemsService
+from app.whereismy.services.unit_of_work import UnitOfWork
 
 router = Router()
 
@@ -46,16 +43,8 @@ async def process_description(message: Message, state: FSMContext):
     description = message.text
     await state.update_data(description=description)
 
-    # Получаем список категорий из БД через репозиторий
-    async with get_db_session() as session: # Нужно будет переделать на зависимость, как в API
-        category_repo = CategoryRepository(session)
-        categories = await category_repo.get_list(session) # Используем get_list
-
-    # Формируем inline-клавиатуру с категориями
-    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text=cat.name, callback_data=f"cat_{cat.id}")] for cat in categories
-    ])
+    # Inline-клавиатура с категориями: готовая, из кэша справочников (без запроса к БД)
+    keyboard = await category_keyboard()
 
     await message.answer("Выберите категорию вещи:", reply_markup=keyboard)
     await state.set_state(FindItemStateGroup.waiting_for_category)
@@ -69,16 +58,8 @@ async def process_category(callback: CallbackQuery, state: FSMContext):
     category_id = int(callback.data.split("_")[1])
     await state.update_data(category_id=category_id)
 
-    # Получаем список локаций из БД через репозиторий
-    async with get_db_session() as session:
-        location_repo = LocationRepository(session)
-        locations = await location_repo.get_list(session) # Используем get_list
-
-    # Формируем inline-клавиатуру с локациями
-    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text=loc.name, callback_data=f"loc_{loc.id}")] for loc in locations
-    ])
+    # Inline-клавиатура с локациями: готовая, из кэша справочников (без запроса к БД)
+    keyboard = await location_keyboard()
 
     await callback.message.edit_text("Выберите место, где была найдена вещь:")
     await callback.message.answer("Выберите локацию:", reply_markup=keyboard)
@@ -103,16 +84,16 @@ async def process_contact_method(callback: CallbackQuery, state: FSMContext):
     location_id = data['location_id']
     user_id = callback.from_user.id # ID пользователя из Telegram
 
-    # Здесь нужно создать сессию, репозитории, сервис и вызвать его метод
-    async with get_db_session() as session: # Опять используем напрямую, нужно улучшить
-        item_repo = ItemRepository(session)
-        user_repo = UserRepository(session)
-        items_service = ItemsService(item_repo, user_repo)
+    # Объявление и его совпадения с потерями фиксируются одной транзакцией при выходе из блока.
+    # consistency_key: следующие чтения пользователя (поиск, «Мои объявления») пойдут
+    # на основной сервер, пока реплика не получила новое объявление
+    async with UnitOfWork(consistency_key=user_id) as uow:
+        items_service = ItemsService(uow.items, uow.users)
 
         # Вызываем сервис для создания объявления
         # Пока не реализовано сохранение фото
         new_item = await items_service.create_found_item(
-            session=session,
+            session=uow.session,
             title=f"Объявление от {callback.from_user.first_name}", # В реальности title может формироваться по-другому
             description=description,
             category_id=category_id,
@@ -2,10 +2,8 @@
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command
-from app.whereismy.core.database import get_db_session
-from app.whereismy.core.repository.item_repository import ItemRepository
-from app.whereismy.core.repository.user_repository import UserRepository
 from app.whereismy.services.items_service import ItemsService
+from app.whereismy.services.unit_of_work import UnitOfWork
 
 router = Router()
 
@@ -16,12 +14,11 @@ async def cmd_my_items(message: Message):
     """
     user_id = message.from_user.id
 
-    async with get_db_session() as session: # Опять напрямую
-        item_repo = ItemRepository(session)
-        user_repo = UserRepository(session)
-        items_service = ItemsService(item_repo, user_repo)
+    # Только чтение; после недавнего создания или архивации — с основного сервера, а не с реплики
+    async with UnitOfWork(read_only=True, consistency_key=user_id) as uow:
+        items_service = ItemsService(uow.items, uow.users)
 
-        user_items = await items_service.get_user_items(session, user_id)
+        user_items = await items_service.get_user_items(uow.session, user_id)
 
     if user_items:
         response_text = "Ваши активные объявления:\n\n"
@@ -46,12 +43,10 @@ async def process_archive(callback: CallbackQuery):
     item_id = int(callback.data.split("_")[1])
     user_id = callback.from_user.id
 
-    async with get_db_session() as session:
-        item_repo = ItemRepository(session)
-        user_repo = UserRepository(session)
-        items_service = ItemsService(item_repo, user_repo)
+    async with UnitOfWork(consistency_key=user_id) as uow:
+        items_service = ItemsService(uow.items, uow.users)
 
-        success = await items_service.archive_item(session, item_id, user_id)
+        success = await items_service.archive_item(uow.session, item_id, user_id)
 
     if success:
         await callback.answer("Объявление архивировано.")
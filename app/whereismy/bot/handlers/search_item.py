@@ -2,9 +2,8 @@
 from aiogram import Router, F
 from aiogram.types import Message
 from aiogram.filters import Command
-from app.whereismy.core.database import get_db_session
-from app.whereismy.core.repository.item_repository import ItemRepository
 from app.whereismy.services.items_service import ItemsService
+from app.whereismy.services.unit_of_work import UnitOfWork
 
 router = Router()
 
@@ -23,22 +22,23 @@ async def process_search_query(message: Message):
     """
     query_text = message.text
 
-    # Создаем сессию, репозиторий и сервис
-    async with get_db_session() as session: # Опять напрямую
-        item_repo = ItemRepository(session)
+    # Создаем единицу работы (сессию и репозитории) и сервис.
+    # Поиск только читает: идёт на реплику, но сразу после своей записи пользователь читает с основного сервера
+    async with UnitOfWork(read_only=True, consistency_key=message.from_user.id) as uow:
         # user_repo не нужен для поиска, но ItemsService его требует
         # Потенциально, можно создать отдельный сервис поиска или модифицировать ItemsService
         # или внедрять зависимости через DI.
         # Пока оставим как есть.
-        from app.whereismy.core.repository.user_repository import UserRepository
-        user_repo = UserRepository(session)
-        items_service = ItemsService(item_repo, user_repo)
+        items_service = ItemsService(uow.items, uow.users)
 
-        # Вызываем сервис для поиска
-        similar_items = await items_service.find_similar_found_items(
-            session=session,
-            query_description=query_text,
-            limit=5 # Пока фиксированное количество
+        # Вызываем сервис для поиска: гибридный поиск находит и точные совпадения
+        # (номера, имена, бренды), и перефразированные описания
+        similar_items = await items_service.hybrid_search_found_items(
+            session=uow.session,
+            query_text=query_text,
+            limit=5, # Пока фиксированное количество
+            # Автор и корпус нужны для ответа ниже, когда сессия уже закрыта
+            load_relations=("author", "location"),
         )
 
     if similar_items:
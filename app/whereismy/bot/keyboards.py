@@ -0,0 +1,22 @@
+# app/whereismy/bot/keyboards.py
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from app.whereismy.services.reference_data import ReferenceData, reference_data
+
+# Клавиатуры выбора категории и корпуса строятся один раз на снимок справочников
+# и перестраиваются только после их изменения (см. services/reference_data.py).
+
+def _build_category_keyboard(data: ReferenceData) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=cat.name, callback_data=f"cat_{cat.id}")] for cat in data.categories
+    ])
+
+def _build_location_keyboard(data: ReferenceData) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=loc.name, callback_data=f"loc_{loc.id}")] for loc in data.locations
+    ])
+
+async def category_keyboard() -> InlineKeyboardMarkup:
+    return await reference_data.derived("category_keyboard", _build_category_keyboard)
+
+async def location_keyboard() -> InlineKeyboardMarkup:
+    return await reference_data.derived("location_keyboard", _build_location_keyboard)
@@ -4,6 +4,11 @@ import logging
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage # Для простоты, можно использовать RedisStorage
 from app.whereismy.config import settings # Используем общий файл настроек
+from app.whereismy.core.vector_index import load_vector_index, refresh_vector_index_periodically
+from app.whereismy.services.embedding_service import embedding_service
+from app.whereismy.core.pg_listener import pg_listener
+from app.whereismy.services.reference_data import reference_data
+from app.whereismy.services.search_cache import search_cache
 from app.whereismy.bot.handlers import start, find_item, search_item, my_items # Импортируем хендлеры
 
 # Настройка логирования
@@ -24,11 +29,27 @@ async def main():
     dp.include_router(search_item.router)
     dp.include_router(my_items.router)
 
+    # Прогреваем модель векторизации в фоне, чтобы бот начал принимать апдейты сразу
+    warmup_task = asyncio.create_task(embedding_service.warmup())
+    # Загружаем векторный индекс в память (если выбран бэкенд numpy)
+    await load_vector_index()
+    refresh_task = asyncio.create_task(refresh_vector_index_periodically())
+    # Справочники для клавиатур /find — в память; сбросы справочников и кэша поиска
+    # из админки и API приходят через NOTIFY
+    await reference_data.load()
+    listener_task = asyncio.create_task(pg_listener.run())
+
     # Запускаем бота
     try:
         logging.info("Starting bot...")
         await dp.start_polling(bot)
     finally:
+        listener_task.cancel()
+        refresh_task.cancel()
+        warmup_task.cancel()
+        await embedding_service.close()
+        if search_cache is not None:
+            await search_cache.close()
         await bot.session.close()
 
 if __name__ == "__main__":
@@ -1,13 +1,116 @@
 import secrets
+from typing import Dict, Literal
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     # ... другие настройки ...
     database_url: str
+    # Движок и пул соединений (на процесс). Всего соединений с сервера берут
+    # (pool_size + max_overflow) x (воркеры uvicorn + бот + CLI/фоновые задачи) —
+    # сумма должна оставаться ниже max_connections PostgreSQL.
+    database_echo: bool = False # Логировать каждый SQL-запрос (только для отладки)
+    database_pool_size: int = 5 # Постоянных соединений в пуле
+    database_max_overflow: int = 5 # Временных соединений сверх pool_size при пиках
+    database_pool_timeout: float = 30.0 # Сколько секунд ждать свободного соединения
+    database_pool_recycle: int = 1800 # Пересоздавать соединения старше N секунд (-1 — никогда)
+    database_pool_pre_ping: bool = True # Проверять соединение перед выдачей (после рестарта БД, файрвола)
+    # Кэш подготовленных выражений на соединение (asyncpg и диалект SQLAlchemy);
+    # 0 — для pgbouncer в режиме transaction, выражения тогда получают уникальные имена
+    database_statement_cache_size: int = 100
+    # Реплика для чтения (потоковая репликация); None — всё читается с основного сервера.
+    # Пул реплики настраивается теми же database_pool_* и занимает соединения уже на реплике.
+    database_replica_url: str | None = None
+    # Верхняя оценка отставания реплики, сек. Столько после записи чтения того же пользователя
+    # идут на основной сервер, чтобы он увидел свои изменения (read your writes),
+    # и через столько кэш поиска сбрасывается повторно (см. invalidate_search_cache)
+    database_read_your_writes_seconds: float = 5.0
     embedding_model_path: str = "paraphrase-multilingual-MiniLM-L12-v2"
+    # Версия векторов в item_embeddings, которую читает и пишет приложение; меняется
+    # вместе с embedding_model_path после фонового заполнения новой версии.
+    embedding_model_version: str = "v1"
+    embedding_dim: int = 384 # Размерность векторов модели embedding_model_path
+    # Бэкенд векторизации: "torch" (sentence-transformers) или "onnx" (ONNX Runtime).
+    # ONNX-модель готовится командой `python -m app.whereismy.services.onnx_embedding export`.
+    embedding_backend: Literal["torch", "onnx"] = "torch"
+    embedding_onnx_path: str = "models/onnx" # Каталог с экспортированной ONNX-моделью
+    embedding_onnx_quantized: bool = True # Использовать int8-версию модели
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     secret_key: str = secrets.token_urlsafe(32)
+
+    # Микро-батчинг векторизации: параллельные вызовы embed_text собираются
+    # в один model.encode(batch), который выполняется в отдельном потоке.
+    embedding_batching_enabled: bool = True
+    embedding_batch_size: int = 32 # Максимальный размер батча
+    embedding_batch_max_wait_ms: float = 10.0 # Сколько ждать добора батча после первого запроса
+    embedding_queue_size: int = 1024 # Максимальная глубина очереди запросов
+
+    # Кэш эмбеддингов: LRU в памяти процесса + персистентный SQLite-файл на диске.
+    embedding_cache_enabled: bool = True
+    embedding_cache_size: int = 10000 # Записей в памяти
+    embedding_cache_ttl_seconds: int = 30 * 24 * 3600 # Время жизни записи (в обоих уровнях)
+    embedding_cache_path: str | None = ".cache/embeddings.sqlite3" # None отключает дисковый уровень
+    embedding_cache_disk_max_entries: int = 500000 # Записей на диске
+
+    # "local" — модель загружается в этом процессе, "remote" — запросы уходят
+    # в отдельный сервер эмбеддингов (python -m app.whereismy.services.embedding_server).
+    embedding_service_mode: Literal["local", "remote"] = "local"
+    embedding_server_socket: str | None = "/tmp/whereismy-embedding.sock" # None — TCP
+    embedding_server_host: str = "127.0.0.1"
+    embedding_server_port: int = 8765
+    embedding_client_pool_size: int = 4 # Соединений с сервером на процесс
+    embedding_client_timeout_seconds: float = 10.0
+
+    # Параметры ANN-поиска pgvector по умолчанию (None — значение сервера).
+    # Больше ef_search/probes — выше полнота, но медленнее запрос.
+    vector_search_ef_search: int | None = None # hnsw.ef_search (по умолчанию в pgvector 40)
+    vector_search_probes: int | None = None # ivfflat.probes (по умолчанию в pgvector 1)
+    # Индекс для отбора кандидатов: "vector" (float32), "halfvec" (float16, индекс ~в 2 раза меньше)
+    # или "binary" (биты + расстояние Хэмминга, ~в 32 раза меньше). Для halfvec/binary кандидаты
+    # переранжируются точно; индекс строится командой embedding_versions create-index --storage.
+    vector_search_storage: Literal["vector", "halfvec", "binary"] = "vector"
+    vector_search_rerank_candidates: int = 100 # Сколько кандидатов переранжировать точно (см. benchmarks.quantization)
+    # Итеративный скан HNSW (pgvector >= 0.8) для поиска с фильтрами: если фильтры отсеяли
+    # часть кандидатов, индекс продолжает обход, пока не наберётся limit строк.
+    # "strict_order" сохраняет точный порядок по расстоянию; None — не менять настройку сервера.
+    vector_search_iterative_scan: Literal["off", "strict_order", "relaxed_order"] | None = "strict_order"
+
+    # Бэкенд ранжирования для семантического поиска:
+    # "pgvector" — ORDER BY vector <=> q в PostgreSQL,
+    # "numpy" — матрица векторов активных находок в памяти процесса.
+    vector_search_backend: Literal["pgvector", "numpy"] = "pgvector"
+    vector_index_refresh_seconds: int = 300 # Период полной перезагрузки индекса в памяти (0 — не перезагружать)
+
+    # Кэш результатов семантического поиска (см. services/search_cache.py):
+    # "memory" — в памяти каждого процесса, сброс рассылается всем процессам через NOTIFY;
+    # "redis" — общий для всех процессов; "none" — выключен.
+    search_cache_backend: Literal["none", "memory", "redis"] = "memory"
+    search_cache_size: int = 2048 # Записей в памяти (бэкенд memory)
+    search_cache_ttl_seconds: int = 300 # Только страховка от потерянного сброса, не способ инвалидации
+    search_cache_redis_url: str = "redis://localhost:6379/0"
+
+    # Гибридный поиск (полнотекстовый + семантический, слияние Reciprocal Rank Fusion)
+    hybrid_search_candidates: int = 50 # Сколько кандидатов берём из каждого ранжирования
+    hybrid_search_rrf_k: int = 60 # Константа сглаживания RRF: score = sum(1 / (k + rank))
+
+    # Нечёткий поиск (pg_trgm)
+    fuzzy_search_threshold: float = 0.3 # Минимальная word_similarity (0..1); меньше — терпимее к опечаткам
+
+    # Сопоставление потерь и находок
+    matching_enabled: bool = True # Искать совпадения с потерями при создании находки
+    matching_min_similarity: float = 0.75 # Порог косинусной близости для записи совпадения
+    matching_rematch_interval_seconds: int = 0 # Период массового пересопоставления (0 — выключено)
+    matching_block_size: int = 1024 # Размер плитки матрицы близостей при массовом пересопоставлении
+
+    # Автоматическая архивация старых активных объявлений (services/archival_service.py)
+    archival_max_age_days: int = 180 # Возраст, после которого объявление архивируется (0 — не архивировать)
+    # Возраст по названию категории, важнее archival_max_age_days; 0 — не архивировать категорию.
+    # В окружении — JSON: ARCHIVAL_MAX_AGE_DAYS_BY_CATEGORY='{"Документы": 365, "Прочее": 60}'
+    archival_max_age_days_by_category: Dict[str, int] = {}
+    archival_interval_seconds: int = 0 # Период фоновой архивации в процессе API (0 — выключено)
+    archival_batch_size: int = 500 # Строк в одной транзакции: блокировки держатся только на порцию
+    archival_batch_pause_seconds: float = 0.1 # Пауза между порциями, чтобы не мешать основной нагрузке
+
     model_config = {"env_file": ".env"}
 
 
@@ -1,22 +1,102 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import time
+import uuid
+from typing import Hashable, Optional
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 # 1. Импортируем нашу модель настроек
 from app.whereismy.config import settings
+from app.whereismy.core.pool_metrics import InstrumentedAsyncQueuePool
 
 # 2. Используем строку подключения из настроек, вместо os.getenv напрямую
 DATABASE_URL = settings.database_url
 
+
+def create_database_engine(url: str) -> AsyncEngine:
+    """Асинхронный движок с параметрами пула из настроек и метриками пула (см. pool_metrics)."""
+    return create_async_engine(
+        url,
+        echo=settings.database_echo,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_timeout=settings.database_pool_timeout,
+        pool_recycle=settings.database_pool_recycle,
+        pool_pre_ping=settings.database_pool_pre_ping,
+        connect_args=_connect_args(),
+    )
+
+
+def _connect_args() -> dict:
+    """
+    Кэш подготовленных выражений. Кэшей два: самого asyncpg (statement_cache_size) и диалекта
+    SQLAlchemy поверх него (prepared_statement_cache_size) — оба задаются одной настройкой.
+    При 0 (pgbouncer в режиме transaction) выражения получают уникальные имена: иначе
+    соединение сервера, доставшееся другому клиенту, может уже иметь выражение с тем же именем.
+    """
+    cache_size = settings.database_statement_cache_size
+    connect_args = {"statement_cache_size": cache_size, "prepared_statement_cache_size": cache_size}
+    if cache_size == 0:
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+    return connect_args
+
+
 # Асинхронный движок. Он устанавливает соединение с базой данных.
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True, # Раскомментируйте для логирования SQL-запросов
-)
+engine = create_database_engine(DATABASE_URL)
 
 # Асинхронная сессия. Это "рабочая лошадка", через которую мы будем выполнять запросы.
 AsyncSessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
+# Движок и сессии реплики для чтения. Без реплики чтение идёт через основной движок.
+replica_engine = create_database_engine(settings.database_replica_url) if settings.database_replica_url else None
+ReadSessionLocal = sessionmaker(
+    replica_engine, class_=AsyncSession, expire_on_commit=False
+) if replica_engine is not None else AsyncSessionLocal
+
+
+class RecentWrites:
+    """
+    Ключи (например, ID пользователя), по которым недавно была запись. Пока ключ свежий,
+    его чтения идут на основной сервер: реплика отстаёт, и пользователь не увидел бы
+    только что созданное объявление. Учитываются записи только этого процесса.
+    """
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._deadlines: dict[Hashable, float] = {}
+
+    def mark(self, key: Hashable) -> None:
+        now = time.monotonic()
+        self._deadlines[key] = now + self.window_seconds
+        if len(self._deadlines) > 10000: # Не даём словарю расти: выбрасываем истёкшие ключи
+            self._deadlines = {k: d for k, d in self._deadlines.items() if d > now}
+
+    def is_recent(self, key: Hashable) -> bool:
+        deadline = self._deadlines.get(key)
+        return deadline is not None and deadline > time.monotonic()
+
+
+recent_writes = RecentWrites(settings.database_read_your_writes_seconds)
+
+
+def read_session_factory(consistency_key: Optional[Hashable] = None) -> sessionmaker:
+    """
+    Фабрика сессий для чтения: реплика, если она настроена и по consistency_key
+    не было недавней записи; иначе основной сервер.
+    """
+    if consistency_key is not None and recent_writes.is_recent(consistency_key):
+        return AsyncSessionLocal
+    return ReadSessionLocal
+
+
+def pool_stats() -> dict:
+    """Состояние и метрики пулов соединений процесса (основной сервер и реплика)."""
+    stats = {"primary": engine.pool.stats()}
+    if replica_engine is not None:
+        stats["replica"] = replica_engine.pool.stats()
+    return stats
+
+
 # Зависимость для получения сессии в FastAPI (если будем использовать)
 async def get_db_session():
     async with AsyncSessionLocal() as session:
@@ -3,6 +3,8 @@ from .user import User
 from .category import Category
 from .location import Location
 from .item import Item, ItemType, ItemStatus, ContactMethod
+from .item_match import ItemMatch
+from .item_embedding import ItemEmbedding
 
 __all__ = [
     "Base",
@@ -13,4 +15,6 @@ __all__ = [
     "ItemType",
     "ItemStatus",
     "ContactMethod",
+    "ItemMatch",
+    "ItemEmbedding",
 ]
@@ -4,9 +4,8 @@ import datetime
 import enum
 from typing import TYPE_CHECKING, Optional
 
-import numpy as np
-from pgvector.sqlalchemy import Vector
-from sqlalchemy import ForeignKey, text
+from sqlalchemy import Computed, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -17,6 +16,7 @@ if TYPE_CHECKING:
     from .user import User
     from .category import Category
     from .location import Location
+    from .item_embedding import ItemEmbedding
 
 
 # Использование Enums делает код более читаемым и надежным,
@@ -34,11 +34,73 @@ class ContactMethod(enum.Enum):
     CONTACT_ME = "contact_me"
 
 
+# Условие частичных индексов по "горячему" набору: активные объявления о находке.
+# SQLAlchemy пишет в БД имена членов enum ('FOUND', 'ACTIVE'), а не их значения, поэтому
+# сравниваем с именами. Колонки — нативные типы PostgreSQL (itemtype, itemstatus): native_enum=False
+# в mapped_column игнорируется; литерал в условии приводится к типу колонки.
+# Запросы, которые должны попадать в эти индексы, обязаны содержать то же условие литералами.
+ACTIVE_FOUND_CONDITION = "type = 'FOUND' AND status = 'ACTIVE'"
+# То же для активных объявлений о потере (кандидаты для сопоставления с новыми находками).
+ACTIVE_LOST_CONDITION = "type = 'LOST' AND status = 'ACTIVE'"
+# Все активные объявления (кандидаты для автоматической архивации по возрасту).
+ACTIVE_CONDITION = "status = 'ACTIVE'"
+
+# Конфигурация полнотекстового поиска: русская морфология ("ключи" и "ключ" дают одну лексему).
+FULLTEXT_CONFIG = "russian"
+
+
 class Item(Base):
     """
     Модель объявления о находке или потере.
     """
     __tablename__ = 'items'
+    __table_args__ = (
+        # GIN-индекс полнотекстового поиска по активным находкам. Создаётся миграцией 8d2a4b6c9e13.
+        Index(
+            "ix_items_search_tsv_active_found",
+            "search_tsv",
+            postgresql_using="gin",
+            postgresql_where=text(ACTIVE_FOUND_CONDITION),
+        ),
+        # Триграммные GIN-индексы (pg_trgm) для поиска подстрок и нечёткого поиска
+        # по всей таблице, включая архив. Создаются миграцией 5f1c7e9a2d40.
+        Index(
+            "ix_items_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_items_specific_place_trgm",
+            "specific_place",
+            postgresql_using="gin",
+            postgresql_ops={"specific_place": "gin_trgm_ops"},
+        ),
+        # B-tree индексы для поиска активных находок с фильтром по категории/корпусу
+        # и периоду создания. Создаются миграцией e7a3c9d1b5f2.
+        Index(
+            "ix_items_active_found_category_created",
+            "category_id",
+            "created_at",
+            postgresql_where=text(ACTIVE_FOUND_CONDITION),
+        ),
+        Index(
+            "ix_items_active_found_location_created",
+            "location_id",
+            "created_at",
+            postgresql_where=text(ACTIVE_FOUND_CONDITION),
+        ),
+        # Ключ курсорной пагинации (BaseRepository.get_page). Создаётся миграцией 1a6d4f8b3c70.
+        Index("ix_items_created_at_id", "created_at", "id"),
+        # Самые старые активные объявления категории — для архивации по возрасту
+        # (services/archival_service.py). Создаётся миграцией 6b2d9e4f1c83.
+        Index(
+            "ix_items_active_category_created",
+            "category_id",
+            "created_at",
+            postgresql_where=text(ACTIVE_CONDITION),
+        ),
+    )
 
     # Внешние ключи для связей
     author_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
@@ -64,9 +126,18 @@ class Item(Base):
     contact_method: Mapped[ContactMethod] = mapped_column(nullable=False, native_enum=False)
     contact_info: Mapped[str | None] = mapped_column(nullable=True)
 
-    # Векторное поле для семантического поиска.
-    # Размерность 384 соответствует модели paraphrase-multilingual-MiniLM-L12-v2.
-    vector: Mapped[np.ndarray | None] = mapped_column(Vector(384), nullable=True)
+    # Генерируемый столбец для полнотекстового поиска: описание (вес A) и место находки (вес B).
+    # Заполняется самим PostgreSQL; deferred — чтобы не тянуть его в каждом SELECT.
+    search_tsv: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{FULLTEXT_CONFIG}', coalesce(description, '')), 'A') || "
+            f"setweight(to_tsvector('{FULLTEXT_CONFIG}', coalesce(specific_place, '')), 'B')",
+            persisted=True,
+        ),
+        nullable=True,
+        deferred=True,
+    )
 
     # Временные метки
     created_at: Mapped[datetime.datetime] = mapped_column(
@@ -78,3 +149,7 @@ class Item(Base):
     author: Mapped["User"] = relationship(back_populates="items")
     category: Mapped["Category"] = relationship(back_populates="items")
     location: Mapped[Optional["Location"]] = relationship(back_populates="items")
+    # Векторы описания для семантического поиска, по одному на версию модели (см. ItemEmbedding)
+    embeddings: Mapped[list["ItemEmbedding"]] = relationship(
+        back_populates="item", cascade="all, delete-orphan", passive_deletes=True
+    )
@@ -0,0 +1,87 @@
+# app/whereismy/core/models/item_embedding.py
+
+import datetime
+import re
+from typing import TYPE_CHECKING
+
+import numpy as np
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import ForeignKey, UniqueConstraint, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from .base import Base
+
+if TYPE_CHECKING:
+    from .item import Item
+
+
+# Имя версии попадает в имя индекса и в условие частичного индекса литералом,
+# поэтому допускаем только безопасные символы.
+MODEL_VERSION_PATTERN = re.compile(r"^[a-z0-9_]{1,32}$")
+
+
+def validate_model_version(model_version: str) -> str:
+    """Проверяет имя версии модели эмбеддингов и возвращает его."""
+    if not MODEL_VERSION_PATTERN.match(model_version):
+        raise ValueError(
+            f"Некорректная версия модели эмбеддингов: {model_version!r} "
+            "(допустимы a-z, 0-9 и _, до 32 символов)"
+        )
+    return model_version
+
+
+# Варианты хранения векторов в HNSW-индексе (сами векторы в таблице всегда float32):
+#   vector  — float32, 4 байта на измерение;
+#   halfvec — float16, 2 байта на измерение, индекс примерно вдвое меньше;
+#   binary  — бит на измерение (binary_quantize), индекс в ~32 раза меньше, поиск по
+#             расстоянию Хэмминга; точность восстанавливается переранжированием кандидатов.
+EMBEDDING_STORAGES = ("vector", "halfvec", "binary")
+
+_INDEX_KEYS = {
+    "vector": ("{name}", "(vector::vector({dim})) vector_cosine_ops"),
+    "halfvec": ("{name}_halfvec", "(vector::halfvec({dim})) halfvec_cosine_ops"),
+    "binary": ("{name}_bit", "(binary_quantize(vector::vector({dim}))::bit({dim})) bit_hamming_ops"),
+}
+
+
+def embedding_index_name(model_version: str, storage: str = "vector") -> str:
+    """Имя HNSW-индекса векторов одной версии модели для заданного варианта хранения."""
+    name = f"ix_item_embeddings_hnsw_{validate_model_version(model_version)}"
+    return _INDEX_KEYS[storage][0].format(name=name)
+
+
+def embedding_index_ddl(model_version: str, dim: int, storage: str = "vector") -> str:
+    """
+    DDL частичного HNSW-индекса для одной версии. Столбец vector без размерности
+    (у разных моделей она может отличаться), поэтому индекс строится по выражению
+    с приведением к размерности, и запросы должны сравнивать векторы через то же выражение.
+    """
+    key = _INDEX_KEYS[storage][1].format(dim=int(dim))
+    return (
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {embedding_index_name(model_version, storage)} "
+        f"ON item_embeddings USING hnsw ({key}) "
+        f"WITH (m = 16, ef_construction = 64) "
+        f"WHERE model_version = '{model_version}'"
+    )
+
+
+class ItemEmbedding(Base):
+    """
+    Вектор описания объявления, посчитанный определённой версией модели.
+    На одно объявление — по строке на каждую версию, поэтому новую модель можно
+    заполнить в фоне и переключить чтение настройкой embedding_model_version.
+    """
+    __tablename__ = 'item_embeddings'
+    __table_args__ = (
+        UniqueConstraint("item_id", "model_version", name="uq_item_embeddings_item_version"),
+    )
+
+    item_id: Mapped[int] = mapped_column(ForeignKey("items.id", ondelete="CASCADE"))
+    model_version: Mapped[str] = mapped_column(nullable=False)
+    vector: Mapped[np.ndarray] = mapped_column(Vector(), nullable=False)
+
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        server_default=text("TIMEZONE('utc', now())")
+    )
+
+    item: Mapped["Item"] = relationship(back_populates="embeddings")
@@ -0,0 +1,36 @@
+# app/whereismy/core/models/item_match.py
+
+import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import ForeignKey, Index, UniqueConstraint, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from .base import Base
+
+if TYPE_CHECKING:
+    from .item import Item
+
+
+class ItemMatch(Base):
+    """
+    Совпадение объявления о потере (LOST) с объявлением о находке (FOUND).
+    Пара (lost_item_id, found_item_id) уникальна: повторное сопоставление не создаёт дублей.
+    """
+    __tablename__ = 'item_matches'
+    __table_args__ = (
+        UniqueConstraint("lost_item_id", "found_item_id", name="uq_item_matches_lost_found"),
+        Index("ix_item_matches_found_item_id", "found_item_id"),
+    )
+
+    lost_item_id: Mapped[int] = mapped_column(ForeignKey("items.id", ondelete="CASCADE"))
+    found_item_id: Mapped[int] = mapped_column(ForeignKey("items.id", ondelete="CASCADE"))
+    # Косинусная близость векторов описаний (1 - косинусное расстояние)
+    score: Mapped[float] = mapped_column(nullable=False)
+
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        server_default=text("TIMEZONE('utc', now())")
+    )
+
+    lost_item: Mapped["Item"] = relationship(foreign_keys=[lost_item_id])
+    found_item: Mapped["Item"] = relationship(foreign_keys=[found_item_id])
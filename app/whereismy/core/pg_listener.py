@@ -0,0 +1,92 @@
+# app/whereismy/core/pg_listener.py
+"""
+Межпроцессные уведомления через Postgres LISTEN/NOTIFY.
+
+Кэши в памяти процесса (справочники, кэш результатов поиска) должны сбрасываться во всех
+процессах — воркерах uvicorn и боте, — когда данные меняет любой из них. Модули подписывают
+свои обработчики на канал (pg_listener.subscribe), а каждый процесс запускает одну фоновую
+задачу pg_listener.run(): она держит отдельное соединение asyncpg (не из пула) с LISTEN
+на всех каналах.
+
+Пока слушатель переподключается, уведомления теряются, поэтому после переподключения
+обработчики всех каналов вызываются безусловно.
+"""
+import asyncio
+import inspect
+import logging
+from typing import Awaitable, Callable, Dict, List, Union
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.whereismy.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+NotificationCallback = Callable[[], Union[None, Awaitable[None]]]
+
+
+class PgListener:
+    """Подписки на каналы NOTIFY и фоновая задача, которая их слушает."""
+    def __init__(self):
+        self._callbacks: Dict[str, List[NotificationCallback]] = {}
+        self._tasks: set[asyncio.Task] = set() # Ссылки на асинхронные обработчики, чтобы их не собрал GC
+
+    def subscribe(self, channel: str, callback: NotificationCallback) -> None:
+        self._callbacks.setdefault(channel, []).append(callback)
+
+    def _dispatch(self, channel: str) -> None:
+        for callback in self._callbacks.get(channel, []):
+            try:
+                result = callback()
+                if inspect.isawaitable(result):
+                    task = asyncio.ensure_future(result)
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+            except Exception:
+                logger.exception(f"Ошибка в обработчике уведомления {channel}.")
+
+    async def run(self, reconnect_delay: float = 5.0) -> None:
+        """Фоновая задача процесса: LISTEN на всех каналах с подписками."""
+        import asyncpg
+
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        reconnecting = False
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                for channel in self._callbacks:
+                    await connection.add_listener(channel, lambda _c, _pid, channel, _payload: self._dispatch(channel))
+                if reconnecting:
+                    for channel in self._callbacks: # Изменения, пропущенные без слушателя
+                        self._dispatch(channel)
+                while not connection.is_closed():
+                    await asyncio.sleep(reconnect_delay)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Слушатель уведомлений PostgreSQL отключился, переподключение.")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            reconnecting = True
+            await asyncio.sleep(reconnect_delay)
+
+
+# --- Глобальный слушатель процесса ---
+pg_listener = PgListener()
+
+
+async def notify(channel: str, session: AsyncSession | None = None) -> None:
+    """
+    Отправляет уведомление на канал. С session — в её транзакции (доставляется только
+    при COMMIT); без неё — сразу, в отдельном коротком соединении.
+    """
+    stmt, params = text("SELECT pg_notify(:channel, '')"), {"channel": channel}
+    if session is not None:
+        await session.execute(stmt, params)
+        return
+    async with engine.connect() as connection:
+        await connection.execute(stmt, params)
+        await connection.commit()
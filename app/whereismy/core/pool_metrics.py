@@ -0,0 +1,91 @@
+# app/whereismy/core/pool_metrics.py
+"""
+Метрики пула соединений с PostgreSQL: сколько соединений выдано, сколько ждали
+свободного соединения, как часто пул выходил за pool_size (overflow) и упирался в лимит.
+
+Пул (pool_size + max_overflow) настраивается на процесс, а лимит max_connections — общий
+для всех воркеров uvicorn, бота и фоновых задач. Рост wait_ms и timeouts означает, что
+пулу процесса не хватает соединений; частые overflow_events — что pool_size мал для
+обычной нагрузки.
+"""
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolMetrics:
+    """Счётчики и окно последних времён ожидания соединения."""
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._waits_ms: deque[float] = deque(maxlen=window)
+        self.checkouts = 0
+        self.overflow_events = 0 # Соединение создано сверх pool_size
+        self.timeouts = 0 # Не дождались соединения за pool_timeout
+        self.max_wait_ms = 0.0
+
+    def record_checkout(self, wait_ms: float, overflowed: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self._waits_ms.append(wait_ms)
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            if overflowed:
+                self.overflow_events += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = list(self._waits_ms)
+            snapshot = {
+                "checkouts": self.checkouts,
+                "overflow_events": self.overflow_events,
+                "timeouts": self.timeouts,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+            }
+        snapshot["wait_p50_ms"] = round(float(np.percentile(waits, 50)), 3) if waits else 0.0
+        snapshot["wait_p95_ms"] = round(float(np.percentile(waits, 95)), 3) if waits else 0.0
+        return snapshot
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Стандартный пул async-движка, который замеряет получение соединения из пула.
+    Время ожидания включает и открытие нового соединения, если свободных нет.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        overflow_before = self.overflow()
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        overflowed = self.overflow() > max(overflow_before, 0)
+        self.metrics.record_checkout((time.perf_counter() - started) * 1000, overflowed)
+        return record
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics # Счётчики переживают пересоздание пула (engine.dispose())
+        return pool
+
+    def stats(self) -> dict:
+        """Текущее состояние пула вместе с накопленными метриками."""
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            **self.metrics.snapshot(),
+        }
@@ -1,5 +1,7 @@
 from .base import BaseRepository
 from .item_repository import ItemRepository
+from .item_match_repository import ItemMatchRepository
+from .item_embedding_repository import ItemEmbeddingRepository
 from .user_repository import UserRepository
 from .category_repository import CategoryRepository
 from .location_repository import LocationRepository
@@ -7,6 +9,8 @@ from .location_repository import LocationRepository
 __all__ = [
     "BaseRepository",
     "ItemRepository",
+    "ItemMatchRepository",
+    "ItemEmbeddingRepository",
     "UserRepository",
     "CategoryRepository",
     "LocationRepository",
@@ -1,9 +1,10 @@
 # app/whereismy/core/repository/base.py
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, Optional, List
+from typing import Any, Generic, TypeVar, Optional, List, Sequence
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select, tuple_, update
 from sqlalchemy.orm import DeclarativeBase
+from app.whereismy.core.repository.pagination import Page, decode_cursor, encode_cursor
 
 # Определяем универсальный тип для модели
 ModelType = TypeVar("ModelType", bound=DeclarativeBase)
@@ -12,6 +13,9 @@ class BaseRepository(ABC, Generic[ModelType]):
     """
     Абстрактный базовый класс для репозиториев.
     Определяет общие методы CRUD.
+
+    Методы только отправляют изменения в БД (flush) и не фиксируют транзакцию:
+    COMMIT выполняет владелец сессии — UnitOfWork (services/unit_of_work.py).
     """
     def __init__(self, session: AsyncSession, model: type[ModelType]):
         self._session = session
@@ -24,16 +28,52 @@ class BaseRepository(ABC, Generic[ModelType]):
         return result.scalar_one_or_none()
 
     async def get_list(self, skip: int = 0, limit: int = 100) -> List[ModelType]:
-        """Получить список объектов с пагинацией."""
-        stmt = select(self._model).offset(skip).limit(limit)
+        """
+        Получить список объектов с пагинацией по OFFSET (для коротких справочников).
+        Для больших таблиц — get_page: OFFSET читает и отбрасывает все предыдущие строки.
+        """
+        stmt = select(self._model).order_by(self._model.id).offset(skip).limit(limit)
         result = await self._session.execute(stmt)
         return result.scalars().all()
 
+    def _page_key(self) -> list:
+        """Ключ сортировки страниц: (created_at, id), если у модели есть created_at, иначе id."""
+        if hasattr(self._model, "created_at"):
+            return [self._model.created_at, self._model.id]
+        return [self._model.id]
+
+    async def get_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        where: Sequence = (),
+        options: Sequence = (),
+    ) -> Page[ModelType]:
+        """
+        Страница объектов от новых к старым с курсорной пагинацией (см. pagination).
+        cursor — next_cursor предыдущей страницы (None — первая страница);
+        where — дополнительные условия, options — опции загрузки (например, joinedload).
+        """
+        key = self._page_key()
+        stmt = select(self._model).where(*where).options(*options)
+        if cursor is not None:
+            # Сравнение кортежей — одно условие, которое PostgreSQL выполняет диапазоном по индексу
+            stmt = stmt.where(tuple_(*key) < tuple_(*decode_cursor(cursor, [column.type.python_type for column in key])))
+        # Запрашиваем на одну строку больше: так без COUNT узнаём, есть ли следующая страница
+        stmt = stmt.order_by(*(column.desc() for column in key)).limit(limit + 1)
+        result = await self._session.execute(stmt)
+        items = list(result.scalars().all())
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor([getattr(items[-1], column.key) for column in key])
+        return Page(items=items, next_cursor=next_cursor)
+
     async def create(self, obj_in: ModelType) -> ModelType:
         """Создать новый объект."""
         self._session.add(obj_in)
-        await self._session.commit()
-        await self._session.refresh(obj_in)
+        await self._session.flush()
+        await self._session.refresh(obj_in) # Значения по умолчанию на стороне сервера (created_at)
         return obj_in
 
     async def update(self, db_obj: ModelType, obj_in: ModelType) -> ModelType:
@@ -41,7 +81,7 @@ class BaseRepository(ABC, Generic[ModelType]):
         for key, value in obj_in.__dict__.items():
             if hasattr(db_obj, key) and key != "_sa_instance_state": # Защита от атрибута SQLAlchemy
                 setattr(db_obj, key, value)
-        await self._session.commit()
+        await self._session.flush()
         await self._session.refresh(db_obj)
         return db_obj
 
@@ -50,6 +90,39 @@ class BaseRepository(ABC, Generic[ModelType]):
         obj = await self.get(id)
         if obj:
             await self._session.delete(obj)
-            await self._session.commit()
+            await self._session.flush()
             return True
         return False
+
+    # --- Массовые операции: один SQL-запрос на всю пачку ---
+
+    async def create_many(self, rows: Sequence[dict[str, Any]]) -> List[ModelType]:
+        """
+        Создать много объектов одним INSERT ... RETURNING (значения — словари полей).
+        Возвращает созданные объекты в порядке rows.
+        """
+        if not rows:
+            return []
+        stmt = insert(self._model).returning(self._model, sort_by_parameter_order=True)
+        result = await self._session.scalars(stmt, list(rows))
+        return list(result.all())
+
+    async def update_where(self, where: Sequence, values: dict[str, Any]) -> List[int]:
+        """
+        Обновить все объекты, подходящие под условия, одним UPDATE. Возвращает ID обновлённых.
+        Пустой список условий запрещён, чтобы случайно не обновить всю таблицу.
+        """
+        if not where:
+            raise ValueError("update_where требует хотя бы одно условие")
+        stmt = update(self._model).where(*where).values(**values).returning(self._model.id)
+        return list(await self._session.scalars(stmt))
+
+    async def delete_where(self, where: Sequence) -> List[int]:
+        """
+        Удалить все объекты, подходящие под условия, одним DELETE. Возвращает ID удалённых.
+        Пустой список условий запрещён, чтобы случайно не очистить таблицу.
+        """
+        if not where:
+            raise ValueError("delete_where требует хотя бы одно условие")
+        stmt = delete(self._model).where(*where).returning(self._model.id)
+        return list(await self._session.scalars(stmt))
@@ -0,0 +1,100 @@
+# app/whereismy/core/repository/item_embedding_repository.py
+from typing import Dict, List, Optional, Sequence, Tuple
+from pgvector.sqlalchemy import BIT, HALFVEC, Vector
+from sqlalchemy import and_, cast, delete, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.whereismy.config import settings
+from app.whereismy.core.models import Item, ItemEmbedding
+from app.whereismy.core.models.item_embedding import validate_model_version
+from app.whereismy.core.repository.base import BaseRepository
+
+
+def embedding_join_condition(model_version: Optional[str] = None):
+    """
+    Условие соединения items с векторами нужной версии (по умолчанию — текущей).
+    Версия подставляется в SQL литералом, чтобы планировщик мог выбрать частичный
+    HNSW-индекс этой версии.
+    """
+    version = validate_model_version(model_version or settings.embedding_model_version)
+    return and_(
+        ItemEmbedding.item_id == Item.id,
+        ItemEmbedding.model_version == literal(version, literal_execute=True),
+    )
+
+
+def embedding_vector(dim: Optional[int] = None):
+    """Вектор, приведённый к размерности модели, — в том же виде, что в выражении индекса."""
+    return cast(ItemEmbedding.vector, Vector(dim or settings.embedding_dim))
+
+
+def ann_distance(query_vector: List[float], storage: str, dim: Optional[int] = None):
+    """
+    Расстояние до запроса в том представлении, по которому построен индекс варианта storage
+    (см. EMBEDDING_STORAGES): косинусное для vector/halfvec, Хэмминга для binary.
+    """
+    dim = dim or settings.embedding_dim
+    if storage == "halfvec":
+        return cast(ItemEmbedding.vector, HALFVEC(dim)).cosine_distance(cast(query_vector, HALFVEC(dim)))
+    if storage == "binary":
+        stored_bits = cast(func.binary_quantize(embedding_vector(dim)), BIT(dim))
+        query_bits = func.binary_quantize(cast(query_vector, Vector(dim)))
+        return stored_bits.hamming_distance(query_bits)
+    return embedding_vector(dim).cosine_distance(query_vector)
+
+
+class ItemEmbeddingRepository(BaseRepository[ItemEmbedding]):
+    """
+    Репозиторий версионированных векторов объявлений (ItemEmbedding).
+    """
+    def __init__(self, session: AsyncSession):
+        super().__init__(session, ItemEmbedding)
+
+    async def bulk_upsert(self, rows: Sequence[Tuple[int, List[float]]], model_version: str) -> int:
+        """
+        Записывает векторы одной версии пачкой: INSERT ... VALUES (...), (...) ON CONFLICT DO UPDATE,
+        один запрос на до 10000 строк вместо запроса на каждую. Возвращает число записанных строк.
+        """
+        validate_model_version(model_version)
+        written = 0
+        # По три параметра на строку, а у PostgreSQL лимит 32767 параметров на запрос
+        for start in range(0, len(rows), 10000):
+            stmt = insert(ItemEmbedding).values([
+                {"item_id": item_id, "model_version": model_version, "vector": vector}
+                for item_id, vector in rows[start:start + 10000]
+            ])
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_item_embeddings_item_version",
+                set_={"vector": stmt.excluded.vector},
+            )
+            result = await self._session.execute(stmt)
+            written += result.rowcount
+        return written
+
+    async def count_by_version(self) -> Dict[str, int]:
+        """Число векторов по каждой версии модели."""
+        stmt = (
+            select(ItemEmbedding.model_version, func.count())
+            .group_by(ItemEmbedding.model_version)
+            .order_by(ItemEmbedding.model_version)
+        )
+        result = await self._session.execute(stmt)
+        return {version: count for version, count in result.all()}
+
+    async def delete_version_batch(self, model_version: str, batch_size: int = 10000) -> int:
+        """
+        Удаляет до batch_size векторов версии. Возвращает число удалённых строк;
+        меньше batch_size — версия удалена полностью. Вызывающий коммитит каждую пачку,
+        чтобы короткие транзакции не держали блокировки и не раздували WAL одной операцией.
+        """
+        validate_model_version(model_version)
+        batch = (
+            select(ItemEmbedding.id)
+            .where(ItemEmbedding.model_version == model_version)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = await self._session.execute(
+            delete(ItemEmbedding).where(ItemEmbedding.id.in_(batch))
+        )
+        return result.rowcount
@@ -0,0 +1,81 @@
+# app/whereismy/core/repository/item_match_repository.py
+from typing import Iterable, List, Tuple
+from sqlalchemy import select, literal, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.whereismy.core.models import Item, ItemEmbedding, ItemMatch
+from app.whereismy.core.models.item import ACTIVE_LOST_CONDITION
+from app.whereismy.core.repository.base import BaseRepository
+from app.whereismy.core.repository.item_embedding_repository import embedding_join_condition, embedding_vector
+
+class ItemMatchRepository(BaseRepository[ItemMatch]):
+    """
+    Репозиторий совпадений LOST -> FOUND (ItemMatch).
+    """
+    def __init__(self, session: AsyncSession):
+        super().__init__(session, ItemMatch)
+
+    async def match_found_item(self, found_item_id: int, found_author_id: int, vector: List[float], min_similarity: float) -> List[ItemMatch]:
+        """
+        Сопоставляет одну находку со всеми активными объявлениями о потере одним запросом:
+        INSERT ... SELECT считает косинусную близость ко всем LOST-векторам на стороне БД,
+        отбрасывает пары ниже порога и уже существующие (ON CONFLICT DO NOTHING).
+        Возвращает только новые совпадения. Объявления того же автора пропускаются.
+        """
+        distance = embedding_vector().cosine_distance(vector)
+        candidates = (
+            select(
+                Item.id,
+                literal(found_item_id),
+                (1 - distance).label("score"),
+            )
+            .join(ItemEmbedding, embedding_join_condition())
+            .where(text(ACTIVE_LOST_CONDITION))
+            .where(Item.author_id != found_author_id)
+            .where(distance <= 1 - min_similarity)
+        )
+        stmt = (
+            insert(ItemMatch)
+            .from_select(["lost_item_id", "found_item_id", "score"], candidates)
+            .on_conflict_do_nothing(constraint="uq_item_matches_lost_found")
+            .returning(ItemMatch)
+        )
+        result = await self._session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def insert_matches(self, rows: Iterable[Tuple[int, int, float]], batch_size: int = 5000) -> int:
+        """
+        Массово сохраняет совпадения (lost_item_id, found_item_id, score), пропуская уже существующие.
+        Возвращает число новых записей.
+        """
+        inserted = 0
+        batch: list[dict] = []
+
+        async def flush() -> int:
+            stmt = (
+                insert(ItemMatch)
+                .values(batch)
+                .on_conflict_do_nothing(constraint="uq_item_matches_lost_found")
+                .returning(ItemMatch.id)
+            )
+            result = await self._session.execute(stmt)
+            return len(result.scalars().all())
+
+        for lost_item_id, found_item_id, score in rows:
+            batch.append({"lost_item_id": lost_item_id, "found_item_id": found_item_id, "score": score})
+            if len(batch) >= batch_size:
+                inserted += await flush()
+                batch = []
+        if batch:
+            inserted += await flush()
+        return inserted
+
+    async def get_for_lost_item(self, lost_item_id: int) -> List[ItemMatch]:
+        """Совпадения для объявления о потере, от самых похожих находок."""
+        stmt = (
+            select(ItemMatch)
+            .where(ItemMatch.lost_item_id == lost_item_id)
+            .order_by(ItemMatch.score.desc())
+        )
+        result = await self._session.execute(stmt)
+        return result.scalars().all()
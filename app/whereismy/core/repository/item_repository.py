@@ -1,10 +1,87 @@
 # app/whereismy/core/repository/item_repository.py
-from typing import List, Optional
-from sqlalchemy import select, func
+import datetime
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+from sqlalchemy import exists, select, func, literal, text
 from sqlalchemy.ext.asyncio import AsyncSession
-from pgvector.sqlalchemy import Vector
-from app.whereismy.core.models import Item
+from sqlalchemy.orm import joinedload
+from app.whereismy.config import settings
+from app.whereismy.core.models import Item, ItemEmbedding, ItemStatus, ItemType
+from app.whereismy.core.models.item import (
+    ACTIVE_CONDITION, ACTIVE_FOUND_CONDITION, ACTIVE_LOST_CONDITION, FULLTEXT_CONFIG,
+)
 from app.whereismy.core.repository.base import BaseRepository
+from app.whereismy.core.repository.item_embedding_repository import (
+    ann_distance, embedding_join_condition, embedding_vector,
+)
+from app.whereismy.core.vector_index import vector_index, vector_index_enabled
+
+
+@dataclass(frozen=True)
+class ItemSearchFilters:
+    """
+    Фильтры поиска объявлений. По умолчанию — активные объявления о находке.
+    item_type/status = None означает «любой».
+    """
+    category_id: Optional[int] = None
+    location_id: Optional[int] = None
+    item_type: Optional[ItemType] = ItemType.FOUND
+    status: Optional[ItemStatus] = ItemStatus.ACTIVE
+    created_from: Optional[datetime.datetime] = None
+    created_to: Optional[datetime.datetime] = None
+
+    @property
+    def is_default(self) -> bool:
+        """Только активные находки, без дополнительных условий (это покрывает индекс в памяти)."""
+        return self == ItemSearchFilters()
+
+    def conditions(self) -> list:
+        """Условия WHERE для запросов к items."""
+        # Для стандартных наборов условие пишем литералом, как в частичных индексах,
+        # чтобы планировщик мог их использовать.
+        if self.item_type == ItemType.FOUND and self.status == ItemStatus.ACTIVE:
+            conditions = [text(ACTIVE_FOUND_CONDITION)]
+        elif self.item_type == ItemType.LOST and self.status == ItemStatus.ACTIVE:
+            conditions = [text(ACTIVE_LOST_CONDITION)]
+        else:
+            conditions = []
+            if self.item_type is not None:
+                conditions.append(Item.type == self.item_type)
+            if self.status is not None:
+                conditions.append(Item.status == self.status)
+        if self.category_id is not None:
+            conditions.append(Item.category_id == self.category_id)
+        if self.location_id is not None:
+            conditions.append(Item.location_id == self.location_id)
+        if self.created_from is not None:
+            conditions.append(Item.created_at >= self.created_from)
+        if self.created_to is not None:
+            conditions.append(Item.created_at < self.created_to)
+        return conditions
+
+    def cache_params(self) -> dict:
+        """Значения фильтров для ключа кэша результатов поиска."""
+        return {key: value.name if isinstance(value, (ItemType, ItemStatus)) else value
+                for key, value in asdict(self).items()}
+
+
+DEFAULT_SEARCH_FILTERS = ItemSearchFilters()
+
+# Связи Item, которые можно загрузить вместе с объявлениями (load_relations в методах репозитория)
+ITEM_RELATIONS = ("author", "category", "location")
+
+
+def item_load_options(load_relations: Sequence[str] = ()) -> list:
+    """
+    Опции жадной загрузки связей. Все связи — «многие к одному», поэтому joinedload
+    добавляет LEFT JOIN к тому же запросу и не размножает строки: объявления и их автор,
+    категория и корпус приходят одним запросом вместо отдельной ленивой загрузки на каждое.
+    """
+    unknown = set(load_relations) - set(ITEM_RELATIONS)
+    if unknown:
+        raise ValueError(f"Неизвестные связи Item: {', '.join(sorted(unknown))}")
+    return [joinedload(getattr(Item, relation)) for relation in load_relations]
+
 
 class ItemRepository(BaseRepository[Item]):
     """
@@ -14,34 +91,379 @@ class ItemRepository(BaseRepository[Item]):
         super().__init__(session, Item)
 
     async def create_item_with_vector(self, title: str, description: str, category_id: int, location_id: Optional[int], user_id: int, vector: List[float]) -> Item:
-        """Создать объявление с вектором описания."""
+        """Создать объявление с вектором описания (версии settings.embedding_model_version)."""
         db_item = Item(
             title=title,
             description=description,
             category_id=category_id,
             location_id=location_id,
             author_id=user_id,
-            vector=vector # Присваиваем вектор как есть
+            embeddings=[ItemEmbedding(model_version=settings.embedding_model_version, vector=vector)],
         )
         return await self.create(db_item)
 
-    async def find_similar_items(self, query_vector: List[float], limit: int = 5) -> List[Item]:
+    async def set_vector_search_params(
+        self,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        iterative_scan: Optional[str] = None,
+    ) -> None:
+        """
+        Устанавливает параметры ANN-поиска pgvector на текущую транзакцию.
+        set_config(..., true) действует как SET LOCAL и сбрасывается при commit/rollback,
+        поэтому не влияет на другие запросы из пула соединений.
+        """
+        if iterative_scan is not None:
+            # pgvector >= 0.8: если после фильтрации строк меньше limit, HNSW-скан
+            # продолжает обход графа, а не возвращает неполный результат.
+            await self._session.execute(
+                select(func.set_config("hnsw.iterative_scan", iterative_scan, True))
+            )
+        if ef_search is not None:
+            await self._session.execute(
+                select(func.set_config("hnsw.ef_search", str(int(ef_search)), True))
+            )
+        if probes is not None:
+            await self._session.execute(
+                select(func.set_config("ivfflat.probes", str(int(probes)), True))
+            )
+
+    async def find_similar_items(
+        self,
+        query_vector: List[float],
+        limit: int = 5,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        storage: Optional[str] = None,
+        filters: Optional[ItemSearchFilters] = None,
+        load_relations: Sequence[str] = (),
+    ) -> List[Item]:
         """
-        Найти объявления, похожие на заданный вектор (семантический поиск).
-        Использует оператор <-> для косинусного расстояния.
+        Найти объявления, похожие на заданный вектор (семантический поиск), по умолчанию —
+        среди активных находок. Использует оператор <=> (косинусное расстояние) и частичный
+        HNSW-индекс текущей версии модели в item_embeddings; фильтры применяются в том же
+        запросе, итеративный скан индекса добирает строки, отсеянные фильтрами.
+
+        Args:
+            query_vector: Вектор запроса.
+            limit: Количество результатов.
+            ef_search: hnsw.ef_search для этого запроса (по умолчанию из настроек).
+            probes: ivfflat.probes для этого запроса (по умолчанию из настроек).
+            storage: Индекс для отбора кандидатов: "vector", "halfvec" или "binary"
+                (по умолчанию settings.vector_search_storage). Для halfvec/binary кандидаты
+                переранжируются по точному косинусному расстоянию float32-векторов.
+            filters: Фильтры (категория, корпус, тип, статус, период создания).
+            load_relations: Связи из ITEM_RELATIONS, загружаемые тем же запросом
+                (например, ("author", "location") для карточки результата в боте).
         """
-        # Используем raw SQL для оператора <-> pgvector
-        # SQLAlchemy не всегда генерирует его идеально через ORM
-        stmt = select(Item).order_by(Item.vector.cosine_distance(query_vector)).limit(limit)
+        filters = filters or DEFAULT_SEARCH_FILTERS
+        if self._use_vector_index(filters):
+            ranked_ids = [item_id for item_id, _ in vector_index.search(query_vector, limit)]
+            return await self.get_by_ids_in_order(ranked_ids, load_relations=load_relations)
+
+        stmt, _ = await self._similar_items_stmt(
+            select(Item).options(*item_load_options(load_relations)),
+            query_vector, limit, ef_search, probes, storage, filters,
+        )
         result = await self._session.execute(stmt)
         return result.scalars().all()
 
-    # Пример метода для поиска по тексту (точное совпадение или LIKE)
-    async def find_by_title_or_description(self, search_text: str) -> List[Item]:
-        """Найти объявления по частичному совпадению в заголовке или описании."""
-        stmt = select(Item).where(
-            Item.title.ilike(f"%{search_text}%") |
-            Item.description.ilike(f"%{search_text}%")
+    async def find_similar_item_ids(
+        self,
+        query_vector: List[float],
+        limit: int = 5,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        storage: Optional[str] = None,
+        filters: Optional[ItemSearchFilters] = None,
+    ) -> List[int]:
+        """
+        То же, что find_similar_items, но возвращает только ID в порядке убывания близости.
+        Используется для слияния с другими ранжированиями без загрузки строк.
+        """
+        filters = filters or DEFAULT_SEARCH_FILTERS
+        if self._use_vector_index(filters):
+            return [item_id for item_id, _ in vector_index.search(query_vector, limit)]
+
+        stmt, _ = await self._similar_items_stmt(
+            select(Item.id), query_vector, limit, ef_search, probes, storage, filters
+        )
+        result = await self._session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def find_similar_item_scores(
+        self,
+        query_vector: List[float],
+        limit: int = 5,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        storage: Optional[str] = None,
+        filters: Optional[ItemSearchFilters] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        То же, что find_similar_item_ids, но вместе с косинусной близостью (1 - расстояние):
+        пары (item_id, score) в порядке убывания близости.
+        """
+        filters = filters or DEFAULT_SEARCH_FILTERS
+        if self._use_vector_index(filters):
+            return vector_index.search(query_vector, limit)
+
+        stmt, distance = await self._similar_items_stmt(
+            select(Item.id), query_vector, limit, ef_search, probes, storage, filters
+        )
+        result = await self._session.execute(stmt.add_columns(distance))
+        return [(item_id, 1.0 - float(item_distance)) for item_id, item_distance in result.all()]
+
+    @staticmethod
+    def _use_vector_index(filters: ItemSearchFilters) -> bool:
+        """Индекс в памяти содержит только активные находки и не знает их атрибутов."""
+        return vector_index_enabled() and vector_index.loaded and filters.is_default
+
+    @staticmethod
+    def effective_ef_search(storage: str, limit: int, ef_search: Optional[int] = None) -> Optional[int]:
+        """
+        hnsw.ef_search, с которым на самом деле выполнится поиск (None — значение сервера).
+        Для halfvec/binary он не меньше числа кандидатов для переранжирования.
+        """
+        ef_search = ef_search if ef_search is not None else settings.vector_search_ef_search
+        if storage != "vector":
+            # HNSW отдаёт не больше ef_search строк: кандидатов для переранжирования не должно быть меньше
+            ef_search = max(ef_search or 40, limit, settings.vector_search_rerank_candidates)
+        return ef_search
+
+    async def _similar_items_stmt(self, stmt, query_vector, limit, ef_search, probes, storage=None, filters=None):
+        """
+        Общая часть запросов семантического поиска через pgvector.
+        Возвращает запрос и выражение косинусного расстояния, по которому он упорядочен.
+        """
+        storage = storage or settings.vector_search_storage
+        candidates = max(limit, settings.vector_search_rerank_candidates)
+        await self.set_vector_search_params(
+            ef_search=self.effective_ef_search(storage, limit, ef_search),
+            probes=probes if probes is not None else settings.vector_search_probes,
+            iterative_scan=settings.vector_search_iterative_scan,
+        )
+        conditions = (filters or DEFAULT_SEARCH_FILTERS).conditions()
+        # Условие частичного индекса (версия модели) передаём литералом, а не параметром:
+        # иначе планировщик не сможет доказать, что запрос покрывается индексом.
+        # Фильтры по items проверяются на строках, которые отдаёт HNSW-скан.
+        if storage == "vector":
+            distance = embedding_vector().cosine_distance(query_vector)
+            return (
+                stmt
+                .join(ItemEmbedding, embedding_join_condition())
+                .where(*conditions)
+                .order_by(distance)
+                .limit(limit)
+            ), distance
+
+        # Двухэтапный поиск: кандидаты по компактному индексу (float16 или биты),
+        # затем точное косинусное расстояние по float32-векторам только для них.
+        shortlist = (
+            select(
+                Item.id.label("item_id"),
+                embedding_vector().cosine_distance(query_vector).label("distance"),
+            )
+            .join(ItemEmbedding, embedding_join_condition())
+            .where(*conditions)
+            .order_by(ann_distance(query_vector, storage))
+            .limit(candidates)
+            .subquery()
+        )
+        return (
+            stmt
+            .join(shortlist, shortlist.c.item_id == Item.id)
+            .order_by(shortlist.c.distance)
+            .limit(limit)
+        ), shortlist.c.distance
+
+    async def find_ids_by_fulltext(
+        self, search_text: str, limit: int = 50, filters: Optional[ItemSearchFilters] = None
+    ) -> List[int]:
+        """
+        Полнотекстовый поиск, по умолчанию — по активным находкам (русская морфология,
+        GIN-индекс по search_tsv).
+        Возвращает ID в порядке убывания релевантности ts_rank_cd.
+        Запрос разбирается websearch_to_tsquery: поддерживаются "фразы", OR и -исключения.
+        """
+        query = func.websearch_to_tsquery(FULLTEXT_CONFIG, search_text)
+        stmt = (
+            select(Item.id)
+            .where(*(filters or DEFAULT_SEARCH_FILTERS).conditions())
+            .where(Item.search_tsv.bool_op("@@")(query))
+            .order_by(func.ts_rank_cd(Item.search_tsv, query).desc(), Item.id.desc())
+            .limit(limit)
+        )
+        result = await self._session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def stream_active_vectors(self, item_type: ItemType, chunk_size: int = 5000) -> AsyncIterator[Sequence]:
+        """
+        Потоково отдаёт (id, author_id, vector) активных объявлений заданного типа
+        порциями по chunk_size строк (серверный курсор, без загрузки всей таблицы разом).
+        """
+        condition = ACTIVE_FOUND_CONDITION if item_type == ItemType.FOUND else ACTIVE_LOST_CONDITION
+        stmt = (
+            select(Item.id, Item.author_id, ItemEmbedding.vector)
+            .join(ItemEmbedding, embedding_join_condition())
+            .where(text(condition))
+            .execution_options(yield_per=chunk_size)
+        )
+        result = await self._session.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
+
+    async def stream_for_embedding(
+        self,
+        model_version: str,
+        after_id: int = 0,
+        only_missing: bool = True,
+        chunk_size: int = 2000,
+    ) -> AsyncIterator[Sequence]:
+        """
+        Потоково отдаёт (id, description) объявлений с непустым описанием в порядке id,
+        начиная после after_id (keyset), порциями по chunk_size строк через серверный курсор.
+
+        Args:
+            model_version: Версия модели, для которой считаются векторы.
+            after_id: Последний уже обработанный id (для продолжения прерванного прохода).
+            only_missing: Только объявления без вектора этой версии; иначе — все.
+            chunk_size: Размер порции.
+        """
+        stmt = (
+            select(Item.id, Item.description)
+            .where(Item.id > after_id)
+            .where(Item.description.is_not(None))
+            .where(Item.description != "")
+            .order_by(Item.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        if only_missing:
+            stmt = stmt.where(~exists().where(embedding_join_condition(model_version)))
+        result = await self._session.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
+
+    async def get_by_ids_in_order(
+        self,
+        ids: List[int],
+        filters: Optional[ItemSearchFilters] = None,
+        load_relations: Sequence[str] = (),
+    ) -> List[Item]:
+        """
+        Загружает объявления по списку ID, сохраняя порядок списка. ID, которые уже
+        не проходят фильтры (по умолчанию — активные находки, например архивированные), пропускаются.
+        """
+        if not ids:
+            return []
+        stmt = (
+            select(Item)
+            .options(*item_load_options(load_relations))
+            .where(Item.id.in_(ids))
+            .where(*(filters or DEFAULT_SEARCH_FILTERS).conditions())
+        )
+        result = await self._session.execute(stmt)
+        items_by_id = {item.id: item for item in result.scalars().all()}
+        return [items_by_id[item_id] for item_id in ids if item_id in items_by_id]
+
+    async def get_user_items(self, author_id: int, load_relations: Sequence[str] = ()) -> List[Item]:
+        """Неархивированные объявления пользователя, новые сверху."""
+        stmt = (
+            select(Item)
+            .options(*item_load_options(load_relations))
+            .where(Item.author_id == author_id)
+            .where(Item.status != ItemStatus.ARCHIVED)
+            .order_by(Item.created_at.desc())
+        )
+        result = await self._session.execute(stmt)
+        return result.scalars().all()
+
+    async def count_stale(self, category_id: int, created_before: datetime.datetime) -> Tuple[int, Optional[datetime.datetime]]:
+        """Число активных объявлений категории, созданных раньше created_before, и дата самого старого."""
+        stmt = (
+            select(func.count(), func.min(Item.created_at))
+            .where(text(ACTIVE_CONDITION))
+            .where(Item.category_id == category_id)
+            .where(Item.created_at < created_before)
+        )
+        count, oldest = (await self._session.execute(stmt)).one()
+        return count, oldest
+
+    async def archive_stale_batch(
+        self,
+        category_id: int,
+        created_before: datetime.datetime,
+        archived_at: datetime.datetime,
+        limit: int,
+    ) -> List[int]:
+        """
+        Архивирует до limit самых старых активных объявлений категории, созданных раньше
+        created_before. Строки, заблокированные другими транзакциями (например, объявление
+        сейчас архивирует автор), пропускаются (FOR UPDATE SKIP LOCKED) и достанутся
+        следующему проходу. Возвращает ID архивированных.
+        """
+        batch = (
+            select(Item.id)
+            .where(text(ACTIVE_CONDITION))
+            .where(Item.category_id == category_id)
+            .where(Item.created_at < created_before)
+            .order_by(Item.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .cte("stale_batch")
+        )
+        return await self.update_where(
+            [Item.id.in_(select(batch.c.id))],
+            {"status": ItemStatus.ARCHIVED, "archived_at": archived_at},
+        )
+
+    async def find_by_title_or_description(self, search_text: str, limit: int = 100) -> List[Item]:
+        """
+        Найти объявления по подстроке в описании или месте находки (без учёта регистра).
+        ILIKE '%...%' обслуживается триграммными GIN-индексами, если в запросе не меньше 3 символов.
+        """
+        # Заголовка у Item нет: ищем по текстовым полям, которые есть в модели.
+        stmt = (
+            select(Item)
+            .where(
+                Item.description.icontains(search_text, autoescape=True) |
+                Item.specific_place.icontains(search_text, autoescape=True)
+            )
+            .order_by(Item.created_at.desc())
+            .limit(limit)
+        )
+        result = await self._session.execute(stmt)
+        return result.scalars().all()
+
+    async def find_fuzzy(self, search_text: str, threshold: Optional[float] = None, limit: int = 20) -> List[Item]:
+        """
+        Нечёткий поиск с учётом опечаток ("зантик" найдёт "зонтик") по описанию и месту находки.
+        Ранжирует по word_similarity: насколько запрос похож на самый близкий фрагмент текста,
+        поэтому короткий запрос не проигрывает длинным описаниям.
+
+        Args:
+            search_text: Строка запроса.
+            threshold: Порог word_similarity от 0 до 1 (по умолчанию settings.fuzzy_search_threshold).
+            limit: Количество результатов.
+        """
+        threshold = threshold if threshold is not None else settings.fuzzy_search_threshold
+        # Оператор <% сравнивает с pg_trgm.word_similarity_threshold и, в отличие от вызова
+        # функции в WHERE, использует GIN-индекс. Порог задаём только на эту транзакцию.
+        await self._session.execute(
+            select(func.set_config("pg_trgm.word_similarity_threshold", str(float(threshold)), True))
+        )
+        score = func.greatest(
+            func.coalesce(func.word_similarity(search_text, Item.description), 0),
+            func.coalesce(func.word_similarity(search_text, Item.specific_place), 0),
+        )
+        stmt = (
+            select(Item)
+            .where(
+                literal(search_text).op("<%")(Item.description) |
+                literal(search_text).op("<%")(Item.specific_place)
+            )
+            .order_by(score.desc(), Item.id.desc())
+            .limit(limit)
         )
         result = await self._session.execute(stmt)
         return result.scalars().all()
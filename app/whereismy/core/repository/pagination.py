@@ -0,0 +1,67 @@
+# app/whereismy/core/repository/pagination.py
+"""
+Курсорная (keyset) пагинация.
+
+Вместо OFFSET страница задаётся ключом сортировки последней строки предыдущей страницы:
+WHERE (created_at, id) < (:created_at, :id) ORDER BY created_at DESC, id DESC LIMIT :limit.
+С составным индексом по (created_at, id) любая страница стоит как первая, а вставки
+новых строк не сдвигают уже выданные страницы.
+
+Курсор для клиента непрозрачен: это base64 от JSON со значениями ключа.
+"""
+import base64
+import binascii
+import datetime
+import json
+from dataclasses import dataclass
+from typing import Generic, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+class InvalidCursorError(ValueError):
+    """Курсор повреждён или выдан для другого списка."""
+
+
+@dataclass
+class Page(Generic[T]):
+    """Страница результатов; next_cursor = None — это последняя страница."""
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(values: Sequence) -> str:
+    """Значения ключа сортировки последней строки -> непрозрачный токен."""
+    raw = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, key_types: Sequence[type]) -> list:
+    """
+    Токен -> значения ключа сортировки, по одному на тип из key_types (например, datetime и int).
+    Бросает InvalidCursorError на чужом или битом курсоре: значение не того типа
+    иначе дошло бы до сравнения в SQL и закончилось ошибкой БД.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(key_types):
+            raise ValueError("неверное число значений ключа")
+        values = [_decode_value(value) for value in values]
+        for value, key_type in zip(values, key_types):
+            if not isinstance(value, key_type) or isinstance(value, bool):
+                raise TypeError(f"значение ключа должно быть {key_type.__name__}")
+        return values
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as error:
+        raise InvalidCursorError("Некорректный курсор пагинации") from error
@@ -0,0 +1,181 @@
+# app/whereismy/core/vector_index.py
+import asyncio
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.whereismy.config import settings
+from app.whereismy.core.database import AsyncSessionLocal
+from app.whereismy.core.models import Item, ItemEmbedding
+from app.whereismy.core.models.item import ACTIVE_FOUND_CONDITION
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryVectorIndex:
+    """
+    Индекс векторов активных объявлений о находке в памяти процесса.
+
+    Векторы хранятся нормированными в одной непрерывной float32-матрице,
+    поэтому top-k по косинусной близости — это одно умножение матрицы на вектор
+    и argpartition, без обращения к БД. Для масштабов кампуса (десятки тысяч
+    объявлений) матрица занимает единицы мегабайт.
+    """
+    def __init__(self, dim: int = 384, initial_capacity: int = 1024):
+        self.dim = dim
+        self._matrix = np.zeros((initial_capacity, dim), dtype=np.float32)
+        self._ids = np.zeros(initial_capacity, dtype=np.int64)
+        self._positions: dict[int, int] = {} # item_id -> строка матрицы
+        self._size = 0
+        self.loaded = False
+        # Журнал add/remove, сделанных во время load(): снимок из БД мог их не увидеть,
+        # поэтому после replace_all они применяются повторно. По журналу на каждую идущую загрузку.
+        self._journals: List[List[Tuple[int, Optional[np.ndarray]]]] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._positions
+
+    def _normalize(self, vector) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(array)
+        return array / norm if norm > 0 else array
+
+    def _grow(self, min_capacity: int) -> None:
+        capacity = max(min_capacity, 2 * len(self._ids))
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        ids = np.zeros(capacity, dtype=np.int64)
+        ids[:self._size] = self._ids[:self._size]
+        self._matrix, self._ids = matrix, ids
+
+    def add(self, item_id: int, vector) -> None:
+        """Добавляет объявление или обновляет его вектор."""
+        for journal in self._journals:
+            journal.append((item_id, np.asarray(vector, dtype=np.float32)))
+        position = self._positions.get(item_id)
+        if position is None:
+            if self._size == len(self._ids):
+                self._grow(self._size + 1)
+            position = self._size
+            self._size += 1
+            self._positions[item_id] = position
+            self._ids[position] = item_id
+        self._matrix[position] = self._normalize(vector)
+
+    def remove(self, item_id: int) -> bool:
+        """Удаляет объявление из индекса. На его место переносится последняя строка."""
+        for journal in self._journals:
+            journal.append((item_id, None))
+        position = self._positions.pop(item_id, None)
+        if position is None:
+            return False
+        last = self._size - 1
+        if position != last:
+            self._matrix[position] = self._matrix[last]
+            moved_id = int(self._ids[last])
+            self._ids[position] = moved_id
+            self._positions[moved_id] = position
+        self._size -= 1
+        return True
+
+    def replace_all(self, entries: Iterable[Tuple[int, object]]) -> None:
+        """Полностью пересобирает индекс из пар (item_id, vector)."""
+        entries = list(entries)
+        capacity = max(len(entries), 1024)
+        self._matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._positions = {}
+        self._size = 0
+        if entries:
+            ids, vectors = zip(*entries)
+            matrix = np.asarray(vectors, dtype=np.float32).reshape(len(entries), self.dim)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._matrix[:len(entries)] = matrix / norms
+            self._ids[:len(entries)] = ids
+            self._positions = {int(item_id): i for i, item_id in enumerate(ids)}
+            self._size = len(entries)
+        self.loaded = True
+
+    def search(self, query_vector, limit: int = 5) -> List[Tuple[int, float]]:
+        """
+        Возвращает до limit пар (item_id, косинусная близость), отсортированных по убыванию близости.
+        """
+        if self._size == 0 or limit <= 0:
+            return []
+        scores = self._matrix[:self._size] @ self._normalize(query_vector)
+        k = min(limit, self._size)
+        if k < self._size:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(self._size)
+        top = top[np.argsort(-scores[top])]
+        return [(int(self._ids[i]), float(scores[i])) for i in top]
+
+    async def load(self, session: AsyncSession, chunk_size: int = 5000) -> None:
+        """Загружает векторы текущей версии модели для всех активных находок."""
+        from app.whereismy.core.repository.item_embedding_repository import embedding_join_condition
+        stmt = (
+            select(Item.id, ItemEmbedding.vector)
+            .join(ItemEmbedding, embedding_join_condition())
+            .where(text(ACTIVE_FOUND_CONDITION))
+            .execution_options(yield_per=chunk_size)
+        )
+        journal: List[Tuple[int, Optional[np.ndarray]]] = []
+        self._journals.append(journal)
+        try:
+            result = await session.stream(stmt)
+            entries = []
+            async for partition in result.partitions():
+                entries.extend((row.id, row.vector) for row in partition)
+        finally:
+            self._journals.remove(journal)
+        # Между чтением снимка и заменой нет await: add/remove (after_commit в том же цикле
+        # событий) не могут вклиниться. Изменения, сделанные во время чтения, — в исходном порядке.
+        self.replace_all(entries)
+        for item_id, vector in journal:
+            if vector is None:
+                self.remove(item_id)
+            else:
+                self.add(item_id, vector)
+        logger.info(f"Векторный индекс в памяти загружен: {self._size} объявлений.")
+
+
+# --- Глобальный экземпляр индекса для процесса ---
+vector_index = InMemoryVectorIndex(dim=settings.embedding_dim)
+
+
+def vector_index_enabled() -> bool:
+    """Используется ли индекс в памяти как бэкенд поиска."""
+    return settings.vector_search_backend == "numpy"
+
+
+async def load_vector_index() -> None:
+    """Загружает индекс при старте процесса, если выбран бэкенд numpy."""
+    if not vector_index_enabled():
+        return
+    async with AsyncSessionLocal() as session:
+        await vector_index.load(session)
+
+
+async def refresh_vector_index_periodically(interval: Optional[int] = None) -> None:
+    """
+    Периодически перезагружает индекс целиком. Нужна, когда объявления меняются
+    в другом процессе (бот, другой воркер uvicorn, админка), чьи инкрементальные
+    обновления сюда не доходят.
+    """
+    interval = interval if interval is not None else settings.vector_index_refresh_seconds
+    if not vector_index_enabled() or interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await load_vector_index()
+        except Exception:
+            logger.exception("Не удалось перезагрузить векторный индекс в памяти.")
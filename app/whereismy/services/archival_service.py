@@ -0,0 +1,141 @@
+# app/whereismy/services/archival_service.py
+"""
+Автоматическая архивация старых активных объявлений.
+
+Объявления сами не истекают, и набор активных находок, который ранжирует каждый поиск,
+только растёт. Задача архивирует активные объявления старше заданного возраста: общего
+(archival_max_age_days) или своего для категории (archival_max_age_days_by_category).
+Архивированные объявления уходят из частичных индексов по активным объявлениям
+(HNSW, полнотекстовый, фильтры) и из индекса в памяти.
+
+Архивация идёт порциями по archival_batch_size строк, каждая порция — отдельная короткая
+транзакция: SELECT ... FOR UPDATE SKIP LOCKED + UPDATE. Строки, которые сейчас меняет
+кто-то другой, пропускаются и достанутся следующему запуску.
+
+    python -m app.whereismy.services.archival_service --dry-run   # отчёт: что будет архивировано
+    python -m app.whereismy.services.archival_service             # архивировать
+
+В процессе API задача запускается периодически, если задан archival_interval_seconds.
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+from app.whereismy.config import settings
+from app.whereismy.services.items_service import ItemsService
+from app.whereismy.services.reference_data import reference_data
+from app.whereismy.services.unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CategoryArchivalReport:
+    """Итог по категории: items — архивировано (или будет архивировано при dry_run)."""
+    category_id: int
+    category: str
+    max_age_days: int
+    created_before: datetime.datetime
+    items: int
+    oldest: Optional[datetime.datetime] = None
+
+
+def max_age_days(category_name: str) -> int:
+    """Возраст архивации категории в днях; 0 — категория не архивируется."""
+    return settings.archival_max_age_days_by_category.get(category_name, settings.archival_max_age_days)
+
+
+class ArchivalService:
+    """Архивация старых объявлений по категориям."""
+    def __init__(self, batch_size: Optional[int] = None, batch_pause_seconds: Optional[float] = None):
+        self.batch_size = batch_size or settings.archival_batch_size
+        self.batch_pause_seconds = (
+            batch_pause_seconds if batch_pause_seconds is not None else settings.archival_batch_pause_seconds
+        )
+
+    async def archive_stale(self, dry_run: bool = False) -> List[CategoryArchivalReport]:
+        """
+        Архивирует старые объявления всех категорий (с dry_run — только считает).
+        Возвращает отчёт по категориям, у которых задан возраст архивации.
+        """
+        now = datetime.datetime.utcnow() # created_at хранится в UTC без часового пояса
+        reports = []
+        for category in await reference_data.categories():
+            days = max_age_days(category.name)
+            if days <= 0:
+                continue
+            report = CategoryArchivalReport(
+                category_id=category.id,
+                category=category.name,
+                max_age_days=days,
+                created_before=now - datetime.timedelta(days=days),
+                items=0,
+            )
+            if dry_run:
+                async with UnitOfWork(read_only=True) as uow:
+                    report.items, report.oldest = await uow.items.count_stale(category.id, report.created_before)
+            else:
+                report.items = await self._archive_category(category.id, report.created_before)
+            reports.append(report)
+        total = sum(report.items for report in reports)
+        if dry_run:
+            logger.info(f"Архивация (пробный запуск): будет архивировано объявлений — {total}.")
+        else:
+            logger.info(f"Архивация: архивировано объявлений — {total}.")
+        return reports
+
+    async def _archive_category(self, category_id: int, created_before: datetime.datetime) -> int:
+        archived = 0
+        while True:
+            # Порция — отдельная единица работы: блокировки строк держатся только на её время
+            async with UnitOfWork() as uow:
+                batch = await ItemsService(uow.items, uow.users).archive_stale_batch(
+                    uow.session, category_id, created_before, self.batch_size
+                )
+            archived += len(batch)
+            if len(batch) < self.batch_size:
+                return archived
+            await asyncio.sleep(self.batch_pause_seconds)
+
+
+async def archive_periodically(interval: Optional[int] = None) -> None:
+    """Периодическая архивация старых объявлений (выключена при интервале 0)."""
+    interval = interval if interval is not None else settings.archival_interval_seconds
+    if interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await ArchivalService().archive_stale()
+        except Exception:
+            logger.exception("Не удалось выполнить архивацию старых объявлений.")
+
+
+def print_report(reports: List[CategoryArchivalReport], dry_run: bool) -> None:
+    header = "будет архивировано" if dry_run else "архивировано"
+    print(f"{'Категория':<30} {'дней':>5} {'создано до':<19} {header:>18} {'самое старое':<19}")
+    for report in reports:
+        oldest = report.oldest.strftime("%Y-%m-%d %H:%M:%S") if report.oldest else "-"
+        print(
+            f"{report.category:<30} {report.max_age_days:>5} "
+            f"{report.created_before:%Y-%m-%d %H:%M:%S} {report.items:>18} {oldest:<19}"
+        )
+    print(f"Всего: {sum(report.items for report in reports)}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Архивация старых активных объявлений WhereIsMy.")
+    parser.add_argument("--dry-run", action="store_true", help="Только отчёт: сколько объявлений будет архивировано")
+    parser.add_argument("--batch-size", type=int, default=settings.archival_batch_size, help="Строк в одной транзакции")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    reports = asyncio.run(ArchivalService(batch_size=args.batch_size).archive_stale(dry_run=args.dry_run))
+    print_report(reports, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# app/whereismy/services/backfill_embeddings.py
+"""
+Массовая векторизация объявлений в item_embeddings: заполнение недостающих векторов
+и фоновый расчёт векторов новой версии модели перед переключением.
+
+Запуск (модель и версия берутся из настроек, их можно переопределить переменными окружения):
+    python -m app.whereismy.services.backfill_embeddings                 # только объявления без вектора
+    python -m app.whereismy.services.backfill_embeddings --all           # пересчитать все векторы версии
+    python -m app.whereismy.services.backfill_embeddings --all --restart # начать заново, игнорируя прогресс
+    EMBEDDING_MODEL_PATH=<новая модель> EMBEDDING_MODEL_VERSION=v2 \
+        python -m app.whereismy.services.backfill_embeddings             # заполнить новую версию
+
+Объявления читаются по возрастанию id серверным курсором порциями по --chunk-size,
+векторизуются батчами по --batch-size и записываются одним INSERT ... VALUES ... ON CONFLICT
+на порцию. Запись порции в БД идёт параллельно с векторизацией следующей, поэтому
+в памяти одновременно не больше двух порций.
+
+После каждой записанной порции последний id сохраняется в файл прогресса; повторный
+запуск с теми же параметрами продолжает с этого места.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from app.whereismy.config import settings
+from app.whereismy.core.database import AsyncSessionLocal
+from app.whereismy.core.repository.item_embedding_repository import ItemEmbeddingRepository
+from app.whereismy.core.repository.item_repository import ItemRepository
+from app.whereismy.services.embedding_service import EmbeddingService
+from app.whereismy.services.search_cache import invalidate_search_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROGRESS_PATH = ".cache/backfill_embeddings.json"
+
+
+class BackfillProgress:
+    """Прогресс прохода в JSON-файле: последний записанный id и счётчики."""
+    def __init__(self, path: str, model: str, model_version: str, only_missing: bool):
+        self.path = path
+        self.model = model
+        self.model_version = model_version
+        self.only_missing = only_missing
+        self.last_id = 0
+        self.processed = 0
+
+    def load(self) -> None:
+        """Подхватывает сохранённый прогресс, если он от того же прохода (модель, версия и режим)."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            state = json.load(f)
+        if (state.get("model"), state.get("model_version"), state.get("only_missing")) != (
+            self.model, self.model_version, self.only_missing
+        ):
+            logger.info("Сохранённый прогресс относится к другому проходу, начинаем сначала.")
+            return
+        self.last_id = int(state.get("last_id", 0))
+        self.processed = int(state.get("processed", 0))
+        logger.info(f"Продолжаем с id > {self.last_id} (уже обработано {self.processed}).")
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {
+            "model": self.model,
+            "model_version": self.model_version,
+            "only_missing": self.only_missing,
+            "last_id": self.last_id,
+            "processed": self.processed,
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path) # Атомарно: файл не останется записанным наполовину
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+async def _encode_chunk(service: EmbeddingService, texts: List[str], batch_size: int) -> List[List[float]]:
+    vectors: List[List[float]] = []
+    for start in range(0, len(texts), batch_size):
+        vectors.extend(await service.embed_texts(texts[start:start + batch_size]))
+    return vectors
+
+
+async def backfill_embeddings(
+    only_missing: bool = True,
+    chunk_size: int = 2000,
+    batch_size: int = 256,
+    progress_path: str = DEFAULT_PROGRESS_PATH,
+    restart: bool = False,
+) -> int:
+    """
+    Векторизует описания объявлений моделью embedding_model_path и записывает векторы
+    версии embedding_model_version в item_embeddings.
+    Возвращает число обновлённых строк за этот запуск.
+    """
+    model_version = settings.embedding_model_version
+    progress = BackfillProgress(progress_path, settings.embedding_model_path, model_version, only_missing)
+    if restart:
+        progress.clear()
+    else:
+        progress.load()
+
+    # Отдельный экземпляр без кэша и батчинга: тексты уже собраны в батчи,
+    # а архивные описания незачем складывать в кэш поисковых запросов.
+    service = EmbeddingService(
+        settings.embedding_model_path,
+        batching=False,
+        cache=None,
+        backend=settings.embedding_backend,
+        onnx_path=settings.embedding_onnx_path,
+        onnx_quantized=settings.embedding_onnx_quantized,
+    )
+
+    started = time.monotonic()
+    updated = 0
+    pending_write: Optional[asyncio.Task] = None
+
+    # Чтение и запись — в разных сессиях: коммит пишущей сессии не должен закрывать курсор читающей.
+    async with AsyncSessionLocal() as read_session, AsyncSessionLocal() as write_session:
+        reader = ItemRepository(read_session)
+        writer = ItemEmbeddingRepository(write_session)
+
+        async def write(rows: Sequence[Tuple[int, List[float]]]) -> None:
+            nonlocal updated
+            updated += await writer.bulk_upsert(rows, model_version)
+            await write_session.commit() # Порция зафиксирована — только после этого сохраняем прогресс
+            progress.last_id = rows[-1][0]
+            progress.processed += len(rows)
+            progress.save()
+            elapsed = time.monotonic() - started
+            logger.info(
+                f"Обработано {progress.processed} объявлений (id <= {progress.last_id}), "
+                f"{updated / elapsed if elapsed else 0:.0f} строк/с."
+            )
+
+        try:
+            async for partition in reader.stream_for_embedding(
+                model_version, after_id=progress.last_id, only_missing=only_missing, chunk_size=chunk_size,
+            ):
+                ids = [row.id for row in partition]
+                vectors = await _encode_chunk(service, [row.description for row in partition], batch_size)
+                if pending_write is not None:
+                    await pending_write
+                pending_write = asyncio.create_task(write(list(zip(ids, vectors))))
+            if pending_write is not None:
+                await pending_write
+        except BaseException:
+            if pending_write is not None and not pending_write.done():
+                pending_write.cancel()
+            raise
+        finally:
+            await service.close()
+
+    logger.info(f"Готово: обновлено {updated} объявлений за {time.monotonic() - started:.1f} с.")
+    progress.clear()
+    if updated:
+        await invalidate_search_cache() # Объявления с новыми векторами должны попасть в выдачу
+    return updated
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Массовая векторизация объявлений WhereIsMy.")
+    parser.add_argument("--all", action="store_true", help="Пересчитать все векторы версии, а не только недостающие")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Строк на порцию чтения и записи")
+    parser.add_argument("--batch-size", type=int, default=256, help="Текстов на один вызов модели")
+    parser.add_argument("--progress", default=DEFAULT_PROGRESS_PATH, help="Файл прогресса для продолжения")
+    parser.add_argument("--restart", action="store_true", help="Игнорировать сохранённый прогресс")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(backfill_embeddings(
+        only_missing=not args.all,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        progress_path=args.progress,
+        restart=args.restart,
+    ))
+
+
+if __name__ == "__main__":
+    main()
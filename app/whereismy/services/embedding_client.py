@@ -0,0 +1,155 @@
+# app/whereismy/services/embedding_client.py
+import asyncio
+import itertools
+import logging
+import time
+
+from app.whereismy.services.embedding_protocol import (
+    EmbeddingServiceError, read_frame, unpack_vectors, write_frame,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class RemoteEmbeddingService:
+    """
+    Клиент сервера эмбеддингов (см. embedding_server.py) с тем же интерфейсом,
+    что у EmbeddingService: embed_text, embed_texts, warmup, ready, close.
+
+    Держит пул соединений: запрос берёт свободное соединение, а если все заняты
+    и пул не заполнен — открывает новое. Соединение, на котором случилась ошибка
+    или таймаут, закрывается и в пул не возвращается.
+    """
+    def __init__(
+        self,
+        socket_path: str | None = None,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        pool_size: int = 4,
+        timeout: float = 10.0,
+    ):
+        """
+        Args:
+            socket_path (str | None): Unix-сокет сервера; если None — подключение по TCP.
+            host (str): Хост сервера для TCP.
+            port (int): Порт сервера для TCP.
+            pool_size (int): Максимальное число одновременно открытых соединений.
+            timeout (float): Таймаут в секундах на подключение и на один запрос.
+        """
+        self.socket_path = socket_path
+        self.host = host
+        self.port = port
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+        self.ready = False # Сервер отвечает и его модель прогрета
+        self._ids = itertools.count(1)
+        self._idle: list[_Connection] = []
+        self._slots: asyncio.Semaphore | None = None # Ограничивает число соединений в работе
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.pool_size)
+            self._idle = []
+        return self._slots
+
+    async def _connect(self) -> _Connection:
+        if self.socket_path:
+            reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        return _Connection(reader, writer)
+
+    async def _acquire(self) -> _Connection:
+        """Берёт простаивающее соединение или открывает новое, если занятых меньше pool_size."""
+        slots = self._get_slots()
+        try:
+            await asyncio.wait_for(slots.acquire(), self.timeout)
+        except asyncio.TimeoutError as e:
+            raise EmbeddingServiceError("Нет свободного соединения с сервером эмбеддингов") from e
+        if self._idle:
+            return self._idle.pop()
+        try:
+            return await asyncio.wait_for(self._connect(), self.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            slots.release()
+            self.ready = False
+            raise EmbeddingServiceError(f"Не удалось подключиться к серверу эмбеддингов: {e!r}") from e
+
+    def _release(self, connection: _Connection) -> None:
+        self._idle.append(connection)
+        self._slots.release()
+
+    def _discard(self, connection: _Connection) -> None:
+        connection.close()
+        self._slots.release()
+
+    async def _request(self, header: dict) -> tuple[dict, bytes]:
+        header = {"id": next(self._ids), **header}
+        connection = await self._acquire()
+        try:
+            await write_frame(connection.writer, header)
+            response, payload = await asyncio.wait_for(read_frame(connection.reader), self.timeout)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+            self._discard(connection)
+            self.ready = False
+            raise EmbeddingServiceError(f"Ошибка обмена с сервером эмбеддингов: {e!r}") from e
+        except BaseException:
+            # Отмена посреди обмена оставляет соединение в неизвестном состоянии
+            self._discard(connection)
+            raise
+        if response.get("id") != header["id"]:
+            self._discard(connection)
+            raise EmbeddingServiceError("Ответ сервера эмбеддингов не соответствует запросу")
+        self._release(connection)
+
+        if "error" in response:
+            raise EmbeddingServiceError(response["error"])
+        return response, payload
+
+    async def embed_text(self, text: str) -> list[float]:
+        """Асинхронно получает эмбеддинг текста от сервера."""
+        return (await self.embed_texts([text]))[0]
+
+    async def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        """Получает эмбеддинги списка текстов одним запросом."""
+        if not texts:
+            return []
+        response, payload = await self._request({"op": "embed", "texts": list(texts)})
+        self.ready = True
+        return unpack_vectors(response["shape"], payload)
+
+    async def ping(self) -> bool:
+        """Спрашивает сервер, прогрета ли модель."""
+        response, _ = await self._request({"op": "ping"})
+        self.ready = bool(response.get("ready"))
+        return self.ready
+
+    async def warmup(self, max_wait: float = 300.0, interval: float = 1.0) -> None:
+        """Ждёт, пока сервер станет доступен и прогреет модель (не дольше max_wait секунд)."""
+        deadline = time.monotonic() + max_wait
+        while time.monotonic() < deadline:
+            try:
+                if await self.ping():
+                    logger.info("Сервер эмбеддингов готов.")
+                    return
+            except EmbeddingServiceError as e:
+                logger.debug(f"Сервер эмбеддингов пока недоступен: {e}")
+            await asyncio.sleep(interval)
+        logger.warning("Сервер эмбеддингов не стал готов за отведённое время.")
+
+    async def close(self) -> None:
+        """Закрывает все простаивающие соединения."""
+        while self._idle:
+            self._idle.pop().close()
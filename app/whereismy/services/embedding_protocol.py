@@ -0,0 +1,52 @@
+# app/whereismy/services/embedding_protocol.py
+"""
+Протокол обмена между сервером эмбеддингов и его клиентами.
+
+Кадр: заголовок struct "!II" (длина JSON, длина бинарной части), затем JSON и бинарная часть.
+    запрос embed:  {"id": 1, "op": "embed", "texts": [...]}            без бинарной части
+    ответ embed:   {"id": 1, "shape": [n, dim]}                         + float32-матрица n x dim
+    запрос ping:   {"id": 2, "op": "ping"}
+    ответ ping:    {"id": 2, "ready": true}
+    ошибка:        {"id": 1, "error": "описание"}
+Векторы передаются сырыми float32-байтами, а не JSON-числами: это в несколько раз компактнее
+и не требует разбора текста на стороне клиента.
+"""
+import asyncio
+import json
+import struct
+
+import numpy as np
+
+FRAME_HEADER = struct.Struct("!II")
+MAX_FRAME_SIZE = 64 * 1024 * 1024 # Защита от некорректных/чужих клиентов
+
+
+class EmbeddingServiceError(Exception):
+    """Ошибка удалённого сервиса эмбеддингов (сеть, таймаут или ответ с ошибкой)."""
+
+
+async def write_frame(writer: asyncio.StreamWriter, header: dict, payload: bytes = b"") -> None:
+    body = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    writer.write(FRAME_HEADER.pack(len(body), len(payload)) + body + payload)
+    await writer.drain()
+
+
+async def read_frame(reader: asyncio.StreamReader) -> tuple[dict, bytes]:
+    """Читает один кадр. При закрытом соединении поднимает asyncio.IncompleteReadError."""
+    header_size, payload_size = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    if header_size + payload_size > MAX_FRAME_SIZE:
+        raise EmbeddingServiceError(f"Слишком большой кадр: {header_size + payload_size} байт")
+    header = json.loads(await reader.readexactly(header_size))
+    payload = await reader.readexactly(payload_size) if payload_size else b""
+    return header, payload
+
+
+def pack_vectors(vectors: list[list[float]]) -> tuple[list[int], bytes]:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim != 2:
+        matrix = matrix.reshape(len(vectors), -1)
+    return list(matrix.shape), matrix.tobytes()
+
+
+def unpack_vectors(shape: list[int], payload: bytes) -> list[list[float]]:
+    return np.frombuffer(payload, dtype=np.float32).reshape(shape).tolist()
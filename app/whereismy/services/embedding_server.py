@@ -0,0 +1,109 @@
+# app/whereismy/services/embedding_server.py
+"""
+Отдельный процесс-владелец модели эмбеддингов.
+
+Запуск:
+    python -m app.whereismy.services.embedding_server            # Unix-сокет из настроек
+    python -m app.whereismy.services.embedding_server --tcp      # localhost:порт из настроек
+
+Воркеры uvicorn и бот с embedding_service_mode = "remote" отправляют сюда тексты
+через RemoteEmbeddingService. Запросы всех клиентов попадают в общую очередь батчинга
+и общий кэш, поэтому на хост приходится одна копия модели в памяти.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+from functools import partial
+
+from app.whereismy.config import settings
+from app.whereismy.services.embedding_protocol import pack_vectors, read_frame, write_frame
+from app.whereismy.services.embedding_service import EmbeddingService, create_local_embedding_service
+
+logger = logging.getLogger(__name__)
+
+
+async def _handle_request(service: EmbeddingService, header: dict) -> tuple[dict, bytes]:
+    request_id = header.get("id")
+    op = header.get("op", "embed")
+    if op == "ping":
+        return {"id": request_id, "ready": service.ready}, b""
+    if op != "embed":
+        return {"id": request_id, "error": f"Неизвестная операция: {op}"}, b""
+
+    texts = header.get("texts")
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        return {"id": request_id, "error": "Поле texts должно быть списком строк"}, b""
+    if not texts:
+        return {"id": request_id, "shape": [0, 0]}, b""
+    # Каждый текст идёт через очередь батчинга и кэш: тексты разных клиентов
+    # объединяются в общие батчи модели.
+    vectors = await asyncio.gather(*(service.embed_text(text) for text in texts))
+    shape, payload = pack_vectors(vectors)
+    return {"id": request_id, "shape": shape}, payload
+
+
+async def _handle_connection(service: EmbeddingService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Обслуживает одно соединение клиента: запросы обрабатываются по очереди."""
+    try:
+        while True:
+            try:
+                header, _ = await read_frame(reader)
+            except asyncio.IncompleteReadError:
+                break # Клиент закрыл соединение
+            try:
+                response, payload = await _handle_request(service, header)
+            except Exception as e:
+                logger.exception("Ошибка при обработке запроса на векторизацию.")
+                response, payload = {"id": header.get("id"), "error": str(e)}, b""
+            await write_frame(writer, response, payload)
+    except Exception:
+        logger.exception("Соединение с клиентом сервера эмбеддингов прервано.")
+    finally:
+        writer.close()
+
+
+async def serve(socket_path: str | None, host: str, port: int) -> None:
+    service = create_local_embedding_service()
+    warmup_task = asyncio.create_task(service.warmup())
+    handler = partial(_handle_connection, service)
+
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path) # Сокет от предыдущего запуска
+        server = await asyncio.start_unix_server(handler, path=socket_path)
+        os.chmod(socket_path, 0o660)
+        logger.info(f"Сервер эмбеддингов слушает {socket_path}")
+    else:
+        server = await asyncio.start_server(handler, host, port)
+        logger.info(f"Сервер эмбеддингов слушает {host}:{port}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    async with server:
+        await stop.wait()
+    warmup_task.cancel()
+    await service.close()
+    if socket_path and os.path.exists(socket_path):
+        os.unlink(socket_path)
+    logger.info("Сервер эмбеддингов остановлен.")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Сервер эмбеддингов WhereIsMy.")
+    parser.add_argument("--socket", default=settings.embedding_server_socket, help="Путь к Unix-сокету")
+    parser.add_argument("--tcp", action="store_true", help="Слушать TCP вместо Unix-сокета")
+    parser.add_argument("--host", default=settings.embedding_server_host)
+    parser.add_argument("--port", type=int, default=settings.embedding_server_port)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(None if args.tcp else args.socket, args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
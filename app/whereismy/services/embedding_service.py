@@ -1,27 +1,297 @@
 # app/whereismy/services/embedding_service.py
+import asyncio
+import hashlib
 import logging
-from sentence_transformers import SentenceTransformer
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from app.whereismy.config import settings # Предполагаем, что путь к модели будет в настройках
 
 logger = logging.getLogger(__name__)
 
+
+def normalize_text(text: str) -> str:
+    """
+    Приводит текст к каноническому виду для ключа кэша:
+    NFKC, нижний регистр, схлопнутые пробелы.
+    "  Черный   ЗОНТ " и "черный зонт" дают один и тот же ключ.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    return " ".join(text.casefold().split())
+
+
+class _DiskEmbeddingStore:
+    """
+    Персистентный уровень кэша эмбеддингов в файле SQLite.
+    Векторы хранятся как float32-байты. Вытеснение: по TTL и по размеру
+    (удаляются самые старые записи).
+    """
+    _EVICT_EVERY = 1000 # Как часто (в записях) проверять лимиты
+
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_created_at ON embeddings (created_at)")
+        self._lock = threading.Lock()
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._writes = 0
+
+    def get(self, key: str) -> np.ndarray | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector, created_at FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time() - self._ttl:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def set(self, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                (key, vector.astype(np.float32).tobytes(), time.time()),
+            )
+            self._writes += 1
+            if self._writes % self._EVICT_EVERY == 0:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Удаляет просроченные записи и самые старые сверх лимита. Вызывается под блокировкой."""
+        self._conn.execute("DELETE FROM embeddings WHERE created_at < ?", (time.time() - self._ttl,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count > self._max_entries:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY created_at LIMIT ?)",
+                (count - self._max_entries,),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingCache:
+    """
+    Двухуровневый кэш эмбеддингов.
+
+    Первый уровень — ограниченный LRU в памяти процесса, второй — файл SQLite,
+    который переживает перезапуск. Ключ — SHA-256 от имени модели и
+    нормализованного текста, поэтому смена модели не отдаёт чужие векторы.
+    """
+    def __init__(
+        self,
+        model_name: str,
+        max_size: int = 10000,
+        ttl_seconds: int = 30 * 24 * 3600,
+        path: str | None = None,
+        disk_max_entries: int = 500000,
+    ):
+        self.model_name = model_name
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        # Храним float32-массивы, а не списки float: так запись занимает ~1.5 КБ вместо ~12 КБ
+        self._memory: OrderedDict[str, tuple[float, np.ndarray]] = OrderedDict()
+        self._disk = _DiskEmbeddingStore(path, ttl_seconds, disk_max_entries) if path else None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> str:
+        """Ключ кэша для текста."""
+        payload = f"{self.model_name}\x00{normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _memory_get(self, key: str) -> np.ndarray | None:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, vector = entry
+        if expires_at < time.monotonic():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return vector
+
+    def _memory_set(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = (time.monotonic() + self.ttl, vector)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    async def get(self, text: str) -> list[float] | None:
+        """Возвращает закэшированный вектор или None."""
+        key = self.key(text)
+        vector = self._memory_get(key)
+        if vector is not None:
+            self.memory_hits += 1
+            return vector.tolist()
+
+        if self._disk is not None:
+            loop = asyncio.get_running_loop()
+            vector = await loop.run_in_executor(None, self._disk.get, key)
+            if vector is not None:
+                self.disk_hits += 1
+                self._memory_set(key, vector)
+                return vector.tolist()
+
+        self.misses += 1
+        return None
+
+    async def set(self, text: str, vector: list[float]) -> None:
+        """Сохраняет вектор в оба уровня кэша."""
+        key = self.key(text)
+        array = np.asarray(vector, dtype=np.float32)
+        self._memory_set(key, array)
+        if self._disk is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._disk.set, key, array)
+
+    def stats(self) -> dict:
+        """Счётчики попаданий/промахов и размер уровней."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_size": len(self._memory),
+            "disk_size": len(self._disk) if self._disk is not None else 0,
+        }
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+
+
 class EmbeddingService:
     """
     Сервис для генерации эмбеддингов (векторов) из текста.
-    Использует sentence-transformers.
+    Использует sentence-transformers (бэкенд "torch") или ONNX Runtime (бэкенд "onnx").
+
+    В режиме батчинга параллельные вызовы embed_text складываются в общую очередь
+    и векторизуются одним вызовом model.encode(batch) в отдельном потоке,
+    поэтому цикл событий не блокируется, а модель считает сразу несколько текстов.
     """
-    def __init__(self, model_name_or_path: str):
+    def __init__(
+        self,
+        model_name_or_path: str,
+        batching: bool = True,
+        batch_size: int = 32,
+        max_wait_ms: float = 10.0,
+        queue_size: int = 1024,
+        cache: EmbeddingCache | None = None,
+        backend: str = "torch",
+        onnx_path: str | None = None,
+        onnx_quantized: bool = True,
+    ):
         """
-        Инициализирует сервис, загружая модель.
+        Инициализирует сервис. Модель не загружается здесь: это происходит
+        при первой векторизации или в warmup(), поэтому импорт модуля дешёвый.
 
         Args:
             model_name_or_path (str): Путь или имя модели Hugging Face.
+            batching (bool): Собирать ли параллельные запросы в батчи.
+            batch_size (int): Максимальный размер батча.
+            max_wait_ms (float): Сколько миллисекунд ждать добора батча после первого запроса.
+            queue_size (int): Максимальная глубина очереди; при переполнении вызывающие ждут.
+            cache (EmbeddingCache | None): Кэш эмбеддингов; None — без кэширования.
+            backend (str): "torch" — sentence-transformers, "onnx" — ONNX Runtime.
+            onnx_path (str | None): Каталог экспортированной ONNX-модели (для бэкенда "onnx").
+            onnx_quantized (bool): Использовать int8-версию ONNX-модели.
+        """
+        self.model_name_or_path = model_name_or_path
+        self.backend = backend
+        self.onnx_path = onnx_path
+        self.onnx_quantized = onnx_quantized
+        self._model = None
+        self._model_lock = threading.Lock()
+        self.ready = False # Модель загружена и прогрета; используется health-check'ом
+
+        self.batching = batching
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.queue_size = queue_size
+        self.cache = cache
+
+        # Один поток: torch сам распараллеливает вычисления внутри encode,
+        # а несколько одновременных encode только конкурировали бы за ядра.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    @property
+    def model(self):
+        """
+        Модель векторизации; загружается при первом обращении.
+        Обращение происходит в рабочем потоке (_encode), так что цикл событий не блокируется.
         """
-        logger.info(f"Загрузка модели sentence-transformers: {model_name_or_path}")
-        # Загружаем модель. sentence_transformers сама определит, использовать ли CPU или CUDA.
-        # Так как мы установили CPU-only версию PyTorch, она будет использовать CPU.
-        self.model = SentenceTransformer(model_name_or_path)
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
+
+    def _load_model(self):
+        if self.backend == "onnx":
+            # torch при этом не импортируется вовсе
+            from app.whereismy.services.onnx_embedding import OnnxEmbeddingModel
+            logger.info(f"Загрузка ONNX-модели из {self.onnx_path} (int8: {self.onnx_quantized})")
+            model = OnnxEmbeddingModel(self.onnx_path, quantized=self.onnx_quantized)
+        else:
+            from sentence_transformers import SentenceTransformer
+            logger.info(f"Загрузка модели sentence-transformers: {self.model_name_or_path}")
+            # Загружаем модель. sentence_transformers сама определит, использовать ли CPU или CUDA.
+            # Так как мы установили CPU-only версию PyTorch, она будет использовать CPU.
+            model = SentenceTransformer(self.model_name_or_path)
         logger.info("Модель загружена успешно.")
+        return model
+
+    def _warmup(self) -> None:
+        """Загружает модель и выполняет пробную векторизацию (первый encode заметно медленнее)."""
+        self.model.encode(["прогрев"], batch_size=1)
+        self.ready = True # Только после пробного encode: загруженная модель ещё не прогрета
+
+    async def warmup(self) -> None:
+        """
+        Явно загружает и прогревает модель в рабочем потоке.
+        Предназначен для запуска в фоне при старте API и бота; до его завершения ready == False.
+        """
+        if self.ready:
+            return
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self._warmup)
+        except Exception:
+            logger.exception("Не удалось прогреть модель векторизации.")
+            return
+        logger.info(f"Модель векторизации прогрета за {time.monotonic() - started:.1f} с.")
+
+    def _encode(self, texts: list[str]) -> list[list[float]]:
+        """Синхронно векторизует батч текстов (выполняется в рабочем потоке)."""
+        embeddings = self.model.encode(texts, batch_size=len(texts))
+        return embeddings.tolist() # Возвращаем как списки Python для совместимости с JSON/SQLAlchemy
 
     async def embed_text(self, text: str) -> list[float]:
         """
@@ -33,16 +303,179 @@ class EmbeddingService:
         Returns:
             list[float]: Векторное представление текста.
         """
-        # sentence-transformers работает синхронно внутри, но мы оборачиваем в async
-        # на случай, если в будущем понадобится асинхронная загрузка или кэширование.
-        # Для CPU-моделей и небольшого текста задержка минимальна.
+        if self.cache is None:
+            return await self._compute(text)
+
+        cached = await self.cache.get(text)
+        if cached is not None:
+            return cached
+
+        # Одинаковые запросы, пришедшие одновременно, ждут одну и ту же векторизацию
+        key = self.cache.key(text)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        pending = asyncio.get_running_loop().create_future()
+        self._inflight[key] = pending
+        try:
+            embedding = await self._compute(text)
+            await self.cache.set(text, embedding)
+            pending.set_result(embedding)
+            return embedding
+        except BaseException as e:
+            pending.set_exception(e)
+            pending.exception() # Помечаем исключение как полученное, даже если ожидающих нет
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _compute(self, text: str) -> list[float]:
+        """Векторизует текст через очередь батчинга или напрямую в рабочем потоке."""
         logger.debug(f"Векторизация текста: {text[:50]}...") # Логируем начало
-        embedding = self.model.encode(text)
+        loop = asyncio.get_running_loop()
+        if self.batching:
+            future = loop.create_future()
+            await self._get_queue().put((text, future))
+            embedding = await future
+        else:
+            embedding = (await loop.run_in_executor(self._executor, self._encode, [text]))[0]
         logger.debug("Векторизация завершена.")
-        return embedding.tolist() # Возвращаем как список Python для совместимости с JSON/SQLAlchemy
+        return embedding
+
+    async def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        """
+        Векторизует список текстов одним вызовом модели, минуя очередь.
+        Подходит для массовых операций, где батч уже собран вызывающим.
+        Тексты, найденные в кэше, повторно не векторизуются.
+        """
+        if not texts:
+            return []
+        results: list[list[float] | None] = [None] * len(texts)
+        if self.cache is not None:
+            for i, text in enumerate(texts):
+                results[i] = await self.cache.get(text)
+
+        missing = [i for i, vector in enumerate(results) if vector is None]
+        if missing:
+            loop = asyncio.get_running_loop()
+            vectors = await loop.run_in_executor(
+                self._executor, self._encode, [texts[i] for i in missing]
+            )
+            for i, vector in zip(missing, vectors):
+                results[i] = vector
+                if self.cache is not None:
+                    await self.cache.set(texts[i], vector)
+        return results
+
+    def _get_queue(self) -> asyncio.Queue:
+        """Возвращает очередь текущего цикла событий, при необходимости запуская обработчик."""
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._worker = loop.create_task(self._batch_worker(self._queue))
+        return self._queue
+
+    async def _batch_worker(self, queue: asyncio.Queue) -> None:
+        """
+        Забирает запросы из очереди и векторизует их батчами.
+        Батч отправляется, как только набран batch_size или истёк max_wait
+        с момента первого запроса в батче.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.batch_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Запросы, которые уже отменены вызывающей стороной, не считаем
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            logger.debug(f"Векторизация батча из {len(batch)} текстов.")
+            try:
+                vectors = await loop.run_in_executor(
+                    self._executor, self._encode, [text for text, _ in batch]
+                )
+            except Exception as e:
+                logger.exception("Ошибка при векторизации батча.")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+    async def close(self) -> None:
+        """Останавливает обработчик очереди и освобождает рабочий поток."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._queue = None
+        self._executor.shutdown(wait=False)
+        if self.cache is not None:
+            self.cache.close()
+
+
+def create_local_embedding_service() -> EmbeddingService:
+    """Создаёт EmbeddingService с моделью в текущем процессе по настройкам из конфига."""
+    # Векторы ONNX-бэкенда немного отличаются от torch, поэтому бэкенд входит в ключ кэша.
+    cache_model_id = settings.embedding_model_path
+    if settings.embedding_backend == "onnx":
+        cache_model_id += ":onnx-int8" if settings.embedding_onnx_quantized else ":onnx-fp32"
+
+    cache = EmbeddingCache(
+        cache_model_id,
+        max_size=settings.embedding_cache_size,
+        ttl_seconds=settings.embedding_cache_ttl_seconds,
+        path=settings.embedding_cache_path,
+        disk_max_entries=settings.embedding_cache_disk_max_entries,
+    ) if settings.embedding_cache_enabled else None
+
+    return EmbeddingService(
+        settings.embedding_model_path,
+        batching=settings.embedding_batching_enabled,
+        batch_size=settings.embedding_batch_size,
+        max_wait_ms=settings.embedding_batch_max_wait_ms,
+        queue_size=settings.embedding_queue_size,
+        cache=cache,
+        backend=settings.embedding_backend,
+        onnx_path=settings.embedding_onnx_path,
+        onnx_quantized=settings.embedding_onnx_quantized,
+    )
+
 
 # --- Создание глобального экземпляра ---
 # В реальных приложениях часто используют DI-контейнеры (например, FastDepends).
 # Для простоты идем с глобальной инициализацией.
-# Путь к модели берем из конфига.
-embedding_service = EmbeddingService(settings.embedding_model_path)
+# Создание экземпляра дешёвое: модель загружается лениво (см. EmbeddingService.model и warmup).
+# В режиме "remote" модель живёт в отдельном процессе, а здесь — только клиент к нему.
+if settings.embedding_service_mode == "remote":
+    from app.whereismy.services.embedding_client import RemoteEmbeddingService
+    embedding_service = RemoteEmbeddingService(
+        socket_path=settings.embedding_server_socket,
+        host=settings.embedding_server_host,
+        port=settings.embedding_server_port,
+        pool_size=settings.embedding_client_pool_size,
+        timeout=settings.embedding_client_timeout_seconds,
+    )
+else:
+    embedding_service = create_local_embedding_service()
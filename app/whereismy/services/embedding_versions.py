@@ -0,0 +1,103 @@
+# app/whereismy/services/embedding_versions.py
+"""
+Управление версиями векторов в item_embeddings.
+
+Переход на новую модель без простоя поиска:
+    1. Заполнить новую версию в фоне, пока приложение читает старую:
+           EMBEDDING_MODEL_PATH=<модель> EMBEDDING_MODEL_VERSION=v2 EMBEDDING_DIM=<dim> \\
+               python -m app.whereismy.services.backfill_embeddings
+    2. Построить HNSW-индекс новой версии (после заполнения это быстрее, чем вставки в готовый индекс):
+           python -m app.whereismy.services.embedding_versions create-index v2 --dim <dim>
+    3. Переключить embedding_model_path / embedding_model_version / embedding_dim в конфиге
+       и перезапустить процессы. Повторный запуск шага 1 дозаполнит объявления,
+       созданные до переключения.
+    4. Удалить старую версию:
+           python -m app.whereismy.services.embedding_versions drop v1
+
+Состояние версий:
+    python -m app.whereismy.services.embedding_versions status
+"""
+import argparse
+import asyncio
+import logging
+
+from app.whereismy.config import settings
+from app.whereismy.core.database import engine
+from app.whereismy.core.models.item_embedding import (
+    EMBEDDING_STORAGES, embedding_index_ddl, embedding_index_name,
+)
+from app.whereismy.services.unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+
+async def _execute_autocommit(sql: str) -> None:
+    """CREATE/DROP INDEX CONCURRENTLY нельзя выполнять внутри транзакции."""
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.exec_driver_sql(sql)
+
+
+async def create_version_index(model_version: str, dim: int, storage: str = "vector") -> None:
+    """Строит частичный HNSW-индекс версии без блокировки записи в таблицу."""
+    await _execute_autocommit(embedding_index_ddl(model_version, dim, storage))
+    logger.info(f"Индекс {embedding_index_name(model_version, storage)} построен.")
+
+
+async def drop_version(model_version: str, batch_size: int = 10000) -> int:
+    """
+    Удаляет индексы и все векторы версии. Текущую версию чтения удалить нельзя.
+    Возвращает число удалённых векторов.
+    """
+    if model_version == settings.embedding_model_version:
+        raise ValueError(f"Версия {model_version} сейчас используется для чтения (embedding_model_version).")
+    # Сначала индексы: без них удаление строк не тратит время на обслуживание HNSW-графов
+    for storage in EMBEDDING_STORAGES:
+        await _execute_autocommit(
+            f"DROP INDEX CONCURRENTLY IF EXISTS {embedding_index_name(model_version, storage)}"
+        )
+    deleted = 0
+    while True:
+        # Пачка — отдельная единица работы: транзакции короткие
+        async with UnitOfWork() as uow:
+            batch_deleted = await uow.embeddings.delete_version_batch(model_version, batch_size)
+        deleted += batch_deleted
+        if batch_deleted < batch_size:
+            break
+    logger.info(f"Версия {model_version} удалена: {deleted} векторов.")
+    return deleted
+
+
+async def print_status() -> None:
+    async with UnitOfWork() as uow:
+        counts = await uow.embeddings.count_by_version()
+    for version, count in counts.items():
+        marker = " (чтение)" if version == settings.embedding_model_version else ""
+        print(f"{version}: {count}{marker}")
+    if settings.embedding_model_version not in counts:
+        print(f"{settings.embedding_model_version}: 0 (чтение)")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Версии векторов объявлений WhereIsMy.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status", help="Число векторов по версиям")
+    create_index = subparsers.add_parser("create-index", help="Построить HNSW-индекс версии")
+    create_index.add_argument("version")
+    create_index.add_argument("--dim", type=int, default=settings.embedding_dim, help="Размерность векторов версии")
+    create_index.add_argument("--storage", choices=EMBEDDING_STORAGES, default="vector", help="Вариант хранения в индексе")
+    drop = subparsers.add_parser("drop", help="Удалить индексы и векторы версии")
+    drop.add_argument("version")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "status":
+        asyncio.run(print_status())
+    elif args.command == "create-index":
+        asyncio.run(create_version_index(args.version, args.dim, args.storage))
+    else:
+        asyncio.run(drop_version(args.version))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,42 @@
 # app/whereismy/services/items_service.py
+import asyncio
+import datetime
 import logging
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.whereismy.core.repository.item_repository import ItemRepository
+from app.whereismy.config import settings
+from app.whereismy.core.repository.item_embedding_repository import ItemEmbeddingRepository
+from app.whereismy.core.repository.item_match_repository import ItemMatchRepository
+from app.whereismy.core.repository.item_repository import ItemRepository, ItemSearchFilters
 from app.whereismy.core.repository.user_repository import UserRepository # Для проверок
-from app.whereismy.core.models import Item, ItemStatus
+from app.whereismy.core.models import Item, ItemStatus, ItemType
+from app.whereismy.core.vector_index import vector_index, vector_index_enabled
 from app.whereismy.services.embedding_service import embedding_service # Используем глобальный экземпляр
+from app.whereismy.services.matching_service import MatchingService
+from app.whereismy.services.search_cache import invalidate_search_cache, search_cache, search_cache_key
+from app.whereismy.services.unit_of_work import after_commit
 
 logger = logging.getLogger(__name__)
 
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = 60) -> List[int]:
+    """
+    Сливает несколько ранжированных списков ID методом Reciprocal Rank Fusion:
+    score(id) = sum(1 / (k + rank)) по всем спискам, где rank начинается с 1.
+    Не требует сопоставимых оценок (ts_rank и косинусное расстояние несравнимы напрямую).
+    """
+    scores: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda item_id: scores[item_id], reverse=True)
+
+
 class ItemsService:
     """
     Сервис для бизнес-логики, связанной с объявлениями (Item).
+    Транзакцией управляет вызывающий (UnitOfWork): методы сервиса не коммитят, а действия
+    вне БД (индекс в памяти, кэш поиска) откладывают до фиксации через after_commit.
     """
     def __init__(self, item_repo: ItemRepository, user_repo: UserRepository):
         self.item_repo = item_repo
@@ -27,7 +52,6 @@ class ItemsService:
 
         # 2. Создаем объект Item и сохраняем в БД через репозиторий
         new_item = await self.item_repo.create_item_with_vector(
-            session=session,
             title=title,
             description=description,
             category_id=category_id,
@@ -36,33 +60,151 @@ class ItemsService:
             vector=vector
         )
         logger.info(f"Объявление о находке создано с ID {new_item.id}.")
+
+        # 3. После фиксации добавляем в векторный индекс в памяти (если он используется для поиска)
+        # и сбрасываем кэш результатов поиска
+        if vector_index_enabled():
+            after_commit(session, lambda: vector_index.add(new_item.id, vector))
+        after_commit(session, invalidate_search_cache)
+
+        # 4. Сопоставляем находку с активными объявлениями о потере в той же транзакции.
+        # Ошибка сопоставления не должна откатывать объявление, поэтому — в точке сохранения.
+        if settings.matching_enabled:
+            try:
+                async with session.begin_nested():
+                    matching = MatchingService(self.item_repo, ItemMatchRepository(session))
+                    await matching.match_found_item(new_item, vector)
+            except Exception:
+                logger.exception(f"Не удалось сопоставить находку {new_item.id} с потерями.")
         return new_item
 
-    async def find_similar_found_items(self, session: AsyncSession, query_description: str, limit: int = 5) -> List[Item]:
+    async def find_similar_found_items(
+        self,
+        session: AsyncSession,
+        query_description: str,
+        limit: int = 5,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        filters: Optional[ItemSearchFilters] = None,
+        load_relations: Sequence[str] = (),
+    ) -> List[Item]:
         """
         Находит объявления о находке, похожие на заданное описание (семантический поиск).
+        ef_search/probes позволяют для отдельного запроса выбрать баланс полноты и скорости ANN-поиска.
+        filters сужают поиск (категория, корпус, тип, статус, период) в том же SQL-запросе;
+        по умолчанию — все активные находки.
+        load_relations — связи (author, category, location), загружаемые вместе с объявлениями,
+        чтобы после закрытия сессии к ним можно было обращаться без ленивых запросов.
+
+        Ранжирование (ID и близость) кэшируется по вектору запроса и параметрам поиска
+        до следующего изменения объявлений (см. search_cache).
         """
         logger.info(f"Поиск похожих объявлений для описания: {query_description[:50]}...")
         # 1. Векторизуем поисковый запрос
         query_vector = await embedding_service.embed_text(query_description)
 
-        # 2. Ищем похожие объявления в БД через репозиторий
-        # Пока ищем только среди активных объявлений о находке
-        similar_items = await self.item_repo.find_similar_items(
-            session=session,
-            query_vector=query_vector,
-            limit=limit
+        # 2. Берём ранжирование из кэша или ищем в БД через репозиторий
+        scored = await self._find_similar_scores(query_vector, limit, ef_search, probes, filters)
+
+        # 3. Загружаем сами объявления по первичному ключу (уже не проходящие фильтры отсеиваются)
+        similar_items = await self.item_repo.get_by_ids_in_order(
+            [item_id for item_id, _ in scored], filters, load_relations=load_relations
         )
         logger.info(f"Найдено {len(similar_items)} похожих объявлений.")
         return similar_items
 
+    async def _find_similar_scores(
+        self,
+        query_vector: List[float],
+        limit: int,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        filters: Optional[ItemSearchFilters] = None,
+        item_repo: Optional[ItemRepository] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Семантическое ранжирование (item_id, score) через кэш результатов поиска.
+        item_repo — репозиторий другой сессии (по умолчанию self.item_repo).
+        """
+        filters = filters or ItemSearchFilters()
+        item_repo = item_repo or self.item_repo
+        if search_cache is None:
+            return await item_repo.find_similar_item_scores(
+                query_vector, limit=limit, ef_search=ef_search, probes=probes, filters=filters
+            )
+        cache_key = search_cache_key(
+            query_vector,
+            limit=limit,
+            ef_search=ef_search,
+            probes=probes,
+            version=settings.embedding_model_version,
+            filters=filters.cache_params(),
+        )
+        generation = await search_cache.generation() # До запроса к БД, см. search_cache
+        scored = await search_cache.get(generation, cache_key)
+        if scored is None:
+            scored = await item_repo.find_similar_item_scores(
+                query_vector, limit=limit, ef_search=ef_search, probes=probes, filters=filters
+            )
+            await search_cache.set(generation, cache_key, scored)
+        return scored
+
+    async def hybrid_search_found_items(
+        self,
+        session: AsyncSession,
+        query_text: str,
+        limit: int = 5,
+        filters: Optional[ItemSearchFilters] = None,
+        load_relations: Sequence[str] = (),
+    ) -> List[Item]:
+        """
+        Гибридный поиск по активным находкам: полнотекстовый (точные слова, номера, имена,
+        морфология) и семантический, слитые через Reciprocal Rank Fusion.
+        Оба запроса учитывают filters, load_relations — см. find_similar_found_items.
+
+        Полнотекстовый запрос выполняется в session, а векторизация запроса (в отдельном потоке)
+        и затем векторный запрос — одновременно с ним, во второй сессии того же сервера
+        (основного или реплики): в одной сессии запросы к БД идут только по очереди.
+        """
+        logger.info(f"Гибридный поиск для запроса: {query_text[:50]}...")
+        candidates = max(limit, settings.hybrid_search_candidates)
+
+        semantic_task = asyncio.create_task(self._semantic_search_ids(session, query_text, candidates, filters))
+        try:
+            lexical_ids = await self.item_repo.find_ids_by_fulltext(query_text, limit=candidates, filters=filters)
+            semantic_ids = await semantic_task
+        finally:
+            semantic_task.cancel() # Не оставляем задачу висеть, если полнотекстовый запрос упал
+
+        fused_ids = reciprocal_rank_fusion(
+            [lexical_ids, semantic_ids], k=settings.hybrid_search_rrf_k
+        )[:limit]
+        items = await self.item_repo.get_by_ids_in_order(fused_ids, filters, load_relations=load_relations)
+        logger.info(
+            f"Гибридный поиск: {len(lexical_ids)} полнотекстовых, {len(semantic_ids)} семантических "
+            f"кандидатов, выдано {len(items)}."
+        )
+        return items
+
+    async def _semantic_search_ids(
+        self, session: AsyncSession, query_text: str, limit: int, filters: Optional[ItemSearchFilters]
+    ) -> List[int]:
+        """Семантические кандидаты гибридного поиска; запрос к БД — в отдельной сессии."""
+        query_vector = await embedding_service.embed_text(query_text)
+        # Соединение берётся из пула только при запросе: при попадании в кэш поиска оно не нужно
+        async with AsyncSession(session.bind, expire_on_commit=False) as semantic_session:
+            scored = await self._find_similar_scores(
+                query_vector, limit, filters=filters, item_repo=ItemRepository(semantic_session)
+            )
+        return [item_id for item_id, _ in scored]
+
     async def archive_item(self, session: AsyncSession, item_id: int, user_id: int) -> bool:
         """
         Архивирует объявление, если оно принадлежит указанному пользователю.
         """
         logger.info(f"Попытка архивации объявления {item_id} пользователем {user_id}.")
         # 1. Получаем объявление
-        item = await self.item_repo.get(session, item_id)
+        item = await self.item_repo.get(item_id)
         if not item:
             logger.warning(f"Объявление {item_id} не найдено.")
             return False
@@ -79,19 +221,109 @@ class ItemsService:
 
         # 4. Обновляем статус
         item.status = ItemStatus.ARCHIVED
-        updated_item = await self.item_repo.update(session, item, item) # Обновляем самим собой
+        updated_item = await self.item_repo.update(item, item) # Обновляем самим собой
+        self._forget_items_after_commit(session, [item_id])
         logger.info(f"Объявление {item_id} архивировано пользователем {user_id}.")
         return True
 
-    async def get_user_items(self, session: AsyncSession, user_id: int) -> List[Item]:
+    async def update_item(
+        self,
+        session: AsyncSession,
+        item: Item,
+        description: str,
+        category_id: int,
+        location_id: Optional[int],
+        status: ItemStatus,
+    ) -> Item:
         """
-        Получает список объявлений пользователя.
+        Редактирование объявления (модератором). Изменённое описание векторизуется заново
+        и записывается как вектор текущей версии модели; после фиксации индекс в памяти
+        и кэш поиска приводятся в соответствие с новым описанием и статусом.
         """
-        # Это можно сделать через репозиторий, добавив метод, или через ORM напрямую в сервисе.
-        # Пока добавим простой метод в репозиторий ItemRepository.
-        # Но для примера, сделаем запрос здесь.
-        from sqlalchemy import select
-        stmt = select(Item).where(Item.author_id == user_id).where(Item.status != ItemStatus.ARCHIVED)
-        result = await session.execute(stmt)
-        items = result.scalars().all()
-        return items
+        description_changed = description != item.description
+        was_searchable = item.type == ItemType.FOUND and item.status == ItemStatus.ACTIVE
+        searchable = item.type == ItemType.FOUND and status == ItemStatus.ACTIVE
+        # Вектор нужен для новой версии описания, а индексу в памяти — и при возврате находки из архива
+        vector = None
+        if description and (description_changed or (searchable and not was_searchable and vector_index_enabled())):
+            vector = await embedding_service.embed_text(description)
+
+        if status != item.status:
+            item.archived_at = datetime.datetime.utcnow() if status == ItemStatus.ARCHIVED else None
+        item.description = description
+        item.category_id = category_id
+        item.location_id = location_id
+        item.status = status
+        item = await self.item_repo.update(item, item) # Обновляем самим собой
+        if vector is not None and description_changed:
+            await ItemEmbeddingRepository(session).bulk_upsert([(item.id, vector)], settings.embedding_model_version)
+
+        if vector_index_enabled():
+            item_id = item.id
+            if searchable and vector is not None:
+                after_commit(session, lambda: vector_index.add(item_id, vector))
+            elif not searchable:
+                after_commit(session, lambda: vector_index.remove(item_id))
+        after_commit(session, invalidate_search_cache) # Статус и описание влияют на выдачу поиска
+        logger.info(f"Объявление {item.id} отредактировано.")
+        return item
+
+    async def archive_items(self, session: AsyncSession, item_ids: Sequence[int]) -> List[int]:
+        """
+        Архивирует объявления одним UPDATE (для модератора). Уже архивированные пропускаются.
+        Возвращает ID архивированных объявлений.
+        """
+        if not item_ids:
+            return []
+        archived_ids = await self.item_repo.update_where(
+            [Item.id.in_(item_ids), Item.status != ItemStatus.ARCHIVED],
+            {"status": ItemStatus.ARCHIVED, "archived_at": datetime.datetime.utcnow()},
+        )
+        self._forget_items_after_commit(session, archived_ids)
+        logger.info(f"Архивировано объявлений: {len(archived_ids)}.")
+        return archived_ids
+
+    async def archive_stale_batch(
+        self, session: AsyncSession, category_id: int, created_before: datetime.datetime, batch_size: int
+    ) -> List[int]:
+        """
+        Архивирует порцию старых активных объявлений категории (см. archival_service).
+        Возвращает ID архивированных объявлений.
+        """
+        archived_ids = await self.item_repo.archive_stale_batch(
+            category_id, created_before, archived_at=datetime.datetime.utcnow(), limit=batch_size
+        )
+        self._forget_items_after_commit(session, archived_ids)
+        return archived_ids
+
+    async def delete_items(self, session: AsyncSession, item_ids: Sequence[int]) -> List[int]:
+        """
+        Удаляет объявления одним DELETE (векторы и совпадения удаляются каскадом).
+        Возвращает ID удалённых объявлений.
+        """
+        if not item_ids:
+            return []
+        deleted_ids = await self.item_repo.delete_where([Item.id.in_(item_ids)])
+        self._forget_items_after_commit(session, deleted_ids)
+        logger.info(f"Удалено объявлений: {len(deleted_ids)}.")
+        return deleted_ids
+
+    @staticmethod
+    def _forget_items_after_commit(session: AsyncSession, item_ids: Sequence[int]) -> None:
+        """После фиксации убирает объявления из поисковой выдачи: индекс в памяти и кэш результатов."""
+        if not item_ids:
+            return
+        if vector_index_enabled():
+            def remove_from_index() -> None:
+                for item_id in item_ids:
+                    vector_index.remove(item_id)
+            after_commit(session, remove_from_index)
+        after_commit(session, invalidate_search_cache)
+
+    async def get_user_items(
+        self, session: AsyncSession, user_id: int, load_relations: Sequence[str] = ()
+    ) -> List[Item]:
+        """
+        Получает список объявлений пользователя. load_relations — см. find_similar_found_items.
+        """
+        return await self.item_repo.get_user_items(user_id, load_relations=load_relations)
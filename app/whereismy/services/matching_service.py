@@ -0,0 +1,149 @@
+# app/whereismy/services/matching_service.py
+"""
+Сопоставление объявлений о потере (LOST) с находками (FOUND).
+
+Для новой находки (ItemsService.create_found_item) все активные LOST-векторы
+сравниваются с её вектором одним запросом INSERT ... SELECT в БД.
+
+Массовое пересопоставление (например, после смены модели или порога) считает
+матрицу близостей LOST x FOUND произведением нормированных матриц, плитками
+block_size x block_size, чтобы память не росла с размером таблицы:
+    python -m app.whereismy.services.matching_service rematch
+"""
+import argparse
+import asyncio
+import logging
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.whereismy.config import settings
+from app.whereismy.core.models import Item, ItemMatch, ItemType
+from app.whereismy.core.repository.item_match_repository import ItemMatchRepository
+from app.whereismy.core.repository.item_repository import ItemRepository
+from app.whereismy.services.unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+
+class _VectorMatrix:
+    """ID, авторы и нормированные векторы объявлений одного типа."""
+    def __init__(self, ids: np.ndarray, author_ids: np.ndarray, matrix: np.ndarray):
+        self.ids = ids
+        self.author_ids = author_ids
+        self.matrix = matrix
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def score_matches(
+    lost: _VectorMatrix,
+    found: _VectorMatrix,
+    min_similarity: float,
+    block_size: int = 1024,
+) -> Iterator[Tuple[int, int, float]]:
+    """
+    Перебирает пары (lost_item_id, found_item_id, score) с близостью не ниже порога.
+    Близость считается произведением матриц по плиткам, пары одного автора пропускаются.
+    """
+    for lost_start in range(0, len(lost), block_size):
+        lost_block = slice(lost_start, lost_start + block_size)
+        for found_start in range(0, len(found), block_size):
+            found_block = slice(found_start, found_start + block_size)
+            scores = lost.matrix[lost_block] @ found.matrix[found_block].T
+            mask = scores >= min_similarity
+            mask &= lost.author_ids[lost_block, None] != found.author_ids[None, found_block]
+            rows, cols = np.nonzero(mask)
+            for row, col in zip(rows, cols):
+                yield (
+                    int(lost.ids[lost_start + row]),
+                    int(found.ids[found_start + col]),
+                    float(scores[row, col]),
+                )
+
+
+class MatchingService:
+    """
+    Сервис сопоставления LOST -> FOUND. Результат — записи ItemMatch без дублей.
+    """
+    def __init__(self, item_repo: ItemRepository, match_repo: ItemMatchRepository, min_similarity: Optional[float] = None):
+        self.item_repo = item_repo
+        self.match_repo = match_repo
+        self.min_similarity = min_similarity if min_similarity is not None else settings.matching_min_similarity
+
+    async def match_found_item(self, item: Item, vector: List[float]) -> List[ItemMatch]:
+        """Находит активные объявления о потере, похожие на новую находку, и сохраняет совпадения."""
+        matches = await self.match_repo.match_found_item(
+            found_item_id=item.id,
+            found_author_id=item.author_id,
+            vector=vector,
+            min_similarity=self.min_similarity,
+        )
+        logger.info(f"Находка {item.id}: новых совпадений с потерями — {len(matches)}.")
+        return matches
+
+    async def _load_matrix(self, item_type: ItemType) -> _VectorMatrix:
+        ids, author_ids, vectors = [], [], []
+        async for partition in self.item_repo.stream_active_vectors(item_type):
+            for row in partition:
+                ids.append(row.id)
+                author_ids.append(row.author_id)
+                vectors.append(row.vector)
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return _VectorMatrix(
+            np.asarray(ids, dtype=np.int64), np.asarray(author_ids, dtype=np.int64), matrix / norms
+        )
+
+    async def rematch_all(self, block_size: Optional[int] = None) -> int:
+        """
+        Пересопоставляет все активные потери со всеми активными находками.
+        Возвращает число новых совпадений (существующие пары не дублируются).
+        """
+        block_size = block_size or settings.matching_block_size
+        lost = await self._load_matrix(ItemType.LOST)
+        found = await self._load_matrix(ItemType.FOUND)
+        if not len(lost) or not len(found):
+            logger.info("Пересопоставление: нет активных потерь или находок.")
+            return 0
+        inserted = await self.match_repo.insert_matches(
+            score_matches(lost, found, self.min_similarity, block_size)
+        )
+        logger.info(
+            f"Пересопоставление {len(lost)} потерь x {len(found)} находок: новых совпадений — {inserted}."
+        )
+        return inserted
+
+
+async def run_rematch() -> int:
+    """Пересопоставление в отдельной единице работы (для фоновой задачи и CLI)."""
+    async with UnitOfWork() as uow:
+        return await MatchingService(uow.items, uow.matches).rematch_all()
+
+
+async def rematch_periodically(interval: Optional[int] = None) -> None:
+    """Периодическое массовое пересопоставление (выключено при интервале 0)."""
+    interval = interval if interval is not None else settings.matching_rematch_interval_seconds
+    if not settings.matching_enabled or interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_rematch()
+        except Exception:
+            logger.exception("Не удалось выполнить пересопоставление потерь и находок.")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Сопоставление потерь и находок WhereIsMy.")
+    parser.add_argument("command", choices=["rematch"])
+    parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_rematch())
+
+
+if __name__ == "__main__":
+    main()
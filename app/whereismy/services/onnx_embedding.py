@@ -0,0 +1,276 @@
+# app/whereismy/services/onnx_embedding.py
+"""
+Бэкенд векторизации на ONNX Runtime для модели sentence-transformers.
+
+Экспорт (нужен torch и sentence-transformers, выполняется один раз):
+    python -m app.whereismy.services.onnx_embedding export --output models/onnx
+Сохраняются fp32- и int8-версии модели; --no-quantize — только fp32.
+
+Сверка с torch-бэкендом и сравнение задержек:
+    python -m app.whereismy.services.onnx_embedding check --output models/onnx
+
+Допуски (косинусная близость к вектору torch-бэкенда на каждом тексте):
+    fp32 ONNX  — не ниже 0.9999 (отличия только в порядке операций с плавающей точкой);
+    int8 ONNX  — не ниже 0.98 (динамическое квантование весов линейных слоёв).
+При таких отклонениях уже сохранённые items.vector остаются пригодными для поиска:
+ранжирование по косинусному расстоянию практически не меняется.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FP32_FILENAME = "model.onnx"
+INT8_FILENAME = "model_int8.onnx"
+CONFIG_FILENAME = "embedding_config.json"
+
+# Минимально допустимая косинусная близость к torch-бэкенду (см. докстринг модуля)
+FP32_MIN_COSINE = 0.9999
+INT8_MIN_COSINE = 0.98
+
+
+class OnnxEmbeddingModel:
+    """
+    Модель эмбеддингов на ONNX Runtime.
+
+    Повторяет конвейер sentence-transformers (токенизатор -> трансформер -> mean pooling),
+    при этом mean pooling встроен в ONNX-граф. Метод encode совместим по смыслу
+    с SentenceTransformer.encode, поэтому EmbeddingService использует обе модели одинаково.
+    torch во время работы не нужен.
+    """
+    def __init__(self, model_dir: str, quantized: bool = True, intra_op_threads: int | None = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, CONFIG_FILENAME), encoding="utf-8") as f:
+            self.config = json.load(f)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(
+            pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"]
+        )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        filename = INT8_FILENAME if quantized else FP32_FILENAME
+        self.model_path = os.path.join(model_dir, filename)
+        self.session = ort.InferenceSession(
+            self.model_path, options, providers=["CPUExecutionProvider"]
+        )
+        logger.info(f"ONNX-модель загружена: {self.model_path}")
+
+    def encode(self, sentences, batch_size: int = 32) -> np.ndarray:
+        """
+        Векторизует строку или список строк.
+        Возвращает массив (dim,) для строки и (n, dim) для списка.
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.config["dim"]), dtype=np.float32)
+
+        # Сортируем по длине, чтобы в батче было меньше паддинга, затем восстанавливаем порядок
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        result = np.empty((len(texts), self.config["dim"]), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            chunk = order[start:start + batch_size]
+            encodings = self.tokenizer.encode_batch([texts[i] for i in chunk])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            (embeddings,) = self.session.run(
+                ["sentence_embedding"],
+                {"input_ids": input_ids, "attention_mask": attention_mask},
+            )
+            result[chunk] = embeddings
+        return result[0] if single else result
+
+
+def _is_mean_pooling(pooling) -> bool:
+    """Проверяет, что модуль Pooling делает mean pooling (учитывает разные версии sentence-transformers)."""
+    config = pooling.get_config_dict()
+    if "pooling_mode" in config:
+        return config["pooling_mode"] == "mean"
+    modes = [key for key, value in config.items() if key.startswith("pooling_mode_") and value is True]
+    return modes == ["pooling_mode_mean_tokens"]
+
+
+def export_onnx_model(model_name_or_path: str, output_dir: str, quantize: bool = True, opset: int = 14) -> None:
+    """
+    Экспортирует модель sentence-transformers в ONNX (fp32) и, опционально,
+    квантует её динамически в int8.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(output_dir, exist_ok=True)
+    st_model = SentenceTransformer(model_name_or_path, device="cpu")
+    st_model.eval()
+
+    if len(st_model) != 2 or not _is_mean_pooling(st_model[1]):
+        raise ValueError(
+            "Экспорт поддерживает только конвейер Transformer + mean Pooling, "
+            f"а у модели {model_name_or_path}: {[type(m).__name__ for m in st_model]}"
+        )
+
+    transformer = st_model[0].auto_model
+
+    class _MeanPooledTransformer(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, input_ids, attention_mask):
+            token_embeddings = self.transformer(
+                input_ids=input_ids, attention_mask=attention_mask
+            ).last_hidden_state
+            mask = attention_mask.unsqueeze(-1).to(token_embeddings.dtype)
+            return (token_embeddings * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+
+    sample = st_model.tokenizer(["пример текста"], return_tensors="pt")
+    fp32_path = os.path.join(output_dir, FP32_FILENAME)
+    with torch.no_grad():
+        torch.onnx.export(
+            _MeanPooledTransformer(),
+            (sample["input_ids"], sample["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["sentence_embedding"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "sentence_embedding": {0: "batch"},
+            },
+            opset_version=opset,
+        )
+    logger.info(f"fp32 ONNX-модель сохранена: {fp32_path}")
+
+    st_model.tokenizer.save_pretrained(output_dir)
+    config = {
+        "source_model": model_name_or_path,
+        "dim": st_model.get_sentence_embedding_dimension(),
+        "max_seq_length": st_model.max_seq_length,
+        "pad_token": st_model.tokenizer.pad_token,
+        "pad_token_id": st_model.tokenizer.pad_token_id,
+    }
+    with open(os.path.join(output_dir, CONFIG_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        int8_path = os.path.join(output_dir, INT8_FILENAME)
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        logger.info(f"int8 ONNX-модель сохранена: {int8_path}")
+
+
+# Тексты для сверки: типичные запросы и описания находок
+_CHECK_TEXTS = [
+    "черный зонт с деревянной ручкой",
+    "ключи",
+    "студенческий билет на имя Иванова",
+    "связка ключей с брелоком в виде медведя",
+    "синий рюкзак, внутри тетради по матанализу",
+    "наушники AirPods в белом кейсе",
+    "паспорт",
+    "забыл ноутбук Lenovo в аудитории 305",
+    "кошелёк коричневый кожаный",
+    "black umbrella",
+    "серебряное кольцо",
+    "зарядка для телефона type-c, оставил на вахте корпуса 3",
+]
+
+
+def _latency_ms(encode, texts: list[str], repeats: int) -> dict:
+    encode(texts[:1]) # Прогрев
+    single = []
+    for _ in range(repeats):
+        for text in texts:
+            started = time.perf_counter()
+            encode([text])
+            single.append((time.perf_counter() - started) * 1000)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        encode(texts)
+    batch = (time.perf_counter() - started) * 1000 / repeats
+    return {
+        "single_p50_ms": round(statistics.median(single), 3),
+        "single_p95_ms": round(np.percentile(single, 95), 3),
+        f"batch{len(texts)}_ms": round(batch, 3),
+    }
+
+
+def check_parity(model_name_or_path: str, model_dir: str, repeats: int = 10) -> bool:
+    """
+    Сравнивает векторы ONNX (fp32 и int8, если есть) с torch-бэкендом
+    и измеряет задержку. Возвращает True, если все допуски выполнены.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    reference_model = SentenceTransformer(model_name_or_path, device="cpu")
+    reference = reference_model.encode(_CHECK_TEXTS, show_progress_bar=False)
+    encode_torch = lambda texts: reference_model.encode(texts, show_progress_bar=False)
+    report = {"torch": _latency_ms(encode_torch, _CHECK_TEXTS, repeats)}
+
+    checked = 0
+    passed = True
+    for quantized, filename, min_cosine in (
+        (False, FP32_FILENAME, FP32_MIN_COSINE),
+        (True, INT8_FILENAME, INT8_MIN_COSINE),
+    ):
+        if not os.path.exists(os.path.join(model_dir, filename)):
+            continue
+        model = OnnxEmbeddingModel(model_dir, quantized=quantized)
+        vectors = model.encode(_CHECK_TEXTS)
+        cosines = np.sum(vectors * reference, axis=1) / (
+            np.linalg.norm(vectors, axis=1) * np.linalg.norm(reference, axis=1)
+        )
+        checked += 1
+        name = "onnx_int8" if quantized else "onnx_fp32"
+        report[name] = {
+            "min_cosine": round(float(cosines.min()), 6),
+            "mean_cosine": round(float(cosines.mean()), 6),
+            "max_abs_diff": round(float(np.abs(vectors - reference).max()), 6),
+            "tolerance": min_cosine,
+            **_latency_ms(model.encode, _CHECK_TEXTS, repeats),
+        }
+        passed = passed and float(cosines.min()) >= min_cosine
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if not checked:
+        logger.error(f"В {model_dir} нет ONNX-моделей, сначала выполните export.")
+        return False
+    return passed
+
+
+def main(argv: list[str] | None = None) -> int:
+    from app.whereismy.config import settings
+
+    parser = argparse.ArgumentParser(description="Экспорт и проверка ONNX-бэкенда эмбеддингов.")
+    parser.add_argument("command", choices=["export", "check"])
+    parser.add_argument("--model", default=settings.embedding_model_path, help="Модель sentence-transformers")
+    parser.add_argument("--output", default=settings.embedding_onnx_path, help="Каталог ONNX-модели")
+    parser.add_argument(
+        "--no-quantize", dest="quantize", action="store_false",
+        help="Не сохранять int8-версию (тогда нужен EMBEDDING_ONNX_QUANTIZED=false)",
+    )
+    parser.add_argument("--repeats", type=int, default=10, help="Повторов при замере задержки")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "export":
+        export_onnx_model(args.model, args.output, quantize=args.quantize)
+        return 0
+    return 0 if check_parity(args.model, args.output, repeats=args.repeats) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
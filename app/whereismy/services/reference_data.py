@@ -0,0 +1,117 @@
+# app/whereismy/services/reference_data.py
+"""
+Кэш справочников (категории и корпуса) в памяти процесса.
+
+Справочники читаются в каждом диалоге /find (клавиатуры выбора), в форме редактирования
+объявления в админке и в /api/v1/categories, /api/v1/locations, а меняются раз в месяц.
+Снимок загружается при старте процесса и при первом обращении после сброса; производные
+значения (например, готовые inline-клавиатуры бота, см. bot/keyboards.py) строятся
+один раз на снимок.
+
+Сброс:
+    в своём процессе — after_commit в роутах админки, меняющих справочники;
+    в остальных      — Postgres NOTIFY на канал reference_data_changed. NOTIFY отправляется
+                       в транзакции изменения и доставляется только после COMMIT. Каждый
+                       процесс (воркеры uvicorn, бот) слушает канал через core/pg_listener.py.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.whereismy.core.models import Category, Location
+from app.whereismy.core.pg_listener import notify, pg_listener
+from app.whereismy.services.unit_of_work import UnitOfWork, after_commit
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "reference_data_changed"
+
+
+@dataclass
+class ReferenceData:
+    """Снимок справочников. Объекты отсоединены от сессии: менять их нельзя."""
+    categories: Sequence[Category]
+    locations: Sequence[Location]
+    categories_by_id: Dict[int, Category] = field(init=False)
+    locations_by_id: Dict[int, Location] = field(init=False)
+    derived: Dict[str, Any] = field(default_factory=dict) # Значения, построенные по этому снимку
+
+    def __post_init__(self):
+        self.categories_by_id = {category.id: category for category in self.categories}
+        self.locations_by_id = {location.id: location for location in self.locations}
+
+
+class ReferenceDataCache:
+    """Снимок справочников с ленивой загрузкой и сбросом."""
+    def __init__(self):
+        self._data: Optional[ReferenceData] = None
+        self._generation = 0 # Увеличивается при сбросе: загрузка, начатая до сброса, не сохраняется
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> ReferenceData:
+        data = self._data
+        if data is not None:
+            return data
+        async with self._lock:
+            if self._data is None:
+                generation = self._generation
+                data = await self._load()
+                if generation == self._generation:
+                    self._data = data
+                return data
+            return self._data
+
+    @staticmethod
+    async def _load() -> ReferenceData:
+        # Основной сервер, а не реплика: сразу после сброса реплика может вернуть старые данные,
+        # и они остались бы в кэше до следующего изменения справочников
+        async with UnitOfWork() as uow:
+            categories = await uow.session.scalars(select(Category).order_by(Category.id))
+            locations = await uow.session.scalars(select(Location).order_by(Location.id))
+            return ReferenceData(categories=categories.all(), locations=locations.all())
+
+    async def load(self) -> None:
+        """Предзагрузка при старте процесса."""
+        self.invalidate()
+        await self.get()
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._data = None
+
+    async def categories(self) -> Sequence[Category]:
+        return (await self.get()).categories
+
+    async def locations(self) -> Sequence[Location]:
+        return (await self.get()).locations
+
+    async def get_category(self, category_id: int) -> Optional[Category]:
+        return (await self.get()).categories_by_id.get(category_id)
+
+    async def get_location(self, location_id: int) -> Optional[Location]:
+        return (await self.get()).locations_by_id.get(location_id)
+
+    async def derived(self, name: str, build: Callable[[ReferenceData], Any]) -> Any:
+        """Значение, вычисляемое из снимка один раз (до следующего сброса)."""
+        data = await self.get()
+        if name not in data.derived:
+            data.derived[name] = build(data)
+        return data.derived[name]
+
+
+# --- Глобальный экземпляр кэша для процесса ---
+reference_data = ReferenceDataCache()
+pg_listener.subscribe(NOTIFY_CHANNEL, reference_data.invalidate)
+
+
+async def notify_reference_data_changed(session: AsyncSession) -> None:
+    """
+    Сбрасывает кэш справочников после COMMIT текущей транзакции: в своём процессе —
+    через after_commit, в остальных — через NOTIFY (доставляется только при COMMIT).
+    """
+    await notify(NOTIFY_CHANNEL, session)
+    after_commit(session, reference_data.invalidate)
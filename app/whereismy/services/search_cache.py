@@ -0,0 +1,188 @@
+# app/whereismy/services/search_cache.py
+"""
+Кэш результатов семантического поиска (ItemsService.find_similar_found_items).
+
+Ключ — хэш вектора запроса и параметров поиска, значение — список (item_id, score).
+Каждая запись принадлежит «поколению»: любое изменение объявлений (создание, архивация,
+редактирование, удаление) увеличивает счётчик поколения, и записи прошлых поколений
+больше не читаются. Поколение читается до запроса к БД, поэтому результат, посчитанный
+во время изменения, сохраняется под старым поколением и не будет выдан.
+
+Бэкенды:
+    memory — LRU в памяти каждого процесса. Увеличение поколения рассылается остальным
+             процессам (бот, другие воркеры) через Postgres NOTIFY на канал
+             search_cache_changed (см. core/pg_listener.py), и они сбрасывают свои записи.
+    redis  — общий кэш и общий счётчик поколения для всех процессов (pip install .[redis]).
+TTL записей — только страховка на случай потерянного уведомления или сбоя Redis,
+а не способ сброса кэша.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.whereismy.config import settings
+from app.whereismy.core.pg_listener import notify, pg_listener
+
+logger = logging.getLogger(__name__)
+
+ScoredIds = List[Tuple[int, float]]
+
+
+def search_cache_key(query_vector, **params) -> str:
+    """SHA-256 от float32-байтов вектора запроса и параметров поиска (фильтры, limit, ef_search...)."""
+    digest = hashlib.sha256(np.asarray(query_vector, dtype=np.float32).tobytes())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class InMemorySearchCache:
+    """Кэш результатов поиска в памяти процесса (LRU + TTL)."""
+    def __init__(self, max_size: int = 2048, ttl_seconds: int = 300):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._generation = 0
+        self._entries: OrderedDict[str, tuple[float, ScoredIds]] = OrderedDict()
+
+    async def generation(self) -> int:
+        return self._generation
+
+    async def get(self, generation: int, key: str) -> Optional[ScoredIds]:
+        if generation != self._generation:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, generation: int, key: str, value: ScoredIds) -> None:
+        if generation != self._generation:
+            return # Пока шёл запрос, объявления изменились: результат мог устареть
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def bump(self) -> None:
+        self._generation += 1
+        self._entries.clear() # Записи старых поколений уже не будут прочитаны
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisSearchCache:
+    """
+    Общий кэш результатов поиска в Redis. Поколение — счётчик в отдельном ключе,
+    записи хранятся под ключами с номером поколения и истекают по TTL.
+    Ошибки Redis не ломают поиск: чтение считается промахом, запись пропускается.
+    """
+    def __init__(self, url: str, ttl_seconds: int = 300, prefix: str = "whereismy:search"):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self._generation_key = f"{prefix}:generation"
+
+    def _entry_key(self, generation: int, key: str) -> str:
+        return f"{self.prefix}:{generation}:{key}"
+
+    async def generation(self) -> int:
+        try:
+            value = await self._redis.get(self._generation_key)
+        except Exception:
+            logger.exception("Не удалось прочитать поколение кэша поиска из Redis.")
+            return -1 # Записи с этим поколением не сохраняются и не читаются
+        return int(value) if value is not None else 0
+
+    async def get(self, generation: int, key: str) -> Optional[ScoredIds]:
+        if generation < 0:
+            return None
+        try:
+            raw = await self._redis.get(self._entry_key(generation, key))
+        except Exception:
+            logger.exception("Не удалось прочитать кэш поиска из Redis.")
+            return None
+        if raw is None:
+            return None
+        return [(int(item_id), float(score)) for item_id, score in json.loads(raw)]
+
+    async def set(self, generation: int, key: str, value: ScoredIds) -> None:
+        if generation < 0:
+            return
+        try:
+            await self._redis.set(
+                self._entry_key(generation, key), json.dumps(value), ex=self.ttl_seconds
+            )
+        except Exception:
+            logger.exception("Не удалось записать кэш поиска в Redis.")
+
+    async def bump(self) -> None:
+        await self._redis.incr(self._generation_key)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def create_search_cache():
+    """Создаёт кэш результатов поиска по настройкам; None — кэш выключен."""
+    if settings.search_cache_backend == "redis":
+        return RedisSearchCache(settings.search_cache_redis_url, ttl_seconds=settings.search_cache_ttl_seconds)
+    if settings.search_cache_backend == "memory":
+        return InMemorySearchCache(settings.search_cache_size, ttl_seconds=settings.search_cache_ttl_seconds)
+    return None
+
+
+# --- Глобальный экземпляр кэша для процесса ---
+search_cache = create_search_cache()
+
+NOTIFY_CHANNEL = "search_cache_changed"
+if isinstance(search_cache, InMemorySearchCache):
+    # Изменения объявлений в других процессах сбрасывают и кэш этого процесса
+    pg_listener.subscribe(NOTIFY_CHANNEL, search_cache.bump)
+
+
+_delayed_bumps: set[asyncio.Task] = set() # Ссылки на задачи, чтобы их не собрал GC
+
+
+async def _bump() -> None:
+    try:
+        await search_cache.bump()
+        if isinstance(search_cache, InMemorySearchCache):
+            await notify(NOTIFY_CHANNEL) # Остальным процессам; Redis общий и без этого
+    except Exception:
+        logger.exception("Не удалось сбросить кэш результатов поиска.")
+
+
+async def _bump_later(delay: float) -> None:
+    await asyncio.sleep(delay)
+    await _bump()
+
+
+async def invalidate_search_cache() -> None:
+    """
+    Делает все сохранённые результаты поиска устаревшими. Вызывается после любого
+    изменения объявлений; ошибка не должна откатывать уже выполненное изменение.
+
+    С репликой для чтения поиск, начавшийся сразу после изменения, может прочитать
+    с реплики старые данные и сохранить их под новым поколением. Поэтому поколение
+    увеличивается ещё раз, когда реплика заведомо догнала основной сервер.
+    """
+    if search_cache is None:
+        return
+    await _bump()
+    if settings.database_replica_url:
+        task = asyncio.create_task(_bump_later(settings.database_read_your_writes_seconds))
+        _delayed_bumps.add(task)
+        task.add_done_callback(_delayed_bumps.discard)
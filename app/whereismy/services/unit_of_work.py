@@ -0,0 +1,114 @@
+# app/whereismy/services/unit_of_work.py
+"""
+Единица работы (unit of work): одна сессия и одна транзакция на сценарий.
+
+Методы репозиториев только отправляют изменения в БД (flush), а фиксирует их UnitOfWork —
+один раз в конце сценария. «Создать находку и записать совпадения» — это одна транзакция
+и один COMMIT: при ошибке не остаётся объявления без совпадений или наоборот.
+
+    async with UnitOfWork() as uow:
+        service = ItemsService(uow.items, uow.users)
+        item = await service.create_found_item(uow.session, ...)
+    # Здесь изменения уже зафиксированы, а действия after_commit выполнены
+
+Побочные эффекты вне БД (индекс в памяти, кэш результатов поиска) регистрируются через
+after_commit и выполняются только после успешного COMMIT: иначе конкурентный запрос мог бы
+закэшировать выдачу, в которой изменения ещё не видны.
+
+Сценарии только для чтения (поиск, списки) открывают UnitOfWork(read_only=True) и,
+если настроена реплика (database_replica_url), читают с неё. Реплика отстаёт от основного
+сервера, поэтому сценарии пользователя помечаются consistency_key (например, Telegram ID):
+после записи по этому ключу его чтения ещё database_read_your_writes_seconds идут на
+основной сервер, и только что созданное объявление сразу видно в «Мои объявления».
+
+    async with UnitOfWork(read_only=True, consistency_key=user_id) as uow:
+        items = await ItemsService(uow.items, uow.users).get_user_items(uow.session, user_id)
+"""
+import inspect
+import logging
+from typing import Awaitable, Callable, Hashable, Optional, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.whereismy.core.database import AsyncSessionLocal, read_session_factory, recent_writes
+from app.whereismy.core.repository.category_repository import CategoryRepository
+from app.whereismy.core.repository.item_embedding_repository import ItemEmbeddingRepository
+from app.whereismy.core.repository.item_match_repository import ItemMatchRepository
+from app.whereismy.core.repository.item_repository import ItemRepository
+from app.whereismy.core.repository.location_repository import LocationRepository
+from app.whereismy.core.repository.user_repository import UserRepository
+
+logger = logging.getLogger(__name__)
+
+AfterCommitCallback = Callable[[], Union[None, Awaitable[None]]]
+
+_AFTER_COMMIT_KEY = "after_commit" # Ключ списка действий в session.info
+
+
+def after_commit(session: AsyncSession, callback: AfterCommitCallback) -> None:
+    """
+    Откладывает действие до успешного COMMIT транзакции UnitOfWork, которой принадлежит сессия.
+    При откате действия отбрасываются.
+    """
+    session.info.setdefault(_AFTER_COMMIT_KEY, []).append(callback)
+
+
+class UnitOfWork:
+    """
+    Владеет сессией и транзакцией, выдаёт репозитории, привязанные к этой сессии.
+    На выходе из `async with` без исключения — COMMIT, с исключением — ROLLBACK.
+
+    read_only — сценарий только читает: сессия берётся с реплики, если она настроена
+    и по consistency_key не было недавней записи. Пишущий сценарий с consistency_key
+    после COMMIT отмечает ключ в recent_writes. Явная session_factory важнее read_only.
+    """
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+        read_only: bool = False,
+        consistency_key: Optional[Hashable] = None,
+    ):
+        if session_factory is None:
+            session_factory = read_session_factory(consistency_key) if read_only else AsyncSessionLocal
+        self._session_factory = session_factory
+        self.read_only = read_only
+        self.consistency_key = consistency_key
+        self.session: Optional[AsyncSession] = None
+
+    async def __aenter__(self) -> "UnitOfWork":
+        self.session = self._session_factory()
+        self.items = ItemRepository(self.session)
+        self.users = UserRepository(self.session)
+        self.categories = CategoryRepository(self.session)
+        self.locations = LocationRepository(self.session)
+        self.matches = ItemMatchRepository(self.session)
+        self.embeddings = ItemEmbeddingRepository(self.session)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                await self.commit()
+            else:
+                await self.rollback()
+        finally:
+            await self.session.close()
+
+    async def commit(self) -> None:
+        """Фиксирует транзакцию и выполняет отложенные действия after_commit."""
+        await self.session.commit()
+        if not self.read_only and self.consistency_key is not None:
+            recent_writes.mark(self.consistency_key)
+        callbacks = self.session.info.pop(_AFTER_COMMIT_KEY, [])
+        for callback in callbacks:
+            # Данные уже зафиксированы: сбой побочного действия не должен превращаться в ошибку запроса
+            try:
+                result = callback()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("Ошибка в действии после фиксации транзакции.")
+
+    async def rollback(self) -> None:
+        await self.session.rollback()
+        self.session.info.pop(_AFTER_COMMIT_KEY, None)
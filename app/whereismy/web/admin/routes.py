@@ -5,12 +5,14 @@ from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.whereismy.web.api.deps import get_db_session_dep
 from app.whereismy.web.api.security import get_current_moderator
-from app.whereismy.core.repository.item_repository import ItemRepository
+from app.whereismy.core.repository.item_repository import ITEM_RELATIONS, ItemRepository, item_load_options
+from app.whereismy.core.repository.pagination import InvalidCursorError
 from app.whereismy.core.repository.category_repository import CategoryRepository
 from app.whereismy.core.repository.location_repository import LocationRepository
 from app.whereismy.core.repository.user_repository import UserRepository
 from app.whereismy.services.items_service import ItemsService
-from app.whereismy.core.models import User # Импортируем модель User
+from app.whereismy.services.reference_data import notify_reference_data_changed, reference_data
+from app.whereismy.core.models import ItemStatus, User # Импортируем модель User
 
 # Указываем путь к папке с шаблонами
 templates = Jinja2Templates(directory="app/whereismy/web/templates")
@@ -34,14 +36,27 @@ async def get_login_page(request: Request):
 @router.get("/dashboard", response_class=HTMLResponse)
 async def get_admin_dashboard(
     request: Request,
+    q: str | None = None, # Строка поиска: нечёткий поиск по описанию и месту, включая архив
+    cursor: str | None = None, # Курсор следующей страницы списка (без поиска)
     current_moderator: User = Depends(get_current_moderator), # Защищаем роут
-    db_session: AsyncSession = Depends(get_db_session_dep)
+    db_session: AsyncSession = Depends(get_db_session_dep, scope="function")
 ):
     """
     Отображает основную панель модератора (список объявлений).
     """
     item_repo = ItemRepository(db_session)
-    items = await item_repo.get_list(db_session, skip=0, limit=100) # Получаем список объявлений
+    next_cursor = None
+    if q and q.strip():
+        items = await item_repo.find_fuzzy(q.strip(), limit=100) # Триграммный поиск с учётом опечаток
+    else:
+        # Страница от новых к старым; категория, корпус и автор загружаются тем же запросом
+        try:
+            page = await item_repo.get_page(
+                cursor=cursor, limit=100, options=item_load_options(ITEM_RELATIONS)
+            )
+        except InvalidCursorError:
+            return RedirectResponse(url="/admin/dashboard", status_code=status.HTTP_303_SEE_OTHER)
+        items, next_cursor = page.items, page.next_cursor
 
     # Рендерим шаблон, передав ему список объявлений и текущего модератора
     return templates.TemplateResponse(
@@ -49,6 +64,8 @@ async def get_admin_dashboard(
         {
             "request": request,
             "items": items,
+            "q": q or "",
+            "next_cursor": next_cursor,
             "current_moderator": current_moderator # Передаем имя модератора в шаблон
         }
     )
@@ -59,21 +76,20 @@ async def get_edit_item_form(
     request: Request,
     item_id: int,
     current_moderator: User = Depends(get_current_moderator),
-    db_session: AsyncSession = Depends(get_db_session_dep)
+    db_session: AsyncSession = Depends(get_db_session_dep, scope="function")
 ):
     """
     Отображает форму редактирования объявления.
     """
     item_repo = ItemRepository(db_session)
-    category_repo = CategoryRepository(db_session)
-    location_repo = LocationRepository(db_session)
 
-    item = await item_repo.get(db_session, item_id)
+    item = await item_repo.get(item_id)
     if not item:
         return RedirectResponse(url="/admin/dashboard", status_code=status.HTTP_404_NOT_FOUND)
 
-    categories = await category_repo.get_list(db_session)
-    locations = await location_repo.get_list(db_session)
+    # Списки для выпадающих меню — из кэша справочников
+    categories = await reference_data.categories()
+    locations = await reference_data.locations()
 
     return templates.TemplateResponse(
         "edit_item.html",
@@ -95,9 +111,9 @@ async def post_edit_item_form(
     description: str = Form(...),
     category_id: int = Form(...),
     location_id: int | None = Form(None), # Используем | None
-    status: str = Form(...),
+    item_status: str = Form(..., alias="status"), # Не "status": иначе перекрывается fastapi.status
     current_moderator: User = Depends(get_current_moderator),
-    db_session: AsyncSession = Depends(get_db_session_dep)
+    db_session: AsyncSession = Depends(get_db_session_dep, scope="function")
 ):
     """
     Обрабатывает отправленную форму редактирования объявления.
@@ -107,19 +123,19 @@ async def post_edit_item_form(
     user_repo = UserRepository(db_session)
     items_service = ItemsService(item_repo, user_repo)
 
-    item = await item_repo.get(db_session, item_id)
+    item = await item_repo.get(item_id)
     if not item:
         return RedirectResponse(url="/admin/dashboard", status_code=status.HTTP_404_NOT_FOUND)
 
-    # Обновляем поля объекта Item
-    item.title = title
-    item.description = description
-    item.category_id = category_id
-    item.location_id = location_id
-    item.status = status # Предполагаем, что строка соответствует enum в БД
-
-    # Вызываем репозиторий для обновления
-    updated_item = await item_repo.update(db_session, item, item) # Обновляем самим собой
+    # Заголовка у Item нет (title формы не сохраняется); статус в форме — значение enum ("active")
+    await items_service.update_item(
+        db_session,
+        item,
+        description=description,
+        category_id=category_id,
+        location_id=location_id,
+        status=ItemStatus(item_status),
+    )
 
     # Перенаправляем обратно на панель
     return RedirectResponse(url="/admin/dashboard", status_code=status.HTTP_302_FOUND)
@@ -129,7 +145,7 @@ async def post_edit_item_form(
 async def archive_item(
     item_id: int,
     current_moderator: User = Depends(get_current_moderator),
-    db_session: AsyncSession = Depends(get_db_session_dep)
+    db_session: AsyncSession = Depends(get_db_session_dep, scope="function")
 ):
     """
     Архивирует объявление (для модератора).
@@ -153,32 +169,63 @@ async def archive_item(
 async def delete_item(
     item_id: int,
     current_moderator: User = Depends(get_current_moderator),
-    db_session: AsyncSession = Depends(get_db_session_dep)
+    db_session: AsyncSession = Depends(get_db_session_dep, scope="function")
 ):
     """
     Удаляет объявление (для модератора).
     """
-    item_repo = ItemRepository(db_session)
-    # Для простоты, просто удаляем из БД. В реальности может быть архивация или сложная логика.
-    success = await item_repo.delete(db_session, item_id)
+    items_service = ItemsService(ItemRepository(db_session), UserRepository(db_session))
+    # Как и массовое удаление: после фиксации объявление уходит из индекса в памяти и кэша поиска
+    success = bool(await items_service.delete_items(db_session, [item_id]))
 
     if success:
         return RedirectResponse(url="/admin/dashboard", status_code=status.HTTP_302_FOUND)
     else:
         return RedirectResponse(url="/admin/dashboard", status_code=status.HTTP_404_NOT_FOUND)
 
+# Массовые действия с отмеченными на панели объявлениями
+@router.post("/items/bulk-archive")
+async def bulk_archive_items(
+    item_ids: list[int] = Form(default_factory=list), # Ничего не отмечено — пустой список, а не 422
+    current_moderator: User = Depends(get_current_moderator),
+    db_session: AsyncSession = Depends(get_db_session_dep, scope="function")
+):
+    """
+    Архивирует выбранные объявления одним запросом.
+    """
+    if not item_ids:
+        return RedirectResponse(url="/admin/dashboard", status_code=status.HTTP_302_FOUND)
+    items_service = ItemsService(ItemRepository(db_session), UserRepository(db_session))
+    await items_service.archive_items(db_session, item_ids)
+    return RedirectResponse(url="/admin/dashboard", status_code=status.HTTP_302_FOUND)
+
+@router.post("/items/bulk-delete")
+async def bulk_delete_items(
+    item_ids: list[int] = Form(default_factory=list), # Ничего не отмечено — пустой список, а не 422
+    current_moderator: User = Depends(get_current_moderator),
+    db_session: AsyncSession = Depends(get_db_session_dep, scope="function")
+):
+    """
+    Удаляет выбранные объявления одним запросом.
+    """
+    if not item_ids:
+        return RedirectResponse(url="/admin/dashboard", status_code=status.HTTP_302_FOUND)
+    items_service = ItemsService(ItemRepository(db_session), UserRepository(db_session))
+    await items_service.delete_items(db_session, item_ids)
+    return RedirectResponse(url="/admin/dashboard", status_code=status.HTTP_302_FOUND)
+
 # Роут для управления категориями
 @router.get("/categories", response_class=HTMLResponse)
 async def get_manage_categories(
     request: Request,
     current_moderator: User = Depends(get_current_moderator),
-    db_session: AsyncSession = Depends(get_db_session_dep)
+    db_session: AsyncSession = Depends(get_db_session_dep, scope="function")
 ):
     """
     Отображает страницу управления категориями.
     """
     category_repo = CategoryRepository(db_session)
-    categories = await category_repo.get_list(db_session)
+    categories = await category_repo.get_list()
 
     return templates.TemplateResponse(
         "manage_categories.html",
@@ -194,7 +241,7 @@ async def get_manage_categories(
 async def create_category(
     name: str = Form(...),
     current_moderator: User = Depends(get_current_moderator),
-    db_session: AsyncSession = Depends(get_db_session_dep)
+    db_session: AsyncSession = Depends(get_db_session_dep, scope="function")
 ):
     """
     Обрабатывает создание новой категории.
@@ -203,7 +250,8 @@ async def create_category(
     # Создаем объект категории (предполагаем модель Category с полем name)
     from app.whereismy.core.models import Category
     new_category = Category(name=name)
-    await category_repo.create(db_session, new_category)
+    await category_repo.create(new_category)
+    await notify_reference_data_changed(db_session)
 
     return RedirectResponse(url="/admin/categories", status_code=status.HTTP_302_FOUND)
 
@@ -213,18 +261,19 @@ async def update_category(
     category_id: int,
     name: str = Form(...),
     current_moderator: User = Depends(get_current_moderator),
-    db_session: AsyncSession = Depends(get_db_session_dep)
+    db_session: AsyncSession = Depends(get_db_session_dep, scope="function")
 ):
     """
     Обрабатывает обновление категории.
     """
     category_repo = CategoryRepository(db_session)
-    category = await category_repo.get(db_session, category_id)
+    category = await category_repo.get(category_id)
     if not category:
         return RedirectResponse(url="/admin/categories", status_code=status.HTTP_404_NOT_FOUND)
 
     category.name = name
-    await category_repo.update(db_session, category, category)
+    await category_repo.update(category, category)
+    await notify_reference_data_changed(db_session)
 
     return RedirectResponse(url="/admin/categories", status_code=status.HTTP_302_FOUND)
 
@@ -233,7 +282,7 @@ async def update_category(
 async def delete_category(
     category_id: int,
     current_moderator: User = Depends(get_current_moderator),
-    db_session: AsyncSession = Depends(get_db_session_dep)
+    db_session: AsyncSession = Depends(get_db_session_dep, scope="function")
 ):
     """
     Обрабатывает удаление категории.
@@ -251,9 +300,9 @@ async def delete_category(
     #     # Не удаляем, если есть связанные объявления
     #     return RedirectResponse(url="/admin/categories", status_code=status.HTTP_400_BAD_REQUEST)
 
-    success = await category_repo.delete(db_session, category_id)
-
+    success = await category_repo.delete(category_id)
     if success:
+        await notify_reference_data_changed(db_session)
         return RedirectResponse(url="/admin/categories", status_code=status.HTTP_302_FOUND)
     else:
         return RedirectResponse(url="/admin/categories", status_code=status.HTTP_404_NOT_FOUND)
@@ -263,13 +312,13 @@ async def delete_category(
 async def get_manage_locations(
     request: Request,
     current_moderator: User = Depends(get_current_moderator),
-    db_session: AsyncSession = Depends(get_db_session_dep)
+    db_session: AsyncSession = Depends(get_db_session_dep, scope="function")
 ):
     """
     Отображает страницу управления локациями.
     """
     location_repo = LocationRepository(db_session)
-    locations = await location_repo.get_list(db_session)
+    locations = await location_repo.get_list()
 
     return templates.TemplateResponse(
         "manage_locations.html",
@@ -285,7 +334,7 @@ async def get_manage_locations(
 async def create_location(
     name: str = Form(...),
     current_moderator: User = Depends(get_current_moderator),
-    db_session: AsyncSession = Depends(get_db_session_dep)
+    db_session: AsyncSession = Depends(get_db_session_dep, scope="function")
 ):
     """
     Обрабатывает создание новой локации.
@@ -293,7 +342,8 @@ async def create_location(
     location_repo = LocationRepository(db_session)
     from app.whereismy.core.models import Location
     new_location = Location(name=name)
-    await location_repo.create(db_session, new_location)
+    await location_repo.create(new_location)
+    await notify_reference_data_changed(db_session)
 
     return RedirectResponse(url="/admin/locations", status_code=status.HTTP_302_FOUND)
 
@@ -303,18 +353,19 @@ async def update_location(
     location_id: int,
     name: str = Form(...),
     current_moderator: User = Depends(get_current_moderator),
-    db_session: AsyncSession = Depends(get_db_session_dep)
+    db_session: AsyncSession = Depends(get_db_session_dep, scope="function")
 ):
     """
     Обрабатывает обновление локации.
     """
     location_repo = LocationRepository(db_session)
-    location = await location_repo.get(db_session, location_id)
+    location = await location_repo.get(location_id)
     if not location:
         return RedirectResponse(url="/admin/locations", status_code=status.HTTP_404_NOT_FOUND)
 
     location.name = name
-    await location_repo.update(db_session, location, location)
+    await location_repo.update(location, location)
+    await notify_reference_data_changed(db_session)
 
     return RedirectResponse(url="/admin/locations", status_code=status.HTTP_302_FOUND)
 
@@ -323,16 +374,16 @@ async def update_location(
 async def delete_location(
     location_id: int,
     current_moderator: User = Depends(get_current_moderator),
-    db_session: AsyncSession = Depends(get_db_session_dep)
+    db_session: AsyncSession = Depends(get_db_session_dep, scope="function")
 ):
     """
     Обрабатывает удаление локации.
     """
     location_repo = LocationRepository(db_session)
     # Проверка зависимостей (аналогично категории)
-    success = await location_repo.delete(db_session, location_id)
-
+    success = await location_repo.delete(location_id)
     if success:
+        await notify_reference_data_changed(db_session)
         return RedirectResponse(url="/admin/locations", status_code=status.HTTP_302_FOUND)
     else:
         return RedirectResponse(url="/admin/locations", status_code=status.HTTP_404_NOT_FOUND)
@@ -1,13 +1,20 @@
 # app/whereismy/web/api/deps.py
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.whereismy.core.database import get_db_session
+from app.whereismy.services.unit_of_work import UnitOfWork
 
 # Зависимость для получения сессии БД
 # Роуты будут использовать эту зависимость, чтобы получить доступ к БД.
+# Запрос — одна единица работы: изменения фиксируются одним COMMIT после успешного
+# выполнения роута и откатываются, если роут выбросил исключение.
+# Подключать с Depends(get_db_session_dep, scope="function"): иначе выход из зависимости
+# (и COMMIT) выполняется уже после отправки ответа, и клиент получает успех до фиксации.
 async def get_db_session_dep() -> AsyncSession:
-    async for session in get_db_session():
-        try:
-            yield session
-        finally:
-            await session.close()
+    async with UnitOfWork() as uow:
+        yield uow.session
+
+# Сессия для роутов, которые только читают: с реплики, если она настроена (database_replica_url).
+# Данные могут отставать от основного сервера на время репликации.
+async def get_read_session_dep() -> AsyncSession:
+    async with UnitOfWork(read_only=True) as uow:
+        yield uow.session
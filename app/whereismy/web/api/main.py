@@ -1,9 +1,51 @@
 # app/whereismy/web/api/main.py
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, status
+from fastapi.responses import JSONResponse
+from app.whereismy.core.database import pool_stats
+from app.whereismy.core.vector_index import (
+    load_vector_index, refresh_vector_index_periodically, vector_index, vector_index_enabled,
+)
+from app.whereismy.services.embedding_service import embedding_service
+from app.whereismy.services.search_cache import search_cache
+from app.whereismy.services.matching_service import rematch_periodically
+from app.whereismy.services.archival_service import archive_periodically
+from app.whereismy.core.pg_listener import pg_listener
+from app.whereismy.services.reference_data import reference_data
 from app.whereismy.web.api.routers import auth, items, categories, locations
 from app.whereismy.web.admin.routes import router as admin_router
 
-app = FastAPI(title="WhereIsMy API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Действия при старте и остановке приложения."""
+    # Модель векторизации грузим в фоне: админка и остальные эндпоинты без поиска
+    # доступны сразу, а /health/ready отвечает 503, пока прогрев не завершится.
+    warmup_task = asyncio.create_task(embedding_service.warmup())
+    # Загружаем векторный индекс в память (если выбран бэкенд numpy)
+    await load_vector_index()
+    refresh_task = asyncio.create_task(refresh_vector_index_periodically())
+    # Справочники (категории, корпуса) в память; LISTEN на сбросы справочников и кэша поиска
+    # из других процессов (core/pg_listener.py)
+    await reference_data.load()
+    listener_task = asyncio.create_task(pg_listener.run())
+    # Периодическое пересопоставление потерь и находок (если задан интервал)
+    rematch_task = asyncio.create_task(rematch_periodically())
+    # Периодическая архивация старых объявлений (если задан интервал)
+    archival_task = asyncio.create_task(archive_periodically())
+    yield
+    archival_task.cancel()
+    rematch_task.cancel()
+    listener_task.cancel()
+    refresh_task.cancel()
+    warmup_task.cancel()
+    await embedding_service.close()
+    if search_cache is not None:
+        await search_cache.close()
+
+
+app = FastAPI(title="WhereIsMy API", version="0.1.0", lifespan=lifespan)
 
 # Подключаем роутеры
 app.include_router(auth.router, prefix="/api/v1", tags=["auth"])
@@ -17,6 +59,31 @@ app.include_router(admin_router)
 def read_root():
     return {"message": "Welcome to WhereIsMy API"}
 
+
+@app.get("/health")
+def health():
+    """Liveness: процесс запущен и обрабатывает запросы."""
+    return {"status": "ok"}
+
+
+@app.get("/health/ready")
+def health_ready():
+    """Readiness: модель векторизации прогрета и (если используется) векторный индекс загружен."""
+    checks = {
+        "embedding_model": embedding_service.ready,
+        "vector_index": vector_index.loaded if vector_index_enabled() else True,
+    }
+    ready = all(checks.values())
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if ready else "not ready", "checks": checks},
+    )
+
+@app.get("/health/db-pool")
+def health_db_pool():
+    """Пул соединений с БД: занятые соединения, overflow, время ожидания соединения."""
+    return pool_stats()
+
 # Точка входа для uvicorn (например, `uvicorn app.whereismy.web.api.main:app --reload`)
 # Это можно оставить здесь или вынести в отдельный скрипт запуска.
 if __name__ == "__main__":
@@ -12,7 +12,7 @@ router = APIRouter()
 @router.post("/auth/login", response_model=Token)
 async def login_for_access_token(
     login_data: LoginData, # Pydantic-модель для тела запроса
-    db_session: AsyncSession = Depends(get_db_session_dep)
+    db_session: AsyncSession = Depends(get_db_session_dep, scope="function")
 ):
     """
     Аутентифицирует пользователя и возвращает токен.
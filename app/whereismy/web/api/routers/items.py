@@ -1,9 +1,10 @@
 # app/whereismy/web/api/routers/items.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.whereismy.web.api.deps import get_db_session_dep
+from app.whereismy.web.api.deps import get_db_session_dep, get_read_session_dep
 from app.whereismy.core.repository.item_repository import ItemRepository
+from app.whereismy.core.repository.pagination import InvalidCursorError
 from app.whereismy.core.repository.user_repository import UserRepository # Для проверок в будущем
 from app.whereismy.services.items_service import ItemsService
 from app.whereismy.core.models import Item
@@ -18,7 +19,7 @@ router = APIRouter()
 @router.post("/items/", response_model=Item, status_code=status.HTTP_201_CREATED)
 async def create_found_item(
     item_data: ItemCreate, # Pydantic-модель для входящих данных
-    db_session: AsyncSession = Depends(get_db_session_dep)
+    db_session: AsyncSession = Depends(get_db_session_dep, scope="function")
 ):
     """
     Создать новое объявление о находке.
@@ -42,7 +43,7 @@ async def create_found_item(
     return new_item
 
 @router.get("/items/{item_id}", response_model=Item)
-async def get_item(item_id: int, db_session: AsyncSession = Depends(get_db_session_dep)):
+async def get_item(item_id: int, db_session: AsyncSession = Depends(get_read_session_dep, scope="function")):
     """
     Получить объявление по ID.
     """
@@ -52,21 +53,25 @@ async def get_item(item_id: int, db_session: AsyncSession = Depends(get_db_sessi
         raise HTTPException(status_code=404, detail="Item not found")
     return item
 
-@router.get("/items/", response_model=List[Item])
+@router.get("/items/")
 async def get_items(
-    skip: int = 0,
-    limit: int = 100,
-    db_session: AsyncSession = Depends(get_db_session_dep)
+    cursor: str | None = None, # next_cursor из предыдущего ответа; без него — первая страница
+    limit: int = Query(100, ge=1, le=500),
+    db_session: AsyncSession = Depends(get_read_session_dep, scope="function")
 ):
     """
-    Получить список объявлений с пагинацией.
+    Получить список объявлений (от новых к старым) с курсорной пагинацией.
+    Ответ: {"items": [...], "next_cursor": "..."}; next_cursor = null на последней странице.
     """
     item_repo = ItemRepository(db_session)
-    items = await item_repo.get_list(db_session, skip=skip, limit=limit) # Используем get_list
-    return items
+    try:
+        page = await item_repo.get_page(cursor=cursor, limit=limit)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": page.items, "next_cursor": page.next_cursor}
 
 @router.delete("/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_item(item_id: int, db_session: AsyncSession = Depends(get_db_session_dep)):
+async def delete_item(item_id: int, db_session: AsyncSession = Depends(get_db_session_dep, scope="function")):
     """
     Архивировать объявление (пользователем или модератором).
     """
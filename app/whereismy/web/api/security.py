@@ -44,7 +44,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
 
 async def get_current_user(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
-    db_session: AsyncSession = Depends(get_db_session_dep)
+    db_session: AsyncSession = Depends(get_db_session_dep, scope="function")
 ) -> User:
     """Получает текущего пользователя из токена."""
     credentials_exception = HTTPException(
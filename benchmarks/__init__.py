@@ -0,0 +1,3 @@
+# benchmarks/__init__.py
+# Замеры производительности и качества поиска. Запускаются из корня репозитория:
+#     python -m benchmarks.<модуль> --help
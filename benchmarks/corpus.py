@@ -0,0 +1,200 @@
+# benchmarks/corpus.py
+"""
+Синтетический корпус объявлений бюро находок на русском языке для замеров.
+
+Описание собирается из шаблона: предмет (с родом для согласования), цвет, бренд или
+примета и место. Категории и корпуса распределены неравномерно, как в реальных данных:
+телефоны и ключи теряют чаще, чем зонты, а в главном корпусе находят больше, чем в спортзале.
+
+Векторы для больших корпусов (100k, 1M) удобнее не считать моделью, а генерировать
+синтетически: каждому виду предмета соответствует центр кластера, вектор объявления —
+центр плюс шум (см. synthetic_item_vectors).
+"""
+import datetime
+import random
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Категория -> (вес в корпусе, [(предмет в им. падеже, род: m/f/n/p)])
+CATEGORIES: Dict[str, Tuple[float, List[Tuple[str, str]]]] = {
+    "Электроника": (0.24, [
+        ("телефон", "m"), ("смартфон", "m"), ("наушники", "p"), ("зарядка", "f"),
+        ("ноутбук", "m"), ("планшет", "m"), ("флешка", "f"), ("пауэрбанк", "m"),
+    ]),
+    "Ключи": (0.16, [("ключи", "p"), ("связка ключей", "f"), ("ключ от шкафчика", "m"), ("брелок", "m")]),
+    "Документы": (0.14, [
+        ("паспорт", "m"), ("студенческий билет", "m"), ("зачётка", "f"),
+        ("пропуск", "m"), ("банковская карта", "f"), ("права", "p"),
+    ]),
+    "Одежда": (0.14, [
+        ("куртка", "f"), ("шапка", "f"), ("шарф", "m"), ("перчатки", "p"),
+        ("толстовка", "f"), ("кофта", "f"), ("пальто", "n"),
+    ]),
+    "Сумки и кошельки": (0.12, [("рюкзак", "m"), ("сумка", "f"), ("кошелёк", "m"), ("пенал", "m"), ("чехол", "m")]),
+    "Аксессуары": (0.10, [("очки", "p"), ("часы", "p"), ("кольцо", "n"), ("браслет", "m"), ("зонт", "m")]),
+    "Прочее": (0.10, [("бутылка", "f"), ("термос", "m"), ("тетрадь", "f"), ("книга", "f"), ("калькулятор", "m")]),
+}
+
+# Корпус -> (вес, адрес). Распределение убывающее (примерно закон Ципфа).
+LOCATIONS: Dict[str, Tuple[float, str]] = {
+    f"Корпус {n}": (1.0 / n, f"ул. Университетская, {n}") for n in range(1, 11)
+}
+
+COLORS = {
+    "m": ["чёрный", "белый", "синий", "красный", "серый", "зелёный", "розовый", "коричневый"],
+    "f": ["чёрная", "белая", "синяя", "красная", "серая", "зелёная", "розовая", "коричневая"],
+    "n": ["чёрное", "белое", "синее", "красное", "серое", "зелёное", "розовое", "коричневое"],
+    "p": ["чёрные", "белые", "синие", "красные", "серые", "зелёные", "розовые", "коричневые"],
+}
+BRANDS = ["Apple", "Samsung", "Xiaomi", "Huawei", "Nike", "Adidas", "Casio", "Sony", "JBL", "Zara"]
+DETAILS = [
+    "с наклейкой", "с брелоком в виде кота", "в прозрачном чехле", "с трещиной на углу",
+    "с инициалами А.С.", "с потёртостями", "на шнурке", "с красной лентой", "почти новый",
+]
+PLACES = [
+    "в аудитории {room}", "в столовой", "в библиотеке", "в гардеробе", "у входа",
+    "на скамейке возле входа", "в коридоре {floor} этажа", "в спортзале", "в туалете {floor} этажа",
+    "на подоконнике у аудитории {room}",
+]
+# Предмет после двоеточия стоит в именительном падеже, поэтому согласуется только глагол-сказуемое
+FOUND_TEMPLATES = [
+    "Нашёл: {what} {place}",
+    "Найден{suffix} {what}, {place}",
+    "{what} {place}, отдал на вахту",
+    "Кто-то оставил: {what} {place}",
+]
+LOST_TEMPLATES = [
+    "Потерял: {what}, возможно {place}",
+    "Пропал{suffix} {what}, был{suffix} {place}",
+    "Ищу: {what}, оставил {place}",
+]
+_SUFFIX = {"m": "", "f": "а", "n": "о", "p": "ы"}
+_LOST_SUFFIX = {"m": "", "f": "а", "n": "о", "p": "и"}
+
+
+@dataclass(frozen=True)
+class SyntheticItem:
+    """Объявление синтетического корпуса; kind — индекс вида предмета (центра кластера)."""
+    kind: int
+    item_type: str # "FOUND" / "LOST"
+    category: str
+    location: str
+    description: str
+    specific_place: str
+    created_at: datetime.datetime
+
+
+# Плоский список видов предметов: (категория, предмет, род)
+KINDS: List[Tuple[str, str, str]] = [
+    (category, noun, gender)
+    for category, (_, nouns) in CATEGORIES.items()
+    for noun, gender in nouns
+]
+
+
+def _weighted(rng: random.Random, weights: Dict[str, Tuple[float, object]]) -> str:
+    names = list(weights)
+    return rng.choices(names, weights=[weights[name][0] for name in names])[0]
+
+
+def describe(rng: random.Random, kind: int, item_type: str = "FOUND") -> Tuple[str, str]:
+    """Случайное описание предмета вида kind и конкретное место: (description, specific_place)."""
+    _, noun, gender = KINDS[kind]
+    parts = [rng.choice(COLORS[gender]), noun]
+    if rng.random() < 0.4:
+        parts.append(rng.choice(BRANDS))
+    if rng.random() < 0.5:
+        parts.append(rng.choice(DETAILS))
+    what = " ".join(parts)
+    place = rng.choice(PLACES).format(room=rng.randint(100, 599), floor=rng.randint(1, 5))
+    if item_type == "FOUND":
+        template, suffix = rng.choice(FOUND_TEMPLATES), _SUFFIX[gender]
+    else:
+        template, suffix = rng.choice(LOST_TEMPLATES), _LOST_SUFFIX[gender]
+    description = template.format(what=what, place=place, suffix=suffix)
+    return description[0].upper() + description[1:], place
+
+
+def generate_items(
+    n: int,
+    seed: int = 0,
+    lost_share: float = 0.3,
+    days: int = 180,
+    now: Optional[datetime.datetime] = None,
+) -> Iterator[SyntheticItem]:
+    """Генерирует n объявлений; одинаковый seed даёт одинаковый корпус."""
+    rng = random.Random(seed)
+    now = now or datetime.datetime(2026, 1, 1)
+    kinds_by_category: Dict[str, List[int]] = {}
+    for kind, (category, _, _) in enumerate(KINDS):
+        kinds_by_category.setdefault(category, []).append(kind)
+    for _ in range(n):
+        category = _weighted(rng, CATEGORIES)
+        kind = rng.choice(kinds_by_category[category])
+        item_type = "LOST" if rng.random() < lost_share else "FOUND"
+        description, place = describe(rng, kind, item_type)
+        yield SyntheticItem(
+            kind=kind,
+            item_type=item_type,
+            category=category,
+            location=_weighted(rng, LOCATIONS),
+            description=description,
+            specific_place=place,
+            created_at=now - datetime.timedelta(seconds=rng.randint(0, days * 86400)),
+        )
+
+
+def query_texts(count: int, seed: int = 1) -> List[Tuple[int, str]]:
+    """Поисковые запросы пользователей: (kind, текст) в форме объявления о потере."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        kind = rng.randrange(len(KINDS))
+        queries.append((kind, describe(rng, kind, "LOST")[0]))
+    return queries
+
+
+# Разговорные замены: пользователь описывает потерю другими словами, чем нашедший
+SYNONYMS = {
+    "телефон": "мобильник", "смартфон": "телефон", "наушники": "гарнитура", "зарядка": "зарядное устройство",
+    "ноутбук": "ноут", "флешка": "usb-накопитель", "пауэрбанк": "внешний аккумулятор",
+    "ключи": "ключики", "брелок": "брелочек", "студенческий билет": "студак", "зачётка": "зачётная книжка",
+    "банковская карта": "карточка", "куртка": "ветровка", "толстовка": "худи", "кофта": "свитер",
+    "рюкзак": "портфель", "кошелёк": "бумажник", "очки": "очёчки", "часы": "наручные часы",
+    "бутылка": "бутылочка для воды", "тетрадь": "тетрадка",
+}
+# Вводные слова шаблонов describe: в перефразировке их заменяет формулировка потери
+_LEAD_IN = re.compile(r"^(Нашёл: |Кто-то оставил: |Потерял: |Ищу: |Найден[аоы]? |Пропал[аои]? )")
+
+
+def paraphrase(description: str, rng: random.Random) -> str:
+    """
+    Перефразирует описание находки в запрос о потере: другая форма фразы, синонимы,
+    часть примет опускается. Цель запроса — исходное объявление.
+    """
+    text = _LEAD_IN.sub("", description).split(",")[0] # Без места после запятой: его часто не помнят
+    for word, synonym in SYNONYMS.items():
+        if word in text and rng.random() < 0.7:
+            text = text.replace(word, synonym)
+            break
+    words = text.split()
+    if len(words) > 3 and rng.random() < 0.5:
+        del words[rng.randrange(1, len(words))] # Забытая примета
+    text = " ".join(words)
+    return rng.choice(["Потерял: {}", "Ищу: {}", "Кто-нибудь видел? {}", "{}, помогите найти"]).format(text)
+
+
+def synthetic_item_vectors(kinds: Sequence[int], dim: int = 384, noise: float = 0.6, seed: int = 0) -> np.ndarray:
+    """
+    Нормированные векторы объявлений без модели: центр кластера вида предмета плюс шум.
+    Центры фиксированы (не зависят от seed), поэтому векторы разных порций согласованы.
+    """
+    centers = np.random.default_rng(12345).normal(size=(len(KINDS), dim))
+    rng = np.random.default_rng(seed)
+    matrix = centers[np.asarray(kinds)] + noise * rng.normal(size=(len(kinds), dim))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
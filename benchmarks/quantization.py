@@ -0,0 +1,191 @@
+# benchmarks/quantization.py
+"""
+Сравнение вариантов хранения векторов в индексе: память против полноты поиска (recall@k).
+
+    python -m benchmarks.quantization --synthetic 100000     # синтетические векторы, без БД
+    python -m benchmarks.quantization                        # векторы активных находок из БД
+
+Для каждого варианта (vector / halfvec / binary) считается recall@k относительно точного
+косинусного поиска по float32: halfvec — с округлением векторов до float16, binary — отбор
+кандидатов по расстоянию Хэмминга между знаковыми битами и точное переранжирование
+(как в ItemRepository.find_similar_items). Память — размер ключа индекса на вектор.
+
+С БД дополнительно сообщаются фактические размеры построенных HNSW-индексов текущей версии
+и recall@k/задержка самих запросов ItemRepository для вариантов, у которых индекс есть.
+Результат печатается в JSON.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import List
+
+import numpy as np
+
+
+def _key_bytes(storage: str, dim: int) -> int:
+    """Размер ключа индекса на вектор: данные + 8 байт заголовка значения в PostgreSQL."""
+    data = {"vector": 4 * dim, "halfvec": 2 * dim, "binary": (dim + 7) // 8}[storage]
+    return data + 8
+
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def synthetic_vectors(n: int, dim: int = 384, clusters: int = 200, seed: int = 0) -> np.ndarray:
+    """Кластеризованные векторы: похожи на эмбеддинги описаний, где много вариаций одних вещей."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=n)
+    return _normalize(centers[labels] + 0.6 * rng.normal(size=(n, dim)))
+
+
+def make_queries(matrix: np.ndarray, count: int, noise: float = 0.3, seed: int = 1) -> np.ndarray:
+    """Запросы — зашумлённые копии случайных векторов базы (перефразированные описания)."""
+    rng = np.random.default_rng(seed)
+    base = matrix[rng.integers(0, len(matrix), size=count)]
+    scale = noise / np.sqrt(matrix.shape[1])
+    return _normalize(base + scale * rng.normal(size=base.shape))
+
+
+def simulate_recall(matrix: np.ndarray, queries: np.ndarray, k: int, candidates: list[int]) -> dict:
+    """recall@k вариантов хранения относительно точного поиска, посчитанный в памяти."""
+    dim = matrix.shape[1]
+    half = matrix.astype(np.float16).astype(np.float32)
+    bits = np.packbits(matrix > 0, axis=1)
+    results: dict = {
+        "vector": {"key_bytes": _key_bytes("vector", dim), "recall": 1.0},
+        "halfvec": {"key_bytes": _key_bytes("halfvec", dim), "recall": []},
+    }
+    for c in candidates:
+        results[f"binary_rerank{c}"] = {"key_bytes": _key_bytes("binary", dim), "recall": []}
+
+    for query in queries:
+        exact = set(_top_k(matrix @ query, k).tolist())
+        approx = _top_k(half @ query.astype(np.float16).astype(np.float32), k)
+        results["halfvec"]["recall"].append(len(exact & set(approx.tolist())) / k)
+
+        hamming = _POPCOUNT[np.bitwise_xor(bits, np.packbits(query > 0))].sum(axis=1)
+        order = np.argsort(hamming, kind="stable")
+        for c in candidates:
+            shortlist = order[:c]
+            reranked = shortlist[_top_k(matrix[shortlist] @ query, k)]
+            results[f"binary_rerank{c}"]["recall"].append(len(exact & set(reranked.tolist())) / k)
+
+    for name, entry in results.items():
+        if isinstance(entry["recall"], list):
+            entry["recall"] = round(statistics.mean(entry["recall"]), 4)
+        entry["memory_ratio"] = round(entry["key_bytes"] / results["vector"]["key_bytes"], 4)
+        entry["index_keys_mb"] = round(entry["key_bytes"] * len(matrix) / 2**20, 2)
+    return results
+
+
+async def _load_db_vectors():
+    from app.whereismy.core.database import AsyncSessionLocal
+    from app.whereismy.core.models import ItemType
+    from app.whereismy.core.repository.item_repository import ItemRepository
+
+    ids, vectors = [], []
+    async with AsyncSessionLocal() as session:
+        async for partition in ItemRepository(session).stream_active_vectors(ItemType.FOUND):
+            for row in partition:
+                ids.append(row.id)
+                vectors.append(row.vector)
+    return np.asarray(ids, dtype=np.int64), _normalize(np.asarray(vectors, dtype=np.float32))
+
+
+async def measure_db(ids: np.ndarray, matrix: np.ndarray, queries: np.ndarray, k: int) -> dict:
+    """Фактические размеры индексов и recall@k/задержка запросов ItemRepository по каждому варианту."""
+    from sqlalchemy import func, select
+
+    from app.whereismy.config import settings
+    from app.whereismy.core.database import AsyncSessionLocal
+    from app.whereismy.core.models.item_embedding import EMBEDDING_STORAGES, embedding_index_name
+    from app.whereismy.core.repository.item_repository import ItemRepository
+
+    report = {}
+    async with AsyncSessionLocal() as session:
+        repo = ItemRepository(session)
+        for storage in EMBEDDING_STORAGES:
+            index_name = embedding_index_name(settings.embedding_model_version, storage)
+            size = await session.scalar(
+                select(func.pg_relation_size(func.to_regclass(index_name)))
+            )
+            if size is None:
+                report[storage] = {"index": index_name, "built": False}
+                continue
+            recalls, latencies = [], []
+            for query in queries:
+                exact = set(ids[_top_k(matrix @ query, k)].tolist())
+                started = time.perf_counter()
+                found = await repo.find_similar_item_ids(query.tolist(), limit=k, storage=storage)
+                latencies.append((time.perf_counter() - started) * 1000)
+                await session.commit() # Сбрасываем SET LOCAL параметров поиска
+                recalls.append(len(exact & set(found)) / k)
+            report[storage] = {
+                "index": index_name,
+                "built": True,
+                "index_mb": round(size / 2**20, 2),
+                "recall": round(statistics.mean(recalls), 4),
+                "p50_ms": round(statistics.median(latencies), 3),
+                "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+            }
+    return report
+
+
+def simulated_report(matrix: np.ndarray, args, candidates: List[int]) -> tuple[dict, np.ndarray]:
+    """Отчёт по вариантам хранения в памяти; возвращает его и векторы запросов."""
+    if not len(matrix):
+        raise SystemExit("Нет векторов для замера.")
+    queries = make_queries(matrix, args.queries)
+    report = {
+        "vectors": len(matrix),
+        "dim": matrix.shape[1],
+        "k": args.k,
+        "queries": len(queries),
+        "simulated": simulate_recall(matrix, queries, args.k, candidates),
+    }
+    return report, queries
+
+
+async def database_report(args, candidates: List[int]) -> dict:
+    ids, matrix = await _load_db_vectors()
+    report, queries = simulated_report(matrix, args, candidates)
+    report["database"] = await measure_db(ids, matrix, queries, args.k)
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Память и recall@k вариантов хранения векторов.")
+    parser.add_argument("--synthetic", type=int, help="Число синтетических векторов вместо данных из БД")
+    parser.add_argument("--dim", type=int, default=384, help="Размерность синтетических векторов")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--candidates", default="20,40,100", help="Кандидатов для переранжирования binary")
+    args = parser.parse_args(argv)
+
+    candidates = [int(c) for c in args.candidates.split(",")]
+    if args.synthetic:
+        report = simulated_report(synthetic_vectors(args.synthetic, args.dim), args, candidates)[0]
+    else:
+        # Загрузка и замер в БД — в одном цикле событий: соединения пула привязаны к циклу,
+        # в котором открыты, и во втором asyncio.run были бы непригодны
+        report = asyncio.run(database_report(args, candidates))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+# benchmarks/search_latency.py
+"""
+Задержка и пропускная способность поиска на синтетическом корпусе разного размера.
+
+    python -m benchmarks.search_latency --no-db --skip-embedding          # только поиск в памяти
+    python -m benchmarks.search_latency --sizes 1000,10000,100000,1000000 --output bench.json
+    python -m benchmarks.search_latency --vectors model --sizes 1000,10000
+
+Замеры (для каждого — p50/p95/p99 в миллисекундах и запросов в секунду):
+    embedding         — EmbeddingService.embed_text, последовательно и с --concurrency;
+    numpy_exact       — точный поиск по матрице в памяти (InMemoryVectorIndex);
+    pgvector_hnsw     — ItemRepository.find_similar_item_ids с HNSW-индексом текущей версии;
+    pgvector_seqscan  — тот же запрос с enable_indexscan = off (полный перебор в PostgreSQL);
+    pgvector_filtered — то же с фильтром по категории и корпусу (ItemSearchFilters);
+    end_to_end        — ItemsService.find_similar_found_items: векторизация + поиск + загрузка.
+
+Корпус (benchmarks.corpus) записывается в базу из DATABASE_URL от имени отдельного
+пользователя-бенчмарка и наращивается от меньшего размера к большему; по окончании
+удаляется (--keep оставляет его, и следующий запуск продолжит заполнение).
+Запускайте на локальной базе: заполнение 1M объявлений с HNSW-индексом занимает время.
+
+Векторы корпуса по умолчанию синтетические (кластер на вид предмета), чтобы 1M объявлений
+не требовали векторизации моделью; --vectors model считает их моделью из настроек.
+Кэши эмбеддингов и результатов поиска отключаются, если не заданы явно в окружении.
+
+Результат — JSON с параметрами запуска и коммитом, чтобы сравнивать версии между собой.
+"""
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from benchmarks.corpus import CATEGORIES, LOCATIONS, generate_items, query_texts, synthetic_item_vectors
+
+BENCHMARK_TELEGRAM_ID = -1 # Пользователь-владелец синтетических объявлений
+
+
+def latency_report(latencies_ms: Sequence[float], wall_seconds: float) -> dict:
+    """Перцентили задержки и пропускная способность серии запросов."""
+    return {
+        "requests": len(latencies_ms),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+        "mean_ms": round(statistics.mean(latencies_ms), 3),
+        "qps": round(len(latencies_ms) / wall_seconds, 1) if wall_seconds else None,
+    }
+
+
+async def run_timed(call: Callable[[object], Awaitable[object]], inputs: Sequence, concurrency: int = 1) -> dict:
+    """Выполняет call для каждого входа не более чем в concurrency потоков и замеряет задержки."""
+    latencies: List[float] = []
+    queue = list(reversed(inputs))
+
+    async def worker() -> None:
+        while queue:
+            value = queue.pop()
+            started = time.perf_counter()
+            await call(value)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    report = latency_report(latencies, time.perf_counter() - started)
+    report["concurrency"] = concurrency
+    return report
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def bench_embedding(texts: List[str], concurrency: int) -> dict:
+    from app.whereismy.services.embedding_service import embedding_service
+
+    await embedding_service.warmup()
+    sequential = await run_timed(embedding_service.embed_text, texts, 1)
+    concurrent = await run_timed(embedding_service.embed_text, texts, concurrency)
+    return {"sequential": sequential, "concurrent": concurrent}
+
+
+async def embed_corpus(texts: List[str], batch_size: int = 256) -> np.ndarray:
+    from app.whereismy.services.embedding_service import embedding_service
+
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        vectors.extend(await embedding_service.embed_texts(texts[start:start + batch_size]))
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def bench_numpy(ids: np.ndarray, matrix: np.ndarray, queries: np.ndarray, k: int) -> dict:
+    from app.whereismy.core.vector_index import InMemoryVectorIndex
+
+    index = InMemoryVectorIndex(dim=matrix.shape[1])
+    index.replace_all(zip(ids.tolist(), matrix))
+    latencies = []
+    started = time.perf_counter()
+    for query in queries:
+        query_started = time.perf_counter()
+        index.search(query, k)
+        latencies.append((time.perf_counter() - query_started) * 1000)
+    return latency_report(latencies, time.perf_counter() - started)
+
+
+class BenchmarkCorpus:
+    """Синтетические объявления в БД: справочники, пользователь-бенчмарк и дозаполнение до размера."""
+    def __init__(self, vectors: str, seed: int = 0):
+        self.vectors = vectors
+        self.seed = seed
+        self.author_id: Optional[int] = None
+        self.category_ids: Dict[str, int] = {}
+        self.location_ids: Dict[str, int] = {}
+        self.count = 0
+
+    async def prepare(self, session) -> None:
+        """Находит или создаёт справочники и пользователя; считает уже записанные объявления."""
+        from sqlalchemy import func, select
+
+        from app.whereismy.core.models import Category, Item, Location, User
+
+        for name in CATEGORIES:
+            category = await session.scalar(select(Category).where(Category.name == name))
+            if category is None:
+                category = Category(name=name)
+                session.add(category)
+            await session.flush()
+            self.category_ids[name] = category.id
+        for name, (_, address) in LOCATIONS.items():
+            location = await session.scalar(select(Location).where(Location.name == name))
+            if location is None:
+                location = Location(name=name, address=address)
+                session.add(location)
+            await session.flush()
+            self.location_ids[name] = location.id
+        user = await session.scalar(select(User).where(User.user_id == BENCHMARK_TELEGRAM_ID))
+        if user is None:
+            user = User(user_id=BENCHMARK_TELEGRAM_ID, username="benchmark")
+            session.add(user)
+            await session.flush()
+        self.author_id = user.id
+        self.count = await session.scalar(select(func.count()).where(Item.author_id == user.id))
+        await session.commit()
+
+    async def grow_to(self, session, size: int, chunk_size: int = 10000) -> None:
+        """Дописывает объявления корпуса с номера count до size (тот же seed — тот же корпус)."""
+        from sqlalchemy import insert, text
+
+        from app.whereismy.config import settings
+        from app.whereismy.core.models import ContactMethod, Item, ItemStatus, ItemType
+        from app.whereismy.core.repository.item_embedding_repository import ItemEmbeddingRepository
+
+        if size <= self.count:
+            return
+        items = itertools.islice(generate_items(size, seed=self.seed), self.count, size)
+        writer = ItemEmbeddingRepository(session)
+        while chunk := list(itertools.islice(items, chunk_size)):
+            rows = [
+                {
+                    "author_id": self.author_id,
+                    "category_id": self.category_ids[item.category],
+                    "location_id": self.location_ids[item.location],
+                    "type": ItemType[item.item_type],
+                    "status": ItemStatus.ACTIVE,
+                    "description": item.description,
+                    "specific_place": item.specific_place,
+                    "contact_method": ContactMethod.LEFT_AT,
+                    "created_at": item.created_at,
+                }
+                for item in chunk
+            ]
+            ids = list(await session.scalars(
+                insert(Item).returning(Item.id, sort_by_parameter_order=True), rows
+            ))
+            if self.vectors == "model":
+                vectors = await embed_corpus([item.description for item in chunk])
+            else:
+                vectors = synthetic_item_vectors(
+                    [item.kind for item in chunk], dim=settings.embedding_dim, seed=self.seed + self.count
+                )
+            await writer.bulk_upsert(list(zip(ids, vectors.tolist())), settings.embedding_model_version)
+            await session.commit()
+            self.count += len(chunk)
+        # Свежая статистика, иначе планировщик оценивает таблицы по размеру до заполнения
+        await session.execute(text("ANALYZE items"))
+        await session.execute(text("ANALYZE item_embeddings"))
+        await session.commit()
+
+    async def load_matrix(self, session) -> tuple[np.ndarray, np.ndarray]:
+        """ID и векторы активных находок корпуса — для поиска в памяти с теми же данными."""
+        from sqlalchemy import select, text
+
+        from app.whereismy.core.models import Item, ItemEmbedding
+        from app.whereismy.core.models.item import ACTIVE_FOUND_CONDITION
+        from app.whereismy.core.repository.item_embedding_repository import embedding_join_condition
+
+        stmt = (
+            select(Item.id, ItemEmbedding.vector)
+            .join(ItemEmbedding, embedding_join_condition())
+            .where(text(ACTIVE_FOUND_CONDITION))
+            .where(Item.author_id == self.author_id)
+            .execution_options(yield_per=10000)
+        )
+        ids, vectors = [], []
+        result = await session.stream(stmt)
+        async for partition in result.partitions():
+            for row in partition:
+                ids.append(row.id)
+                vectors.append(row.vector)
+        return np.asarray(ids, dtype=np.int64), np.asarray(vectors, dtype=np.float32)
+
+    async def drop(self, session) -> None:
+        """Удаляет объявления (векторы и совпадения — каскадом) и пользователя-бенчмарка."""
+        from sqlalchemy import delete
+
+        from app.whereismy.core.models import Item, User
+
+        await session.execute(delete(Item).where(Item.author_id == self.author_id))
+        await session.execute(delete(User).where(User.id == self.author_id))
+        await session.commit()
+
+
+async def bench_db(corpus: BenchmarkCorpus, queries: np.ndarray, k: int, concurrency: int) -> dict:
+    from sqlalchemy import func, select
+
+    from app.whereismy.core.database import AsyncSessionLocal
+    from app.whereismy.core.repository.item_repository import ItemRepository, ItemSearchFilters
+
+    filters = ItemSearchFilters(
+        category_id=corpus.category_ids["Электроника"], location_id=corpus.location_ids["Корпус 3"]
+    )
+
+    def search(seqscan: bool = False, filtered: bool = False):
+        async def call(query: np.ndarray) -> None:
+            async with AsyncSessionLocal() as session:
+                if seqscan:
+                    await session.execute(select(func.set_config("enable_indexscan", "off", True)))
+                await ItemRepository(session).find_similar_item_ids(
+                    query.tolist(), limit=k, filters=filters if filtered else None
+                )
+                await session.commit()
+        return call
+
+    inputs = list(queries)
+    return {
+        "pgvector_hnsw": await run_timed(search(), inputs, concurrency),
+        "pgvector_seqscan": await run_timed(search(seqscan=True), inputs, concurrency),
+        "pgvector_filtered": await run_timed(search(filtered=True), inputs, concurrency),
+    }
+
+
+async def bench_end_to_end(texts: List[str], k: int, concurrency: int) -> dict:
+    from app.whereismy.core.database import AsyncSessionLocal
+    from app.whereismy.core.repository.item_repository import ItemRepository
+    from app.whereismy.core.repository.user_repository import UserRepository
+    from app.whereismy.services.items_service import ItemsService
+
+    async def call(text: str) -> None:
+        async with AsyncSessionLocal() as session:
+            service = ItemsService(ItemRepository(session), UserRepository(session))
+            await service.find_similar_found_items(session, text, limit=k)
+            await session.commit()
+
+    return await run_timed(call, texts, concurrency)
+
+
+async def run(args) -> dict:
+    from app.whereismy.config import settings
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    queries = query_texts(args.queries, seed=args.seed + 1)
+    query_strings = [text for _, text in queries]
+
+    report: dict = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "vectors": args.vectors,
+            "queries": len(queries),
+            "k": args.k,
+            "concurrency": args.concurrency,
+            "settings": {
+                "embedding_model_path": settings.embedding_model_path,
+                "embedding_model_version": settings.embedding_model_version,
+                "embedding_backend": settings.embedding_backend,
+                "vector_search_storage": settings.vector_search_storage,
+                "vector_search_ef_search": settings.vector_search_ef_search,
+                "vector_search_iterative_scan": settings.vector_search_iterative_scan,
+            },
+        },
+        "sizes": {},
+    }
+    if not args.skip_embedding:
+        report["embedding"] = await bench_embedding(query_strings, args.concurrency)
+        query_vectors = await embed_corpus(query_strings)
+    else:
+        query_vectors = synthetic_item_vectors(
+            [kind for kind, _ in queries], dim=settings.embedding_dim, seed=args.seed + 1
+        )
+
+    if args.no_db:
+        for size in sizes:
+            items = list(generate_items(size, seed=args.seed))
+            kinds = [item.kind for item in items if item.item_type == "FOUND"]
+            if args.vectors == "model":
+                matrix = await embed_corpus([item.description for item in items if item.item_type == "FOUND"])
+            else:
+                matrix = synthetic_item_vectors(kinds, dim=settings.embedding_dim, seed=args.seed)
+            report["sizes"][str(size)] = {
+                "active_found": len(matrix),
+                "numpy_exact": bench_numpy(np.arange(len(matrix)), matrix, query_vectors, args.k),
+            }
+        return report
+
+    from app.whereismy.core.database import AsyncSessionLocal
+
+    corpus = BenchmarkCorpus(args.vectors, seed=args.seed)
+    async with AsyncSessionLocal() as session:
+        await corpus.prepare(session)
+    try:
+        for size in sizes:
+            async with AsyncSessionLocal() as session:
+                started = time.perf_counter()
+                await corpus.grow_to(session, size)
+                seeded = time.perf_counter() - started
+                ids, matrix = await corpus.load_matrix(session)
+            entry = {
+                "active_found": len(ids),
+                "seed_seconds": round(seeded, 1),
+                "numpy_exact": bench_numpy(ids, matrix, query_vectors, args.k),
+            }
+            entry.update(await bench_db(corpus, query_vectors, args.k, args.concurrency))
+            if not args.skip_embedding:
+                entry["end_to_end"] = await bench_end_to_end(query_strings, args.k, args.concurrency)
+            report["sizes"][str(size)] = entry
+    finally:
+        if not args.keep:
+            async with AsyncSessionLocal() as session:
+                await corpus.drop(session)
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Задержка и QPS поиска на синтетическом корпусе.")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Размеры корпуса через запятую")
+    parser.add_argument("--queries", type=int, default=200, help="Запросов на каждый замер")
+    parser.add_argument("--k", type=int, default=5, help="Сколько результатов запрашивать")
+    parser.add_argument("--concurrency", type=int, default=8, help="Параллельных запросов для замера QPS")
+    parser.add_argument("--vectors", choices=["synthetic", "model"], default="synthetic", help="Чем векторизовать корпус")
+    parser.add_argument("--skip-embedding", action="store_true", help="Не загружать модель: без embedding и end_to_end")
+    parser.add_argument("--no-db", action="store_true", help="Без PostgreSQL: только поиск в памяти")
+    parser.add_argument("--keep", action="store_true", help="Не удалять корпус из БД после замера")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Файл для JSON-отчёта (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+    if args.skip_embedding and args.vectors == "model":
+        parser.error("--vectors model требует модель, уберите --skip-embedding")
+
+    # Кэши превратили бы повторные запросы в попадания и исказили бы задержки
+    os.environ.setdefault("SEARCH_CACHE_BACKEND", "none")
+    os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "false")
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
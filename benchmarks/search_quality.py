@@ -0,0 +1,254 @@
+# benchmarks/search_quality.py
+"""
+Качество семантического поиска при разных настройках индекса: recall@k, MRR и задержка.
+
+    python -m benchmarks.search_quality                               # перефразировки активных находок
+    python -m benchmarks.search_quality --labels labels.jsonl --ef-search 20,40,100,200
+    python -m benchmarks.search_quality --storages vector,binary --output quality.json
+
+Размеченный набор — пары «запрос о потере -> объявление о находке»:
+    synthetic — --synthetic случайных активных находок из БД, запрос — перефразировка
+                описания (benchmarks.corpus.paraphrase: синонимы, опущенные приметы);
+    labels    — необязательный JSONL-файл ручной разметки, по строке на запрос:
+                {"query": "потерял чёрный рюкзак", "item_ids": [12, 40]}
+
+Эталон — точные соседи перебором по всем векторам активных находок текущей версии.
+Для каждого варианта поиска считаются:
+    recall@k — доля точных top-k, которую вернул вариант (качество ANN-приближения);
+    mrr      — средний 1/ранг первого размеченного объявления в выдаче (0, если его нет в top-k);
+    hit@k    — доля запросов, для которых размеченное объявление попало в top-k;
+    задержка — p50/p95/p99 в миллисекундах.
+Варианты: exact (перебор в памяти; его mrr — потолок для модели), numpy (InMemoryVectorIndex)
+и ItemRepository.find_similar_item_ids для каждого построенного индекса (--storages)
+и каждого hnsw.ef_search (--ef-search). Для halfvec/binary перебирается ещё число кандидатов
+для переранжирования (--rerank-candidates): ef_search для них не меньше этого числа, поэтому
+в имени варианта стоит ef_search, с которым поиск выполнился на самом деле, а совпадающие
+после этого варианты замеряются один раз.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional, Sequence
+
+import numpy as np
+
+from benchmarks.corpus import paraphrase
+from benchmarks.quantization import _normalize, _top_k
+from benchmarks.search_latency import latency_report
+
+
+@dataclass(frozen=True)
+class LabeledQuery:
+    text: str
+    item_ids: FrozenSet[int] # Объявления, которые пользователь на самом деле искал
+    source: str # "synthetic" / "labels"
+
+
+def load_labels(path: str) -> List[LabeledQuery]:
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            item_ids = entry.get("item_ids") or [entry["item_id"]]
+            if not entry.get("query") or not item_ids:
+                raise ValueError(f"{path}:{line_number}: нужны поля query и item_ids")
+            queries.append(LabeledQuery(entry["query"], frozenset(int(i) for i in item_ids), "labels"))
+    return queries
+
+
+def synthetic_queries(ids: np.ndarray, descriptions: Sequence[str], count: int, seed: int = 0) -> List[LabeledQuery]:
+    """Перефразировки описаний случайных находок; цель запроса — сама находка."""
+    rng = random.Random(seed)
+    positions = rng.sample(range(len(ids)), min(count, len(ids)))
+    return [
+        LabeledQuery(paraphrase(descriptions[i], rng), frozenset([int(ids[i])]), "synthetic")
+        for i in positions
+        if descriptions[i]
+    ]
+
+
+def reciprocal_rank(found: Sequence[int], relevant: FrozenSet[int]) -> float:
+    for rank, item_id in enumerate(found, start=1):
+        if item_id in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def evaluate(results: List[List[int]], exact: List[List[int]], queries: List[LabeledQuery], k: int) -> dict:
+    """recall@k относительно точных соседей, MRR и hit@k по разметке."""
+    recalls = [len(set(found[:k]) & set(truth)) / len(truth) for found, truth in zip(results, exact) if truth]
+    ranks = [reciprocal_rank(found[:k], query.item_ids) for found, query in zip(results, queries)]
+    report = {
+        f"recall@{k}": round(float(np.mean(recalls)), 4) if recalls else None,
+        "mrr": round(float(np.mean(ranks)), 4),
+        f"hit@{k}": round(float(np.mean([rank > 0 for rank in ranks])), 4),
+    }
+    for source in sorted({query.source for query in queries}):
+        source_ranks = [rank for rank, query in zip(ranks, queries) if query.source == source]
+        report[f"mrr_{source}"] = round(float(np.mean(source_ranks)), 4)
+    return report
+
+
+async def load_active_found():
+    """ID, описания и нормированные векторы текущей версии всех активных находок."""
+    from sqlalchemy import select, text
+
+    from app.whereismy.core.database import AsyncSessionLocal
+    from app.whereismy.core.models import Item, ItemEmbedding
+    from app.whereismy.core.models.item import ACTIVE_FOUND_CONDITION
+    from app.whereismy.core.repository.item_embedding_repository import embedding_join_condition
+
+    stmt = (
+        select(Item.id, Item.description, ItemEmbedding.vector)
+        .join(ItemEmbedding, embedding_join_condition())
+        .where(text(ACTIVE_FOUND_CONDITION))
+        .execution_options(yield_per=10000)
+    )
+    ids, descriptions, vectors = [], [], []
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(stmt)
+        async for partition in result.partitions():
+            for row in partition:
+                ids.append(row.id)
+                descriptions.append(row.description)
+                vectors.append(row.vector)
+    return np.asarray(ids, dtype=np.int64), descriptions, _normalize(np.asarray(vectors, dtype=np.float32))
+
+
+async def built_storages(storages: Sequence[str]) -> List[str]:
+    """Варианты хранения, для которых построен индекс текущей версии."""
+    from sqlalchemy import func, select
+
+    from app.whereismy.config import settings
+    from app.whereismy.core.database import AsyncSessionLocal
+    from app.whereismy.core.models.item_embedding import embedding_index_name
+
+    built = []
+    async with AsyncSessionLocal() as session:
+        for storage in storages:
+            index_name = embedding_index_name(settings.embedding_model_version, storage)
+            if await session.scalar(select(func.to_regclass(index_name))) is not None:
+                built.append(storage)
+    return built
+
+
+async def search_repository(
+    query_vectors: np.ndarray, k: int, storage: str, ef_search: Optional[int]
+) -> tuple[List[List[int]], List[float]]:
+    from app.whereismy.core.database import AsyncSessionLocal
+    from app.whereismy.core.repository.item_repository import ItemRepository
+
+    results, latencies = [], []
+    async with AsyncSessionLocal() as session:
+        repo = ItemRepository(session)
+        for query in query_vectors:
+            started = time.perf_counter()
+            results.append(await repo.find_similar_item_ids(
+                query.tolist(), limit=k, ef_search=ef_search, storage=storage
+            ))
+            latencies.append((time.perf_counter() - started) * 1000)
+            await session.commit() # Сбрасываем SET LOCAL параметров поиска
+    return results, latencies
+
+
+def _timed_local(search, query_vectors: np.ndarray) -> tuple[List[List[int]], List[float]]:
+    results, latencies = [], []
+    for query in query_vectors:
+        started = time.perf_counter()
+        results.append(search(query))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return results, latencies
+
+
+async def run(args) -> dict:
+    from app.whereismy.config import settings
+    from app.whereismy.core.repository.item_repository import ItemRepository
+    from app.whereismy.core.vector_index import InMemoryVectorIndex
+    from app.whereismy.services.embedding_service import embedding_service
+
+    ids, descriptions, matrix = await load_active_found()
+    if not len(ids):
+        raise SystemExit("В БД нет активных находок с векторами текущей версии.")
+    queries = synthetic_queries(ids, descriptions, args.synthetic, seed=args.seed)
+    if args.labels:
+        queries += load_labels(args.labels)
+    if not queries:
+        raise SystemExit("Нет запросов для оценки.")
+    query_vectors = _normalize(np.asarray(
+        await embedding_service.embed_texts([query.text for query in queries]), dtype=np.float32
+    ))
+    k = args.k
+    exact, exact_latencies = _timed_local(lambda q: ids[_top_k(matrix @ q, k)].tolist(), query_vectors)
+
+    index = InMemoryVectorIndex(dim=matrix.shape[1])
+    index.replace_all(zip(ids.tolist(), matrix))
+    settings_runs = {
+        "exact": (exact, exact_latencies),
+        "numpy": _timed_local(lambda q: [item_id for item_id, _ in index.search(q, k)], query_vectors),
+    }
+    storages = await built_storages(args.storages.split(","))
+    ef_values = [None] + [int(value) for value in args.ef_search.split(",") if value]
+    rerank_values = [int(value) for value in args.rerank_candidates.split(",") if value]
+    default_candidates = settings.vector_search_rerank_candidates
+    try:
+        for storage in storages:
+            for candidates in ([default_candidates] if storage == "vector" else rerank_values):
+                settings.vector_search_rerank_candidates = candidates
+                prefix = f"pgvector_{storage}" if storage == "vector" else f"pgvector_{storage}_c{candidates}"
+                for ef_search in ef_values:
+                    effective = ItemRepository.effective_ef_search(storage, k, ef_search)
+                    name = f"{prefix}_ef{effective or 'default'}"
+                    if name not in settings_runs:
+                        settings_runs[name] = await search_repository(query_vectors, k, storage, ef_search)
+    finally:
+        settings.vector_search_rerank_candidates = default_candidates
+
+    report = {
+        "meta": {
+            "active_found": len(ids),
+            "queries": len(queries),
+            "k": k,
+            "embedding_model_path": settings.embedding_model_path,
+            "embedding_model_version": settings.embedding_model_version,
+            "storages_without_index": [s for s in args.storages.split(",") if s not in storages],
+        },
+        "results": {},
+    }
+    for name, (results, latencies) in settings_runs.items():
+        entry = evaluate(results, exact, queries, k)
+        entry.update(latency_report(latencies, sum(latencies) / 1000))
+        report["results"][name] = entry
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="recall@k и MRR семантического поиска при разных настройках.")
+    parser.add_argument("--synthetic", type=int, default=500, help="Число запросов-перефразировок (0 — только разметка)")
+    parser.add_argument("--labels", help="JSONL-файл ручной разметки: {\"query\": ..., \"item_ids\": [...]}")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--storages", default="vector,halfvec,binary", help="Варианты хранения в индексе")
+    parser.add_argument("--ef-search", default="20,40,100,200", help="Значения hnsw.ef_search через запятую")
+    parser.add_argument(
+        "--rerank-candidates", default="20,40,100,200",
+        help="Кандидатов для переранжирования halfvec/binary через запятую",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Файл для JSON-отчёта (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()